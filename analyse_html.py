@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extraction du texte des pages de résultat avec un parseur au choix
+
+Backends disponibles :
+- 'html.parser' : BeautifulSoup avec le parseur pur Python (comportement historique)
+- 'lxml'        : arbre lxml natif, sans BeautifulSoup
+- 'strainer'    : BeautifulSoup limité au bloc de résultat (SoupStrainer)
+- 'brut'        : aucun arbre, balises retirées directement sur le texte décodé
+
+BeautifulSoup et lxml ne sont importés qu'au premier usage : le backend
+'brut' n'utilise que la bibliothèque standard (démarrage rapide).
+
+texte_resultat limite l'analyse au bloc de résultat (repéré par ses classes
+CSS dans les octets reçus, sans arbre) et à une taille maximale : une page
+énorme ou malformée coûte au plus le prix d'une page normale.
+"""
+
+import html
+import importlib.util
+import re
+
+from metriques import METRIQUES
+
+LXML_DISPONIBLE = importlib.util.find_spec('lxml') is not None
+
+
+BACKENDS = ('html.parser', 'lxml', 'strainer', 'brut')
+
+# Parseur utilisé par BeautifulSoup quand on a besoin d'un arbre complet
+FEATURES_SOUPE = 'lxml' if LXML_DISPONIBLE else 'html.parser'
+
+# Classes CSS des blocs contenant le résultat d'un candidat
+CLASSES_RESULTAT = ['result', 'resultat', 'candidat', 'student-info',
+                    'bac-result', 'note', 'mention']
+
+# Taille maximale analysée : bloc de résultat, et page entière quand
+# aucun bloc n'est reconnu (une page de résultat fait ~21 Ko)
+TAILLE_MAX_BLOC = 64 * 1024
+TAILLE_MAX_PAGE = 512 * 1024
+
+# Balises et commentaires, en temps linéaire : un commentaire non fermé va
+# jusqu'à la fin (comme dans un navigateur) et une balise ne contient pas
+# de '<', donc un '<' isolé n'est jamais suivi jusqu'au bout de la page
+_BALISES = re.compile(r'<!--.*?(?:-->|\Z)|<[^<>]*>', re.DOTALL)
+
+# Attributs class (valeur bornée) pour repérer le premier bloc de résultat,
+# puis fin de la zone principale de la page
+_CLASSES = re.compile(
+    rb'\bclass\s*=\s*(?:"([^"<>]{0,256})"|\'([^\'<>]{0,256})\'|([^\s"\'<>]{1,256}))',
+    re.IGNORECASE)
+_CLASSES_RESULTAT = {c.encode('ascii') for c in CLASSES_RESULTAT}
+_FIN_BLOC = re.compile(rb'</main\s*>|<footer\b', re.IGNORECASE)
+
+_backend = 'lxml' if LXML_DISPONIBLE else 'html.parser'
+
+
+def configurer(backend):
+    """
+    Choisit le backend utilisé par texte_page
+    """
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inconnu '{backend}' (choix: {', '.join(BACKENDS)})")
+    if backend == 'lxml' and not LXML_DISPONIBLE:
+        raise ValueError("Le backend 'lxml' nécessite le paquet lxml")
+    _backend = backend
+
+
+def backend_actif():
+    """
+    Retourne le nom du backend utilisé par défaut
+    """
+    return _backend
+
+
+@METRIQUES.chronometrer('analyse_html')
+def creer_soupe(contenu):
+    """
+    Arbre BeautifulSoup complet, avec le parseur le plus rapide disponible
+    """
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(contenu, FEATURES_SOUPE, from_encoding='utf-8')
+
+
+def _texte_html_parser(contenu):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(contenu, 'html.parser', from_encoding='utf-8').get_text()
+
+
+def _texte_lxml(contenu):
+    import lxml.etree
+    import lxml.html
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    try:
+        document = lxml.html.document_fromstring(contenu, parser=parser)
+    except lxml.etree.ParserError:
+        # Corps vide, blanc ou fait de seuls commentaires : « Document is empty »
+        return ''
+    return document.text_content()
+
+
+def _texte_strainer(contenu):
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer(attrs={'class': CLASSES_RESULTAT})
+    soup = BeautifulSoup(contenu, FEATURES_SOUPE, parse_only=strainer,
+                         from_encoding='utf-8')
+    text = soup.get_text()
+    # Page sans bloc de résultat reconnu : se rabattre sur la page entière
+    return text if text.strip() else _texte_html_parser(contenu)
+
+
+def _texte_brut(contenu):
+    if isinstance(contenu, bytes):
+        contenu = contenu.decode('utf-8', errors='replace')
+    return html.unescape(_BALISES.sub('', contenu))
+
+
+_FONCTIONS = {
+    'html.parser': _texte_html_parser,
+    'lxml': _texte_lxml,
+    'strainer': _texte_strainer,
+    'brut': _texte_brut,
+}
+
+
+@METRIQUES.chronometrer('analyse_html')
+def texte_page(contenu, backend=None):
+    """
+    Retourne le texte d'une page HTML (bytes UTF-8 ou str)
+    """
+    return texte_page_sans_mesure(contenu, backend)
+
+
+def texte_page_sans_mesure(contenu, backend=None):
+    """
+    texte_page sans observation dans METRIQUES (analyses répétées d'un
+    début de page pendant la lecture partielle)
+    """
+    return _FONCTIONS[backend or _backend](contenu)
+
+
+def bloc_resultat(contenu):
+    """
+    Partie d'une page HTML (bytes UTF-8 ou str) contenant le résultat : du
+    premier bloc de résultat à la fin de la zone principale, au plus
+    TAILLE_MAX_BLOC ; la page entière (au plus TAILLE_MAX_PAGE) sinon
+    """
+    octets = contenu.encode('utf-8') if isinstance(contenu, str) else contenu
+    if len(octets) > TAILLE_MAX_PAGE:
+        METRIQUES.compter('pages:analyse=tronquee')
+        octets = octets[:TAILLE_MAX_PAGE]
+    return delimiter_bloc_resultat(octets)[0]
+
+
+def delimiter_bloc_resultat(octets):
+    """
+    (bloc de résultat, bloc fermé) pour une page ou un début de page en
+    bytes : le bloc est fermé quand la fin de la zone principale (ou
+    TAILLE_MAX_BLOC) est atteinte ; sans bloc reconnu, (octets, False)
+    """
+    for match in _CLASSES.finditer(octets):
+        valeur = match.group(1) or match.group(2) or match.group(3)
+        if _CLASSES_RESULTAT.isdisjoint(valeur.split()):
+            continue
+        debut = max(0, octets.rfind(b'<', 0, match.start()))
+        limite = debut + TAILLE_MAX_BLOC
+        fin = _FIN_BLOC.search(octets, match.end(), min(len(octets), limite))
+        if fin:
+            return octets[debut:fin.start()], True
+        return octets[debut:limite], len(octets) >= limite
+    return octets, False
+
+
+def texte_resultat(contenu, backend=None):
+    """
+    Texte du bloc de résultat d'une page (voir bloc_resultat)
+    """
+    return texte_page(bloc_resultat(contenu), backend)
+
+
+def texte_resultat_soupe(soup):
+    """
+    Texte des blocs de résultat d'un arbre BeautifulSoup déjà construit,
+    ou de toute la page si aucun bloc n'est reconnu
+    """
+    blocs = soup.find_all(attrs={'class': CLASSES_RESULTAT})
+    return '\n'.join(bloc.get_text() for bloc in blocs) if blocs else soup.get_text()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archive compressée des pages brutes (SQLite), pour déboguer l'extraction
+Chaque page téléchargée est compressée (deflate) avec un dictionnaire
+partagé : une page complète du site, qui contient déjà tout le gabarit
+(en-tête, menus, scripts, pied de page). Seul le bloc de résultat coûte
+réellement de la place. Un nouveau dictionnaire est créé quand aucun ne
+compresse bien une page (gabarit arabe / français, changement de gabarit).
+Accès direct par matricule, dernière version de la page.
+
+Usage:
+    python archive.py stats
+    python archive.py lire 19736 > page_19736.html
+    python archive.py importer-cache      # archiver les pages du cache de pages
+    python recherche_batch.py etu.txt --archive   # archiver pendant un lot
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+
+# Emplacement par défaut de l'archive (à côté du cache de pages)
+CHEMIN_ARCHIVE = os.path.join('.cache_bac', 'archive.sqlite')
+
+# Deflate ne voit que les 32 derniers Ko du dictionnaire
+TAILLE_DICTIONNAIRE = 32 * 1024
+
+# Au-delà de ce taux (compressé / brut), la page ne ressemble à aucun
+# dictionnaire : elle devient un nouveau dictionnaire si elle est assez grande.
+# Ordres de grandeur sur une page de ~21 Ko : deflate seul ~9 %, avec le
+# gabarit de la même langue ~0,8 %, avec celui de l'autre langue ~1,5 %.
+SEUIL_NOUVEAU_DICTIONNAIRE = 0.02
+TAILLE_MIN_DICTIONNAIRE = 4 * 1024
+MAX_DICTIONNAIRES = 16
+
+NIVEAU_COMPRESSION = 9
+
+
+def compresser(contenu, dictionnaire=None):
+    """
+    Deflate brut (sans en-tête zlib) avec dictionnaire optionnel
+    """
+    options = {'zdict': dictionnaire} if dictionnaire else {}
+    compresseur = zlib.compressobj(NIVEAU_COMPRESSION, zlib.DEFLATED, -15, **options)
+    return compresseur.compress(contenu) + compresseur.flush()
+
+
+def decompresser(donnees, dictionnaire=None):
+    options = {'zdict': dictionnaire} if dictionnaire else {}
+    decompresseur = zlib.decompressobj(-15, **options)
+    return decompresseur.decompress(donnees) + decompresseur.flush()
+
+
+def decouper_url(url):
+    """
+    URL de page de candidat -> (URL de base de la session, numéro)
+    """
+    base, numero = url.rstrip('/').rsplit('/', 1)
+    return base + '/', numero
+
+
+class ArchivePages:
+    """
+    Archive SQLite partagée entre threads (une connexion par thread)
+
+    Une page identique à la dernière version archivée du même matricule
+    n'est pas stockée à nouveau.
+    """
+
+    def __init__(self, chemin=CHEMIN_ARCHIVE):
+        self.chemin = chemin
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+
+        connexion = self._connexion()
+        connexion.execute('PRAGMA journal_mode=WAL')
+        with connexion:
+            connexion.execute(
+                'CREATE TABLE IF NOT EXISTS dictionnaires ('
+                ' id INTEGER PRIMARY KEY,'
+                ' contenu BLOB NOT NULL,'
+                ' date_creation REAL NOT NULL)')
+            connexion.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                ' id INTEGER PRIMARY KEY,'
+                ' session TEXT NOT NULL,'
+                ' matricule TEXT NOT NULL,'
+                ' date_archivage REAL NOT NULL,'
+                ' partielle INTEGER NOT NULL,'
+                ' taille INTEGER NOT NULL,'
+                ' crc INTEGER NOT NULL,'
+                ' dictionnaire INTEGER REFERENCES dictionnaires (id),'
+                ' donnees BLOB NOT NULL)')
+            connexion.execute('CREATE INDEX IF NOT EXISTS idx_pages_matricule '
+                              'ON pages (matricule, session, date_archivage)')
+        # Dictionnaires du plus récemment utile au moins utile (stockés compressés)
+        self._dictionnaires = [(identifiant, decompresser(contenu)) for identifiant, contenu in
+                               connexion.execute('SELECT id, contenu FROM dictionnaires '
+                                                 'ORDER BY id DESC')]
+
+    def _connexion(self):
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is None:
+            connexion = sqlite3.connect(self.chemin, timeout=30)
+            connexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.connexion = connexion
+        return connexion
+
+    def _dictionnaire(self, identifiant):
+        if identifiant is None:
+            return None
+        with self._verrou:
+            for ident, contenu in self._dictionnaires:
+                if ident == identifiant:
+                    return contenu
+        # Dictionnaire créé par un autre processus
+        contenu = decompresser(self._connexion().execute(
+            'SELECT contenu FROM dictionnaires WHERE id = ?', (identifiant,)).fetchone()[0])
+        with self._verrou:
+            self._dictionnaires.append((identifiant, contenu))
+        return contenu
+
+    def _compresser(self, contenu):
+        """
+        Compresse avec le premier dictionnaire qui passe sous le seuil (le
+        plus efficace sinon), ou avec un nouveau dictionnaire tiré de la page
+        Retourne (id du dictionnaire ou None, données)
+        """
+        with self._verrou:
+            candidats = list(self._dictionnaires)
+        meilleur = (None, compresser(contenu)) if not candidats else None
+        for identifiant, dictionnaire in candidats:
+            donnees = compresser(contenu, dictionnaire)
+            if meilleur is None or len(donnees) < len(meilleur[1]):
+                meilleur = (identifiant, donnees)
+            if len(donnees) <= SEUIL_NOUVEAU_DICTIONNAIRE * len(contenu):
+                break
+
+        if (len(meilleur[1]) > SEUIL_NOUVEAU_DICTIONNAIRE * len(contenu)
+                and len(contenu) >= TAILLE_MIN_DICTIONNAIRE
+                and len(candidats) < MAX_DICTIONNAIRES):
+            dictionnaire = contenu[-TAILLE_DICTIONNAIRE:]
+            connexion = self._connexion()
+            with connexion:
+                identifiant = connexion.execute(
+                    'INSERT INTO dictionnaires (contenu, date_creation) VALUES (?, ?)',
+                    (compresser(dictionnaire), time.time())).lastrowid
+            with self._verrou:
+                self._dictionnaires.insert(0, (identifiant, dictionnaire))
+            return identifiant, compresser(contenu, dictionnaire)
+
+        identifiant = meilleur[0]
+        if identifiant is not None and identifiant != candidats[0][0]:
+            with self._verrou:
+                self._dictionnaires.sort(key=lambda d: d[0] != identifiant)
+        return meilleur
+
+    def ajouter(self, session, matricule, contenu, partielle=False):
+        """
+        Archive une page (bytes) ; retourne False si elle est identique à
+        la dernière version archivée
+        """
+        crc = zlib.crc32(contenu)
+        connexion = self._connexion()
+        derniere = connexion.execute(
+            'SELECT taille, crc, partielle FROM pages WHERE matricule = ? AND session = ? '
+            'ORDER BY date_archivage DESC LIMIT 1', (matricule, session)).fetchone()
+        if derniere == (len(contenu), crc, int(partielle)):
+            return False
+
+        dictionnaire, donnees = self._compresser(contenu)
+        with connexion:
+            connexion.execute(
+                'INSERT INTO pages (session, matricule, date_archivage, partielle,'
+                ' taille, crc, dictionnaire, donnees) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (session, matricule, time.time(), int(partielle), len(contenu), crc,
+                 dictionnaire, donnees))
+        return True
+
+    def lire(self, matricule, session=None):
+        """
+        Dernière version archivée de la page d'un matricule :
+        (contenu bytes, date d'archivage, partielle), ou None
+        """
+        requete = ('SELECT dictionnaire, donnees, date_archivage, partielle FROM pages '
+                   'WHERE matricule = ?')
+        parametres = [matricule]
+        if session:
+            requete += ' AND session = ?'
+            parametres.append(session)
+        ligne = self._connexion().execute(
+            requete + ' ORDER BY date_archivage DESC LIMIT 1', parametres).fetchone()
+        if ligne is None:
+            return None
+        dictionnaire, donnees, date_archivage, partielle = ligne
+        return (decompresser(donnees, self._dictionnaire(dictionnaire)),
+                date_archivage, bool(partielle))
+
+    def statistiques(self):
+        """
+        Pages, tailles brute et compressée (dictionnaires compris) et taux
+        """
+        connexion = self._connexion()
+        pages, brut, compresse, matricules = connexion.execute(
+            'SELECT COUNT(*), COALESCE(SUM(taille), 0), COALESCE(SUM(LENGTH(donnees)), 0),'
+            ' COUNT(DISTINCT matricule) FROM pages').fetchone()
+        dictionnaires, taille_dictionnaires = connexion.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(contenu)), 0) FROM dictionnaires').fetchone()
+        total = compresse + taille_dictionnaires
+        return {
+            'pages': pages,
+            'matricules': matricules,
+            'octets_bruts': brut,
+            'octets_compresses': compresse,
+            'dictionnaires': dictionnaires,
+            'octets_dictionnaires': taille_dictionnaires,
+            'taux': total / brut if brut else None,
+        }
+
+    def fermer(self):
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is not None:
+            connexion.close()
+            self._local.connexion = None
+
+
+def afficher_statistiques(archive):
+    s = archive.statistiques()
+    print(f"🗜️  Archive {archive.chemin}: {s['pages']} page(s), "
+          f"{s['matricules']} matricule(s)")
+    if not s['pages']:
+        return
+    total = s['octets_compresses'] + s['octets_dictionnaires']
+    print(f"  • Brut: {s['octets_bruts'] / 1024:.0f} Ko ; archivé: {total / 1024:.0f} Ko "
+          f"({s['octets_compresses'] / 1024:.0f} Ko de pages + "
+          f"{s['octets_dictionnaires'] / 1024:.0f} Ko pour {s['dictionnaires']} dictionnaire(s))")
+    print(f"  • Taux de compression: {s['taux']:.1%} (÷{1 / s['taux']:.0f}), "
+          f"{s['octets_compresses'] / s['pages']:.0f} octets par page en moyenne")
+
+
+def main():
+    from client_leger import URL_BASE
+
+    parser = argparse.ArgumentParser(description="Archive compressée des pages brutes")
+    parser.add_argument('--archive', default=CHEMIN_ARCHIVE,
+                        help="fichier de l'archive (défaut: %(default)s)")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    commandes.add_parser('stats', help="taille et taux de compression de l'archive")
+    lire = commandes.add_parser('lire', help="écrire la page d'un matricule sur la sortie")
+    lire.add_argument('matricule')
+    lire.add_argument('--session', default=URL_BASE,
+                      help="URL de base de la session (défaut: %(default)s)")
+    importer = commandes.add_parser('importer-cache',
+                                    help="archiver les pages du cache de pages")
+    importer.add_argument('--cache', default=os.path.join('.cache_bac', 'pages.sqlite'),
+                          help="cache de pages à importer (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    archive = ArchivePages(args.archive)
+    if args.commande == 'stats':
+        afficher_statistiques(archive)
+    elif args.commande == 'lire':
+        page = archive.lire(args.matricule, args.session)
+        if page is None:
+            print(f"❌ Aucune page archivée pour {args.matricule}", file=sys.stderr)
+            sys.exit(1)
+        contenu, date_archivage, partielle = page
+        print(f"🗜️  Page de {args.matricule} archivée le "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(date_archivage))}"
+              f"{' (partielle)' if partielle else ''}", file=sys.stderr)
+        sys.stdout.buffer.write(contenu)
+    elif args.commande == 'importer-cache':
+        from cache import CachePages
+        ajoutees = 0
+        for url, contenu in CachePages(args.cache).pages():
+            session, matricule = decouper_url(url)
+            ajoutees += archive.ajouter(session, matricule, contenu)
+        print(f"📥 {ajoutees} page(s) importée(s) depuis {args.cache}")
+        afficher_statistiques(archive)
+    archive.fermer()
+
+
+if __name__ == "__main__":
+    main()
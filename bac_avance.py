@@ -1,44 +1,78 @@
 import requests
-from bs4 import BeautifulSoup
-import time
+import argparse
+import io
 import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+import analyse_html
+import client_http
+from base_resultats import enregistrer
+from limiteur import LimiteurDebit
+from extraction import (extraire_resultat, LIBELLES_SERIE, STATUT_ADMIS,
+                        STATUT_REFUSE, STATUT_ADMIS_MOYENNE,
+                        STATUT_RATTRAPAGE, STATUT_ECHEC_MOYENNE, TAILLE_MAX_TEXTE,
+                        BUDGET_PAGE, VERIFICATION_BUDGET)
+
+try:
+    import readline
+except ImportError:     # Windows : pas de réaffichage de la saisie en cours
+    readline = None
+
+
+# Budget de requêtes de la boucle interactive : débit moyen (une requête
+# toutes les 2 s, comme l'ancienne pause fixe) et rafale autorisée
+REQUETES_PAR_SECONDE_PAR_DEFAUT = 0.5
+RAFALE_PAR_DEFAUT = 5
+
+# Recherches menées simultanément en arrière-plan
+WORKERS_PAR_DEFAUT = 3
+
+INVITE = "Numéro(s) du candidat (ou 'quit' pour quitter) : "
+
+# Statut cité près du numéro : au plus FENETRE_STATUT caractères entre le
+# numéro et le mot-clé, et au plus MAX_STATUTS extraits distincts
+FENETRE_STATUT = 200
+MAX_STATUTS = 3
+_MOTS_STATUT = re.compile(r'admis|refusé|échec|réussi|mention', re.IGNORECASE)
+
+
+# Libellé d'admission affiché selon le statut extrait
+ADMISSIONS = {
+    STATUT_ADMIS: "Admis",
+    STATUT_REFUSE: "Refusé",
+    STATUT_ADMIS_MOYENNE: "Admis (moyenne ≥10)",
+    STATUT_RATTRAPAGE: "Session de rattrapage (8 ≤ moyenne < 10)",
+    STATUT_ECHEC_MOYENNE: "Échec (moyenne <8)",
+}
 
 
 def rechercher_resultat_bac(numero_candidat):
     """
     Recherche le résultat du bac pour un numéro de candidat donné
     """
-    # URL avec le numéro du candidat
-    base_url = 'https://www.mauribac.com/fr/bac-2024-uKolupoGL/numero/'
-    url = f'{base_url}{numero_candidat}/'
-
-    # Headers pour simuler un navigateur réel
-    headers = {
-        'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                       'AppleWebKit/537.36 (KHTML, like Gecko) '
-                       'Chrome/91.0.4472.124 Safari/537.36'),
-        'Accept': ('text/html,application/xhtml+xml,application/xml;q=0.9,'
-                   'image/webp,*/*;q=0.8'),
-        'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
-
     try:
         print(f"Recherche du résultat pour le candidat n°{numero_candidat}...")
 
-        # Faire la requête avec un timeout
-        response = requests.get(url, headers=headers, timeout=10)
-        # Lève une exception si le statut n'est pas 200
-        response.raise_for_status()
+        # Faire la requête via le client partagé (lève une exception si le
+        # statut n'est pas 200)
+        response = client_http.telecharger(numero_candidat)
 
         # Détecter l'encodage correct
         response.encoding = response.apparent_encoding or 'utf-8'
 
         # Parser le HTML
-        soup = BeautifulSoup(response.content, 'html.parser',
-                             from_encoding='utf-8')
+        soup = analyse_html.creer_soupe(response.content)
+
+        # Garder le résultat dans la base locale (interrogeable hors ligne) ;
+        # une page sans résultat n'écrase pas un résultat déjà enregistré
+        resultat = extraire_resultat(analyse_html.texte_resultat_soupe(soup), numero_candidat)
+        if resultat.code_statut is not None:
+            enregistrer({'nom': f"Candidat_{numero_candidat}",
+                         'matricule': numero_candidat, **resultat.vers_dict()})
 
         # Analyser les résultats avec la nouvelle fonction
         success = analyser_resultats_bac(soup, numero_candidat)
@@ -63,6 +97,9 @@ def rechercher_resultat_bac(numero_candidat):
 
         return True
 
+    except client_http.CandidatIntrouvable:
+        print(f"❌ Aucun résultat pour le candidat n°{numero_candidat} (numéro inexistant)")
+        return True
     except requests.exceptions.RequestException as e:
         print(f"Erreur lors de la requête : {e}")
         return False
@@ -139,15 +176,7 @@ def extraire_info_candidat(soup):
     info = {}
 
     # Rechercher différents sélecteurs
-    selectors = [
-        {"class": "result"},
-        {"class": "resultat"},
-        {"class": "candidat"},
-        {"class": "student-info"},
-        {"class": "bac-result"},
-        {"class": "note"},
-        {"class": "mention"}
-    ]
+    selectors = [{"class": classe} for classe in analyse_html.CLASSES_RESULTAT]
 
     for selector in selectors:
         elements = soup.find_all(attrs=selector)
@@ -162,65 +191,61 @@ def extraire_info_candidat(soup):
 def chercher_patterns_bac(text, numero_candidat):
     """
     Cherche des patterns spécifiques liés aux résultats du bac avec logique améliorée
+    (au plus TAILLE_MAX_TEXTE caractères et BUDGET_PAGE secondes au total)
     """
     patterns_found = []
+    limite = time.perf_counter() + BUDGET_PAGE
 
-    # Nettoyer le texte pour une meilleure recherche
+    # Nettoyer le texte pour une meilleure recherche (taille bornée)
+    text = text[:TAILLE_MAX_TEXTE]
     text_clean = re.sub(r'\s+', ' ', text)
 
-    # Extraction de la moyenne pour déterminer le statut
-    moyenne_val = None
-    moyenne_match = re.search(r'المعدل\s*(\d+\.?\d*)', text)
-    if not moyenne_match:
-        moyenne_match = re.search(r'moyenne?\s*[:\-]?\s*(\d+[.,]\d+)', text_clean, re.IGNORECASE)
-    if moyenne_match:
-        moyenne_val = float(moyenne_match.group(1).replace(',', '.'))
-        patterns_found.append(f"Moyenne générale: {moyenne_val}")
-
-    # Détection du statut d'admission avec logique améliorée
-    statut_trouve = False
-    
-    # Recherche patterns explicites
-    if re.search(r'ناجح|réussi|admis|decision.*admis', text, re.IGNORECASE):
-        patterns_found.append("Admission: Admis")
-        statut_trouve = True
-    elif re.search(r'راسب|échec|refusé|decision.*refusé', text, re.IGNORECASE):
-        patterns_found.append("Admission: Refusé")
-        statut_trouve = True
-    elif moyenne_val is not None and numero_candidat in text:
-        # Logique basée sur la moyenne
-        if moyenne_val >= 10.0:
-            patterns_found.append("Admission: Admis (moyenne ≥10)")
-        elif moyenne_val >= 8.0:
-            patterns_found.append("Admission: Session de rattrapage (8 ≤ moyenne < 10)")
-        else:
-            patterns_found.append("Admission: Échec (moyenne <8)")
-        statut_trouve = True
-
-    # Détection de la série
-    if 'العلوم الطبيعية' in text or 'sciences naturelles' in text.lower() or 'sn' in text.lower():
-        patterns_found.append("Série: BAC - Sciences naturelles (SN)")
-    elif 'الرياضيات' in text or 'sciences mathématiques' in text.lower() or 'sm' in text.lower():
-        patterns_found.append("Série: BAC - Sciences mathématiques (SM)")
-    elif 'الآداب' in text or 'lettres' in text.lower():
-        patterns_found.append("Série: BAC - Lettres")
-
-    # Patterns supplémentaires à rechercher
-    additional_patterns = [
-        (rf'{numero_candidat}.*?(?:admis|refusé|échec|réussi|mention)',
-         'Statut du candidat'),
-        (r'mention\s*[:\-]?\s*(\w+)', 'Mention obtenue'),
-        (r'établissement\s*[:\-]?\s*([^|]+)', 'Établissement'),
-        (r'académie\s*[:\-]?\s*([^|]+)', 'Académie'),
-    ]
-
-    for pattern, description in additional_patterns:
-        matches = re.finditer(pattern, text_clean, re.IGNORECASE | re.UNICODE)
-        for match in matches:
-            if match.group(1) if len(match.groups()) > 0 else match.group(0):
-                has_groups = len(match.groups()) > 0
-                value = match.group(1) if has_groups else match.group(0)
-                patterns_found.append(f"{description}: {value.strip()}")
+    # Moyenne, décision, série, mention... en une seule passe (moteur commun)
+    resultat = extraire_resultat(text, numero_candidat)
+
+    if resultat.moyenne is not None:
+        patterns_found.append(f"Moyenne générale: {resultat.moyenne}")
+
+    admission = ADMISSIONS.get(resultat.code_statut)
+    if admission:
+        patterns_found.append(f"Admission: {admission}")
+
+    if resultat.serie:
+        patterns_found.append(f"Série: {LIBELLES_SERIE[resultat.serie]}")
+
+    if resultat.mention:
+        patterns_found.append(f"Mention obtenue: {resultat.mention}")
+    if resultat.etablissement:
+        patterns_found.append(f"Établissement: {resultat.etablissement}")
+    if resultat.academie:
+        patterns_found.append(f"Académie: {resultat.academie}")
+
+    # Statut cité près du numéro : numéro isolé (pas au milieu d'un autre
+    # nombre) suivi d'un mot-clé à moins de FENETRE_STATUT caractères, sans
+    # doublons. Mots-clés repérés en une passe, puis premier mot-clé après
+    # chaque occurrence du numéro par dichotomie : coût linéaire.
+    mots = [(m.start(), m.end()) for m in _MOTS_STATUT.finditer(text_clean)]
+    debuts_mots = [debut for debut, _ in mots]
+    statuts = []
+    position = text_clean.find(numero_candidat)
+    occurrences = 0
+    while position != -1 and len(statuts) < MAX_STATUTS:
+        occurrences += 1
+        if occurrences % VERIFICATION_BUDGET == 0 and time.perf_counter() > limite:
+            break
+        fin_numero = position + len(numero_candidat)
+        isole = ((position == 0 or not text_clean[position - 1].isdigit())
+                 and not text_clean[fin_numero:fin_numero + 1].isdigit())
+        suite = fin_numero
+        i = bisect_left(debuts_mots, fin_numero)
+        if isole and i < len(mots) and mots[i][0] - fin_numero <= FENETRE_STATUT:
+            value = text_clean[position:mots[i][1]].strip()
+            if value not in statuts:
+                statuts.append(value)
+            # Comme finditer : reprendre après le statut trouvé
+            suite = mots[i][1]
+        position = text_clean.find(numero_candidat, suite)
+    patterns_found.extend(f"Statut du candidat: {value}" for value in statuts)
 
     return patterns_found
 
@@ -272,42 +297,169 @@ def afficher_info_candidat(info, numero_candidat):
             print(f"• {value_clean}")
 
 
-def main():
+class _SortieParThread:
     """
-    Fonction principale
+    Remplaçant de sys.stdout : les threads en cours de capture écrivent
+    dans leur propre tampon, les autres sur la sortie d'origine
     """
-    print("=== Recherche de résultats du BAC 2024 ===\n")
 
-    while True:
-        try:
-            numero = input("Entrez le numéro du candidat "
-                           "(ou 'quit' pour quitter) : ").strip()
+    def __init__(self, sortie):
+        self.sortie = sortie
+        self._local = threading.local()
 
-            if numero.lower() in ['quit', 'exit', 'q']:
-                print("Au revoir !")
-                break
+    def capturer(self):
+        self._local.tampon = io.StringIO()
+        return self._local.tampon
+
+    def liberer(self):
+        self._local.tampon = None
+
+    def write(self, texte):
+        tampon = getattr(self._local, 'tampon', None)
+        return (tampon if tampon is not None else self.sortie).write(texte)
+
+    def flush(self):
+        self.sortie.flush()
 
-            if not numero.isdigit():
-                print("Veuillez entrer un numéro valide (chiffres uniquement)")
-                continue
+    def __getattr__(self, nom):
+        return getattr(self.sortie, nom)
 
-            success = rechercher_resultat_bac(numero)
 
-            if success:
+class RecherchesEnFond:
+    """
+    Recherches lancées depuis la boucle interactive et menées en arrière-plan
+
+    Le débit est plafonné par un budget partagé (seau à jetons) : une
+    recherche n'attend que si le budget est épuisé, et une page en cache
+    (ou un numéro connu comme inexistant) ne le consomme pas. Chaque résultat est affiché d'un seul bloc dès
+    qu'il est prêt, puis l'invite et la saisie en cours sont réaffichées.
+    """
+
+    def __init__(self, workers=WORKERS_PAR_DEFAUT,
+                 requetes_par_seconde=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                 rafale=RAFALE_PAR_DEFAUT):
+        self.limiteur = LimiteurDebit(requetes_par_seconde, rafale)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.sortie = _SortieParThread(sys.stdout)
+        self.en_cours = set()
+        self.saisie_active = False
+        self._verrou = threading.Lock()
+        sys.stdout = self.sortie
+
+    def lancer(self, numero):
+        with self._verrou:
+            if numero in self.en_cours:
+                print(f"⏳ Candidat {numero} : recherche déjà en cours")
+                return
+            self.en_cours.add(numero)
+        self.executor.submit(self._rechercher, numero)
+
+    def _rechercher(self, numero):
+        tampon = self.sortie.capturer()
+        try:
+            sans_reseau = client_http.est_en_cache(numero) or client_http.est_introuvable(numero)
+            attente = 0.0 if sans_reseau else self.limiteur.attendre()
+            if attente >= 0.1:
+                print(f"(budget de requêtes épuisé : {attente:.1f} s d'attente)")
+            if rechercher_resultat_bac(numero):
                 print(f"\nRecherche terminée pour le candidat {numero}")
             else:
                 print(f"\nÉchec de la recherche pour le candidat {numero}")
+        except Exception as e:
+            print(f"Erreur : {e}")
+        finally:
+            self.sortie.liberer()
+            with self._verrou:
+                self.en_cours.discard(numero)
+                self._afficher(tampon.getvalue())
+
+    def _afficher(self, bloc):
+        sortie = self.sortie.sortie
+        if self.saisie_active:
+            # Effacer l'invite en cours avant d'afficher le résultat
+            sortie.write("\r\033[K")
+        sortie.write(bloc + "\n" + "=" * 50 + "\n\n")
+        if self.saisie_active:
+            saisie = readline.get_line_buffer() if readline else ''
+            sortie.write(INVITE + saisie)
+        sortie.flush()
+
+    def terminer(self, attendre=True):
+        """Attend les recherches en cours (ou les abandonne) et rend sys.stdout"""
+        if attendre and self.en_cours:
+            print(f"⏳ {len(self.en_cours)} recherche(s) en cours...")
+        self.executor.shutdown(wait=attendre, cancel_futures=not attendre)
+        sys.stdout = self.sortie.sortie
+
+
+def lire_numeros(ligne):
+    """
+    Numéros d'une ligne saisie ou collée (séparés par espaces, virgules
+    ou points-virgules) ; retourne (numéros, éléments invalides)
+    """
+    numeros, invalides = [], []
+    for element in re.split(r'[\s,;]+', ligne.strip()):
+        if element.isdigit():
+            numeros.append(element)
+        elif element:
+            invalides.append(element)
+    return numeros, invalides
+
+
+def main():
+    """
+    Fonction principale
+    """
+    parser = argparse.ArgumentParser(
+        description="Recherche interactive de résultats du BAC (plusieurs numéros par ligne)")
+    parser.add_argument('--workers', type=int, default=WORKERS_PAR_DEFAUT,
+                        help="recherches simultanées en arrière-plan (défaut: %(default)s)")
+    parser.add_argument('--rps', type=float, default=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                        help="débit moyen de requêtes par seconde, 0 = sans limite "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--rafale', type=int, default=RAFALE_PAR_DEFAUT,
+                        help="requêtes envoyées sans attendre avant que le débit "
+                             "moyen s'applique (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    print("=== Recherche de résultats du BAC 2024 ===\n")
+    print("Plusieurs numéros peuvent être saisis ou collés à la fois ; les résultats")
+    print("s'affichent dès qu'ils sont prêts, sans attendre la saisie suivante.\n")
+
+    recherches = RecherchesEnFond(args.workers, args.rps or None, args.rafale)
+    # Réafficher l'invite après un résultat n'a de sens qu'au terminal
+    interactif = sys.stdin.isatty()
+    attendre = True
+    while True:
+        try:
+            recherches.saisie_active = interactif
+            ligne = input(INVITE)
+            recherches.saisie_active = False
+
+            if ligne.strip().lower() in ['quit', 'exit', 'q']:
+                break
 
-            # Pause pour éviter de surcharger le serveur
-            time.sleep(2)
-            print("\n" + "="*50 + "\n")
+            numeros, invalides = lire_numeros(ligne)
+            if invalides:
+                print(f"Numéro(s) ignoré(s) (chiffres uniquement) : {', '.join(invalides)}")
+            for numero in numeros:
+                recherches.lancer(numero)
 
+        except EOFError:
+            # Fin de l'entrée (Ctrl-D, fichier ou collage redirigé)
+            print()
+            break
         except KeyboardInterrupt:
             print("\n\nArrêt du programme...")
+            attendre = False
             break
         except Exception as e:
             print(f"Erreur : {e}")
 
+    recherches.saisie_active = False
+    recherches.terminer(attendre)
+    print("Au revoir !")
+
 
 if __name__ == "__main__":
     main()
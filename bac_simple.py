@@ -3,95 +3,114 @@
 """
 Script simple pour rechercher les résultats du BAC 2024 - Mauritanie
 Usage: python bac_simple.py [numero_candidat]
+
+En ligne de commande, le démarrage est rapide : client HTTP de la
+bibliothèque standard (client_leger) et parseur 'brut', sans importer
+requests ni BeautifulSoup ; une page en cache est servie sans accès réseau.
 """
 
-import requests
-from bs4 import BeautifulSoup
 import sys
 import re
 
-
-def rechercher_bac_simple(numero_candidat):
+import analyse_html
+from base_resultats import enregistrer
+from extraction import (extraire_resultat, SERIE_SN, SERIE_SM, SERIE_LETTRES,
+                        STATUT_ADMIS, STATUT_REFUSE, STATUT_ADMIS_MOYENNE,
+                        STATUT_RATTRAPAGE, STATUT_ECHEC_MOYENNE,
+                        STATUT_A_VERIFIER)
+
+
+# Messages affichés selon le statut extrait
+MESSAGES_STATUT = {
+    STATUT_ADMIS: "✅ STATUT: ADMIS/RÉUSSI",
+    STATUT_REFUSE: "❌ STATUT: ÉCHEC",
+    STATUT_ADMIS_MOYENNE: "✅ STATUT: ADMIS (basé sur moyenne ≥10)",
+    STATUT_RATTRAPAGE: "🔄 STATUT: SESSION DE RATTRAPAGE (8 ≤ moyenne < 10)",
+    STATUT_ECHEC_MOYENNE: "❌ STATUT: ÉCHEC (moyenne <8)",
+    STATUT_A_VERIFIER: "🔍 STATUT: Candidat trouvé (statut à vérifier)",
+    None: "❓ STATUT: Non déterminé",
+}
+
+SERIES = {
+    SERIE_SN: "Sciences Naturelles (SN)",
+    SERIE_SM: "Sciences Mathématiques (SM)",
+    SERIE_LETTRES: "Lettres",
+}
+
+
+def obtenir_resultat(numero_candidat, leger=False):
+    """
+    Télécharge et analyse la page d'un candidat, sans affichage
+    Retourne (ResultatBac, texte de la page) ; les erreurs réseau sont propagées
+    (OSError : requests.exceptions.RequestException ou urllib.error.URLError).
+    Avec leger=True : client_leger et parseur 'brut' (bibliothèque standard
+    uniquement) ; sinon session partagée de client_http et parseur configuré.
+    Un numéro inexistant donne un ResultatBac vide (statut non trouvé) ;
+    seuls les résultats trouvés sont enregistrés dans la base locale.
+    """
+    if leger:
+        import client_leger as client
+    else:
+        import client_http as client
+    try:
+        page = client.telecharger(numero_candidat)
+        if leger:
+            text = analyse_html.texte_resultat(page, 'brut')
+        else:
+            text = analyse_html.texte_resultat(page.content)
+    except client.CandidatIntrouvable:
+        # Numéro inexistant (cache négatif, 404 ou page « aucun résultat »)
+        text = ''
+
+    # Extraire les informations clés (moteur commun, une seule passe)
+    resultat = extraire_resultat(text, numero_candidat)
+    # Une recherche sans résultat n'écrase pas un résultat déjà enregistré
+    if resultat.code_statut is not None:
+        enregistrer({'nom': f"Candidat_{numero_candidat}",
+                     'matricule': numero_candidat, **resultat.vers_dict()})
+    return resultat, text
+
+
+def ligne_info(text, numero_candidat):
+    """
+    Ligne de la page contenant le numéro du candidat (nom, détails), ou None
+    """
+    for line in text.split('\n'):
+        if numero_candidat in line and len(line.strip()) > 10:
+            # Nettoyer la ligne pour extraire le nom
+            clean_line = re.sub(r'[|]+', ' | ', line.strip())
+            if len(clean_line) < 200:  # Éviter les lignes trop longues
+                return clean_line
+            return None
+    return None
+
+
+def rechercher_bac_simple(numero_candidat, leger=False):
     """Version simplifiée pour recherche rapide"""
-    url = f'https://www.mauribac.com/fr/bac-2024-uKolupoGL/numero/{numero_candidat}/'
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-
-        soup = BeautifulSoup(response.content, 'html.parser', from_encoding='utf-8')
-        text = soup.get_text()
+        resultat, text = obtenir_resultat(numero_candidat, leger)
 
         # Extraction des informations essentielles
         print(f"\n🔍 Résultats pour le candidat {numero_candidat}:")
         print("=" * 50)
 
-        # Chercher les informations clés
-        statut_trouve = False
-        
-        # Recherche plus robuste du statut d'admission
-        if re.search(r'ناجح|réussi|admis|decision.*admis', text, re.IGNORECASE):
-            print("✅ STATUT: ADMIS/RÉUSSI")
-            statut_trouve = True
-        elif re.search(r'راسب|échec|refusé|decision.*refusé', text, re.IGNORECASE):
-            print("❌ STATUT: ÉCHEC")
-            statut_trouve = True
-        else:
-            # Analyser la moyenne pour déduire le statut
-            moyenne_match = re.search(r'المعدل\s*(\d+\.?\d*)', text)
-            if not moyenne_match:
-                moyenne_match = re.search(r'moyenne?\s*[:\-]?\s*(\d+[.,]\d+)', text, re.IGNORECASE)
-            
-            if moyenne_match and numero_candidat in text:
-                moyenne_val = float(moyenne_match.group(1).replace(',', '.'))
-                if moyenne_val >= 10.0:
-                    print("✅ STATUT: ADMIS (basé sur moyenne ≥10)")
-                elif moyenne_val >= 8.0:
-                    print("🔄 STATUT: SESSION DE RATTRAPAGE (8 ≤ moyenne < 10)")
-                else:
-                    print("❌ STATUT: ÉCHEC (moyenne <8)")
-                statut_trouve = True
-            elif numero_candidat in text and ('bac' in text.lower() or 'decision' in text.lower()):
-                print("🔍 STATUT: Candidat trouvé (statut à vérifier)")
-                statut_trouve = True
-        
-        if not statut_trouve:
-            print("❓ STATUT: Non déterminé")
-
-        # Chercher la moyenne (plusieurs patterns)
-        moyenne_match = re.search(r'المعدل\s*(\d+\.?\d*)', text)
-        if not moyenne_match:
-            moyenne_match = re.search(r'moyenne?\s*[:\-]?\s*(\d+[.,]\d+)', text, re.IGNORECASE)
-        if moyenne_match:
-            moyenne = moyenne_match.group(1).replace(',', '.')
-            print(f"📊 MOYENNE: {moyenne}")
-
-        # Chercher la série
-        if 'العلوم الطبيعية' in text or 'sn' in text.lower():
-            print("📚 SÉRIE: Sciences Naturelles (SN)")
-        elif 'الرياضيات' in text or 'sm' in text.lower():
-            print("📚 SÉRIE: Sciences Mathématiques (SM)")
-        elif 'الآداب' in text or 'lettres' in text.lower():
-            print("📚 SÉRIE: Lettres")
+        print(MESSAGES_STATUT[resultat.code_statut])
+
+        if resultat.moyenne_texte:
+            print(f"📊 MOYENNE: {resultat.moyenne_texte}")
+
+        if resultat.serie:
+            print(f"📚 SÉRIE: {SERIES[resultat.serie]}")
 
         # Afficher le nom si trouvé
-        lines = text.split('\n')
-        for line in lines:
-            if numero_candidat in line and len(line.strip()) > 10:
-                # Nettoyer la ligne pour extraire le nom
-                clean_line = re.sub(r'[|]+', ' | ', line.strip())
-                if len(clean_line) < 200:  # Éviter les lignes trop longues
-                    print(f"👤 INFO: {clean_line}")
-                break
+        info = ligne_info(text, numero_candidat)
+        if info:
+            print(f"👤 INFO: {info}")
 
         return True
 
-    except requests.exceptions.RequestException as e:
+    except OSError as e:
+        # requests.exceptions.RequestException et urllib.error.URLError
         print(f"❌ Erreur de connexion: {e}")
         return False
     except Exception as e:
@@ -104,7 +123,7 @@ def main():
         # Utilisation en ligne de commande
         numero = sys.argv[1]
         if numero.isdigit():
-            rechercher_bac_simple(numero)
+            rechercher_bac_simple(numero, leger=True)
         else:
             print("❌ Veuillez fournir un numéro valide")
     else:
@@ -112,7 +131,7 @@ def main():
         print("🎓 Recherche rapide - Résultats BAC 2024")
         numero = input("Numéro du candidat: ").strip()
         if numero.isdigit():
-            rechercher_bac_simple(numero)
+            rechercher_bac_simple(numero, leger=True)
         else:
             print("❌ Numéro invalide")
 
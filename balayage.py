@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Balayage d'une plage de numéros de candidats, découpée en shards
+Chaque shard peut tourner dans un processus ou sur une machine différente ;
+les sorties JSONL des shards sont ensuite fusionnées en un seul résultat.
+
+Usage:
+    python balayage.py 10000 60000                    # un seul processus
+    python balayage.py 10000 60000 --shard 2/8        # shard n°2 sur 8 (machine ou processus)
+    python balayage.py 10000 60000 --processus 4      # 4 processus locaux + fusion
+    python balayage.py --fusionner balayage_*.jsonl   # fusion des sorties de shards
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+
+import analyse_html
+import client_http
+from recherche_batch import (rechercher_resultats_batch, afficher_resume,
+                             sauvegarder_resultats, WORKERS_PAR_DEFAUT,
+                             REQUETES_PAR_SECONDE_PAR_DEFAUT)
+from metriques import METRIQUES
+from table_resultats import TableResultats
+from base_resultats import BaseResultats, CHEMIN_BASE
+from archive import CHEMIN_ARCHIVE
+from sortie import (EcrivainResultats, lire_resultats_jsonl, preparer_reprise,
+                    est_termine, FLUSH_PAR_DEFAUT)
+
+
+def plage_shard(debut, fin, index, total):
+    """
+    Numéros du shard `index` (0 <= index < total) dans la plage [debut, fin]
+    Les numéros sont répartis en alternance pour équilibrer les shards.
+    """
+    return range(debut + index, fin + 1, total)
+
+
+def lire_shard(texte):
+    """
+    Convertit 'i/n' en (i, n)
+    """
+    try:
+        index, total = (int(x) for x in texte.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard invalide '{texte}' (format attendu: i/n)")
+    if total < 1 or not 0 <= index < total:
+        raise argparse.ArgumentTypeError(f"shard invalide '{texte}' (0 <= i < n)")
+    return index, total
+
+
+def prefixe_shard(prefixe, debut, fin, index, total):
+    """
+    Préfixe des fichiers de sortie d'un shard
+    """
+    return f"{prefixe}_{debut}-{fin}_shard{index}of{total}"
+
+
+def existe(resultat):
+    """
+    Le numéro correspond-il à un candidat existant ?
+    """
+    return est_termine(resultat) and resultat['admission'] != 'Non trouvé'
+
+
+def balayer_shard(debut, fin, index, total, prefixe, reprendre=False,
+                  workers=WORKERS_PAR_DEFAUT,
+                  requetes_par_seconde=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                  flush_tous=FLUSH_PAR_DEFAUT, lecture_partielle=False):
+    """
+    Balaye les numéros d'un shard et écrit les résultats dans `<prefixe>.jsonl`
+    Retourne le préfixe des fichiers écrits.
+    """
+    prefixe = prefixe_shard(prefixe, debut, fin, index, total)
+    deja_faits = preparer_reprise(prefixe) if reprendre else set()
+
+    numeros = (str(n) for n in plage_shard(debut, fin, index, total)
+               if str(n) not in deja_faits)
+    matricules = ((f"Candidat_{numero}", numero) for numero in numeros)
+
+    print(f"🔢 Shard {index}/{total} de la plage {debut}-{fin}"
+          f" ({len(plage_shard(debut, fin, index, total))} numéros,"
+          f" {len(deja_faits)} déjà traités)")
+
+    with EcrivainResultats(prefixe, flush_tous=flush_tous,
+                           ajout=reprendre) as ecrivain:
+        rechercher_resultats_batch(matricules, workers=workers,
+                                   requetes_par_seconde=requetes_par_seconde,
+                                   sur_resultat=ecrivain.ajouter, conserver=False,
+                                   lecture_partielle=lecture_partielle)
+    METRIQUES.afficher()
+    return prefixe
+
+
+def fusionner(chemins, prefixe, chemin_base=CHEMIN_BASE):
+    """
+    Fusionne des sorties JSONL de shards en un seul jeu de résultats
+
+    Écrit `<prefixe>.jsonl/.csv/.txt` (un résultat par numéro, les résultats
+    définitifs l'emportant sur les erreurs) et `<prefixe>_existants.txt`
+    au format nom:matricule, réutilisable par recherche_batch.py.
+    Les résultats sont aussi enregistrés dans la base `chemin_base`
+    (None pour ne pas l'utiliser).
+    """
+    # Table compacte + index matricule -> ligne pour dédupliquer
+    table = TableResultats()
+    lignes = {}
+    for chemin in chemins:
+        for resultat in lire_resultats_jsonl(chemin):
+            matricule = resultat['matricule']
+            if matricule not in lignes:
+                lignes[matricule] = len(table)
+                table.ajouter(resultat, int(matricule))
+            elif est_termine(resultat):
+                table.remplacer(lignes[matricule], resultat)
+    del lignes
+    table.trier_par_position()
+
+    existants = 0
+    with EcrivainResultats(prefixe) as ecrivain, \
+            open(f"{prefixe}_existants.txt", 'w', encoding='utf-8') as f:
+        for resultat in table:
+            ecrivain.ajouter(resultat)
+            if existe(resultat):
+                existants += 1
+                f.write(f"{resultat['nom']}:{resultat['matricule']}\n")
+
+    print(f"🧩 {len(chemins)} fichier(s) fusionné(s): {len(table)} numéro(s), "
+          f"{existants} candidat(s) existant(s)")
+    print(f"📁 Numéros existants: {prefixe}_existants.txt")
+
+    if chemin_base:
+        with BaseResultats(chemin_base) as base:
+            base.importer(table)
+        print(f"🗄️  Base de résultats: {chemin_base}")
+
+    afficher_resume(lire_resultats_jsonl(ecrivain.chemin('jsonl')))
+    sauvegarder_resultats(lire_resultats_jsonl(ecrivain.chemin('jsonl')),
+                          ecrivain.chemin('txt'))
+
+
+def lancer_processus(args):
+    """
+    Lance un sous-processus par shard, attend leur fin puis fusionne
+    Le plafond de requêtes/seconde est réparti entre les processus.
+    """
+    rps = (args.rps / args.processus) if args.rps else 0
+    processus = []
+    for index in range(args.processus):
+        commande = [sys.executable, os.path.abspath(__file__),
+                    str(args.debut), str(args.fin),
+                    '--shard', f"{index}/{args.processus}",
+                    '--sortie', args.sortie, '--workers', str(args.workers),
+                    '--rps', str(rps), '--parseur', args.parseur]
+        if args.reprendre:
+            commande.append('--reprendre')
+        if args.lecture_partielle:
+            commande.append('--lecture-partielle')
+        if args.sans_cache_negatif:
+            commande.append('--sans-cache-negatif')
+        if args.archive:
+            commande += ['--archive', args.archive]
+        journal = open(f"{prefixe_shard(args.sortie, args.debut, args.fin, index, args.processus)}.log",
+                       'w', encoding='utf-8')
+        processus.append((subprocess.Popen(commande, stdout=journal,
+                                           stderr=subprocess.STDOUT), journal))
+        print(f"🚀 Shard {index}/{args.processus} lancé (PID {processus[-1][0].pid})")
+
+    echecs = 0
+    for proc, journal in processus:
+        if proc.wait() != 0:
+            echecs += 1
+        journal.close()
+    if echecs:
+        print(f"⚠️  {echecs} shard(s) terminé(s) en erreur (voir les fichiers .log) ; "
+              "relancez avec --reprendre")
+
+    chemins = [f"{prefixe_shard(args.sortie, args.debut, args.fin, i, args.processus)}.jsonl"
+               for i in range(args.processus)]
+    fusionner([c for c in chemins if os.path.exists(c)],
+              f"{args.sortie}_{args.debut}-{args.fin}",
+              None if args.sans_base else args.base)
+
+
+def main():
+    """
+    Fonction principale
+    """
+    parser = argparse.ArgumentParser(
+        description="Balaye une plage de numéros de candidats (avec découpage en shards)")
+    parser.add_argument('debut', type=int, nargs='?', help="premier numéro de la plage")
+    parser.add_argument('fin', type=int, nargs='?', help="dernier numéro de la plage (inclus)")
+    parser.add_argument('--shard', type=lire_shard, default=(0, 1),
+                        help="shard à traiter, au format i/n (défaut: 0/1)")
+    parser.add_argument('--processus', type=int, default=0,
+                        help="lancer N processus locaux (un shard chacun) puis fusionner")
+    parser.add_argument('--fusionner', nargs='+', metavar='JSONL',
+                        help="fusionner des sorties de shards (motifs glob acceptés)")
+    parser.add_argument('--sortie', default='balayage',
+                        help="préfixe des fichiers de sortie (défaut: %(default)s)")
+    parser.add_argument('--reprendre', action='store_true',
+                        help="ignorer les numéros déjà traités avec succès")
+    parser.add_argument('--base', default=CHEMIN_BASE,
+                        help="base SQLite où enregistrer les résultats fusionnés "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--sans-base', action='store_true',
+                        help="ne pas enregistrer les résultats dans la base SQLite")
+    parser.add_argument('--workers', type=int, default=WORKERS_PAR_DEFAUT,
+                        help="requêtes simultanées par processus (défaut: %(default)s)")
+    parser.add_argument('--rps', type=float, default=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                        help="plafond de requêtes par seconde, 0 = sans limite ; avec "
+                             "--processus il est réparti entre les processus "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--parseur', choices=analyse_html.BACKENDS,
+                        default=analyse_html.backend_actif(),
+                        help="backend d'analyse HTML (défaut: %(default)s)")
+    parser.add_argument('--lecture-partielle', action='store_true',
+                        help="arrêter chaque téléchargement dès que le bloc de résultat "
+                             "est reçu")
+    parser.add_argument('--archive', nargs='?', const=CHEMIN_ARCHIVE, default=None,
+                        metavar='SQLITE',
+                        help="archiver chaque page téléchargée, compressée "
+                             f"(défaut: {CHEMIN_ARCHIVE})")
+    parser.add_argument('--sans-cache-negatif', action='store_true',
+                        help="rechercher aussi les numéros déjà reconnus comme inexistants")
+    args = parser.parse_args()
+
+    if args.fusionner:
+        chemins = sorted({c for motif in args.fusionner for c in glob.glob(motif)})
+        if not chemins:
+            print("❌ Aucun fichier à fusionner")
+            return
+        fusionner(chemins, args.sortie, None if args.sans_base else args.base)
+        return
+
+    if args.debut is None or args.fin is None or args.debut > args.fin:
+        parser.error("indiquez une plage valide: debut fin")
+
+    analyse_html.configurer(args.parseur)
+    client_http.configurer_cache(introuvables=not args.sans_cache_negatif)
+    client_http.configurer_archive(args.archive)
+
+    if args.processus > 0:
+        lancer_processus(args)
+        return
+
+    index, total = args.shard
+    prefixe = balayer_shard(args.debut, args.fin, index, total, args.sortie,
+                            reprendre=args.reprendre, workers=args.workers,
+                            requetes_par_seconde=args.rps or None,
+                            lecture_partielle=args.lecture_partielle)
+    print(f"\n📁 Résultats du shard: {prefixe}.jsonl")
+    if total > 1:
+        print(f"   Fusion: python balayage.py --fusionner '{args.sortie}_{args.debut}-{args.fin}_shard*of{total}.jsonl'")
+
+
+if __name__ == "__main__":
+    main()
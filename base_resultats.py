@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Base locale des résultats (SQLite), interrogeable sans accès réseau
+Alimentée par recherche_batch, balayage, bac_simple et bac_avance ;
+indexée par matricule, série, admission et moyenne.
+
+Usage:
+    python base_resultats.py chercher 19736
+    python base_resultats.py requete --serie SN --moyenne-min 10
+    python base_resultats.py requete --admission "Session de rattrapage" --format csv
+    python base_resultats.py stats
+    python base_resultats.py importer resultats_batch.jsonl balayage_*.jsonl
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from extraction import LIBELLES_SERIE
+from sortie import CHAMPS, lire_resultats_jsonl, est_termine
+
+
+# Emplacement par défaut de la base
+CHEMIN_BASE = 'resultats_bac.sqlite'
+
+# Nombre de résultats insérés par transaction
+TAILLE_LOT = 500
+
+# Un résultat définitif remplace l'existant ; un résultat en erreur ne
+# remplace qu'un autre résultat en erreur, et un candidat non trouvé
+# (numéro inexistant, page sans décision) ne remplace jamais une décision.
+# Le nom par défaut (recherche unitaire) n'écrase pas un nom connu.
+_INSERTION = (
+    'INSERT INTO resultats '
+    '(matricule, nom, statut, admission, serie, moyenne, moyenne_valeur,'
+    ' termine, date_maj) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT(matricule) DO UPDATE SET '
+    " nom = CASE WHEN excluded.nom = 'Candidat_' || excluded.matricule"
+    '  THEN resultats.nom ELSE excluded.nom END,'
+    ' statut = excluded.statut,'
+    ' admission = excluded.admission, serie = excluded.serie,'
+    ' moyenne = excluded.moyenne, moyenne_valeur = excluded.moyenne_valeur,'
+    ' termine = excluded.termine, date_maj = excluded.date_maj '
+    'WHERE (excluded.termine OR NOT resultats.termine)'
+    " AND (excluded.admission != 'Non trouvé'"
+    "  OR resultats.admission IN ('Non trouvé', 'Erreur'))")
+
+# Colonnes pouvant servir de tri ou de regroupement
+_COLONNES_TRI = {'matricule': 'CAST(matricule AS INTEGER)',
+                 'moyenne': 'moyenne_valeur', 'nom': 'nom',
+                 'serie': 'serie', 'admission': 'admission'}
+_COLONNES_GROUPE = ('admission', 'serie', 'statut')
+
+
+def valeur_moyenne(moyenne):
+    """
+    Moyenne numérique d'un résultat, ou None si elle n'est pas disponible
+    """
+    try:
+        return float(str(moyenne).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def libelle_serie(serie):
+    """
+    Libellé complet d'une série à partir de son code court ('SN', 'sm', 'Lettres')
+    Un libellé complet est retourné tel quel.
+    """
+    return LIBELLES_SERIE.get(serie.upper(), serie)
+
+
+class BaseResultats:
+    """
+    Base SQLite des résultats, un enregistrement par matricule
+
+    Les insertions sont regroupées par lots de `taille_lot` dans une seule
+    transaction (et validées à la fermeture), pour ne jamais ralentir un
+    traitement en lot rapide.
+    """
+
+    def __init__(self, chemin=CHEMIN_BASE, taille_lot=TAILLE_LOT):
+        self.chemin = chemin
+        self.taille_lot = max(1, taille_lot)
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self._en_attente = []
+
+        self.connexion = sqlite3.connect(chemin, timeout=30)
+        self.connexion.row_factory = sqlite3.Row
+        self.connexion.execute('PRAGMA journal_mode=WAL')
+        self.connexion.execute('PRAGMA synchronous=NORMAL')
+        with self.connexion:
+            self.connexion.execute(
+                'CREATE TABLE IF NOT EXISTS resultats ('
+                ' matricule TEXT PRIMARY KEY,'
+                ' nom TEXT NOT NULL,'
+                ' statut TEXT NOT NULL,'
+                ' admission TEXT NOT NULL,'
+                ' serie TEXT NOT NULL,'
+                ' moyenne TEXT NOT NULL,'
+                ' moyenne_valeur REAL,'
+                ' termine INTEGER NOT NULL,'
+                ' date_maj REAL NOT NULL)')
+            self.connexion.execute('CREATE INDEX IF NOT EXISTS idx_resultats_serie '
+                                   'ON resultats (serie, moyenne_valeur)')
+            self.connexion.execute('CREATE INDEX IF NOT EXISTS idx_resultats_admission '
+                                   'ON resultats (admission, moyenne_valeur)')
+            self.connexion.execute('CREATE INDEX IF NOT EXISTS idx_resultats_moyenne '
+                                   'ON resultats (moyenne_valeur)')
+
+    # --- Écriture ---------------------------------------------------------
+
+    def ajouter(self, resultat):
+        """
+        Enregistre un résultat (dict au format de recherche_batch)
+        L'écriture sur disque a lieu par lots, voir valider().
+        """
+        self._en_attente.append((
+            resultat['matricule'], resultat['nom'], resultat['statut'],
+            resultat['admission'], resultat['serie'], str(resultat['moyenne']),
+            valeur_moyenne(resultat['moyenne']), int(est_termine(resultat)),
+            time.time()))
+        if len(self._en_attente) >= self.taille_lot:
+            self.valider()
+
+    def valider(self):
+        """
+        Écrit les résultats en attente dans une seule transaction
+        """
+        if not self._en_attente:
+            return
+        with self.connexion:
+            self.connexion.executemany(_INSERTION, self._en_attente)
+        self._en_attente = []
+
+    def importer(self, resultats):
+        """
+        Enregistre un itérable de résultats ; retourne leur nombre
+        """
+        nombre = 0
+        for resultat in resultats:
+            self.ajouter(resultat)
+            nombre += 1
+        self.valider()
+        return nombre
+
+    def fermer(self):
+        self.valider()
+        self.connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    # --- Lecture ----------------------------------------------------------
+
+    @staticmethod
+    def _vers_dict(ligne):
+        return {champ: ligne[champ] for champ in CHAMPS}
+
+    def chercher(self, matricule):
+        """
+        Résultat enregistré pour un matricule, ou None
+        """
+        self.valider()
+        ligne = self.connexion.execute(
+            'SELECT * FROM resultats WHERE matricule = ?', (str(matricule),)).fetchone()
+        return self._vers_dict(ligne) if ligne else None
+
+    def requete(self, serie=None, admission=None, moyenne_min=None,
+                moyenne_max=None, tri='matricule', decroissant=False, limite=None):
+        """
+        Résultats correspondant à tous les critères donnés (générateur de dicts)
+        `serie` peut être un libellé complet ou un code court ('SN', 'SM', 'Lettres').
+        """
+        self.valider()
+        conditions, parametres = [], []
+        if serie:
+            conditions.append('serie = ?')
+            parametres.append(libelle_serie(serie))
+        if admission:
+            conditions.append('admission = ?')
+            parametres.append(admission)
+        if moyenne_min is not None:
+            conditions.append('moyenne_valeur >= ?')
+            parametres.append(moyenne_min)
+        if moyenne_max is not None:
+            conditions.append('moyenne_valeur <= ?')
+            parametres.append(moyenne_max)
+
+        sql = 'SELECT * FROM resultats'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f" ORDER BY {_COLONNES_TRI[tri]}{' DESC' if decroissant else ''}"
+        if limite:
+            sql += ' LIMIT ?'
+            parametres.append(limite)
+
+        for ligne in self.connexion.execute(sql, parametres):
+            yield self._vers_dict(ligne)
+
+    def compter_par(self, champ):
+        """
+        Effectifs par valeur d'une colonne ('admission', 'serie', 'statut')
+        """
+        if champ not in _COLONNES_GROUPE:
+            raise ValueError(f"colonne de regroupement inconnue: {champ}")
+        self.valider()
+        return dict(self.connexion.execute(
+            f'SELECT {champ}, COUNT(*) FROM resultats GROUP BY {champ} '
+            'ORDER BY COUNT(*) DESC').fetchall())
+
+    def statistiques_moyennes(self, serie=None):
+        """
+        (nombre, moyenne, min, max) des moyennes disponibles
+        """
+        self.valider()
+        sql = ('SELECT COUNT(moyenne_valeur), AVG(moyenne_valeur), '
+               'MIN(moyenne_valeur), MAX(moyenne_valeur) FROM resultats')
+        parametres = ()
+        if serie:
+            sql += ' WHERE serie = ?'
+            parametres = (libelle_serie(serie),)
+        return tuple(self.connexion.execute(sql, parametres).fetchone())
+
+    def nombre(self):
+        """Nombre de candidats enregistrés"""
+        self.valider()
+        return self.connexion.execute('SELECT COUNT(*) FROM resultats').fetchone()[0]
+
+
+def enregistrer(resultat, chemin=CHEMIN_BASE):
+    """
+    Enregistre immédiatement un résultat isolé (recherches unitaires)
+    Une base inaccessible n'empêche pas l'affichage du résultat.
+    """
+    try:
+        with BaseResultats(chemin) as base:
+            base.ajouter(resultat)
+    except sqlite3.Error as e:
+        print(f"⚠️  Résultat non enregistré dans la base: {e}")
+
+
+def afficher_resultat(resultat):
+    """
+    Affiche un résultat au format du rapport texte
+    """
+    print(f"Nom: {resultat['nom']}")
+    print(f"Matricule: {resultat['matricule']}")
+    print(f"Statut: {resultat['statut']}")
+    print(f"Admission: {resultat['admission']}")
+    print(f"Série: {resultat['serie']}")
+    print(f"Moyenne: {resultat['moyenne']}")
+    print("-" * 30)
+
+
+def commande_chercher(base, args):
+    trouves = 0
+    for matricule in args.matricules:
+        resultat = base.chercher(matricule)
+        if resultat:
+            afficher_resultat(resultat)
+            trouves += 1
+        else:
+            print(f"❓ Matricule {matricule} absent de la base")
+    return trouves == len(args.matricules)
+
+
+def commande_requete(base, args):
+    resultats = base.requete(serie=args.serie, admission=args.admission,
+                             moyenne_min=args.moyenne_min, moyenne_max=args.moyenne_max,
+                             tri=args.tri, decroissant=args.decroissant,
+                             limite=args.limite)
+    nombre = 0
+    if args.format == 'jsonl':
+        for resultat in resultats:
+            print(json.dumps(resultat, ensure_ascii=False))
+            nombre += 1
+    elif args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=CHAMPS)
+        writer.writeheader()
+        for resultat in resultats:
+            writer.writerow(resultat)
+            nombre += 1
+    else:
+        for resultat in resultats:
+            afficher_resultat(resultat)
+            nombre += 1
+        print(f"🔎 {nombre} résultat(s)")
+    return nombre > 0
+
+
+def commande_stats(base, args):
+    print(f"🗄️  {base.nombre()} candidat(s) dans {base.chemin}")
+    print("\n🎓 Par admission:")
+    for admission, nombre in base.compter_par('admission').items():
+        print(f"  • {admission}: {nombre}")
+    print("\n📚 Par série:")
+    for serie, nombre in base.compter_par('serie').items():
+        print(f"  • {serie}: {nombre}")
+    nombre, moyenne, minimum, maximum = base.statistiques_moyennes(args.serie)
+    if nombre:
+        print(f"\n📊 Moyennes{f' ({libelle_serie(args.serie)})' if args.serie else ''}: "
+              f"{nombre} candidat(s), moyenne {moyenne:.2f}, min {minimum:.2f}, max {maximum:.2f}")
+    return True
+
+
+def commande_importer(base, args):
+    chemins = sorted({c for motif in args.fichiers for c in glob.glob(motif)})
+    if not chemins:
+        print("❌ Aucun fichier à importer")
+        return False
+    for chemin in chemins:
+        nombre = base.importer(lire_resultats_jsonl(chemin))
+        print(f"📥 {chemin}: {nombre} résultat(s) importé(s)")
+    print(f"🗄️  {base.nombre()} candidat(s) dans {base.chemin}")
+    return True
+
+
+def main():
+    """
+    Fonction principale
+    """
+    parser = argparse.ArgumentParser(
+        description="Interroge la base locale des résultats BAC (sans accès réseau)")
+    parser.add_argument('--base', default=CHEMIN_BASE,
+                        help="chemin de la base SQLite (défaut: %(default)s)")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    chercher = commandes.add_parser('chercher', help="résultat d'un ou plusieurs matricules")
+    chercher.add_argument('matricules', nargs='+')
+    chercher.set_defaults(fonction=commande_chercher)
+
+    requete = commandes.add_parser('requete', help="résultats filtrés")
+    requete.add_argument('--serie', help="code court (SN, SM, Lettres) ou libellé complet")
+    requete.add_argument('--admission', help="ex. Admis, 'Session de rattrapage', Échec")
+    requete.add_argument('--moyenne-min', type=float)
+    requete.add_argument('--moyenne-max', type=float)
+    requete.add_argument('--tri', choices=sorted(_COLONNES_TRI), default='matricule')
+    requete.add_argument('--decroissant', action='store_true')
+    requete.add_argument('--limite', type=int)
+    requete.add_argument('--format', choices=('texte', 'jsonl', 'csv'), default='texte')
+    requete.set_defaults(fonction=commande_requete)
+
+    stats = commandes.add_parser('stats', help="effectifs par admission et par série")
+    stats.add_argument('--serie', help="restreindre les moyennes à une série")
+    stats.set_defaults(fonction=commande_stats)
+
+    importer = commandes.add_parser('importer', help="importer des fichiers JSONL de résultats")
+    importer.add_argument('fichiers', nargs='+', help="fichiers .jsonl (motifs glob acceptés)")
+    importer.set_defaults(fonction=commande_importer)
+
+    args = parser.parse_args()
+
+    if args.commande != 'importer' and not os.path.exists(args.base):
+        print(f"❌ Base '{args.base}' introuvable (lancez d'abord une recherche ou 'importer')")
+        sys.exit(1)
+
+    with BaseResultats(args.base) as base:
+        if not args.fonction(base, args):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
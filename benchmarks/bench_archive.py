@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'archive des pages brutes (archive.py)
+
+Archive N pages construites à partir des pages enregistrées (mêmes cas
+et même substitution du numéro que le serveur factice), puis compare la
+place occupée à celle des pages brutes et compressées une à une (gzip),
+et mesure le temps d'archivage et d'accès direct par matricule.
+
+Usage: python benchmarks/bench_archive.py [--pages N]
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from archive import ArchivePages  # noqa: E402
+from serveur_factice import charger_pages, page_pour  # noqa: E402
+
+SESSION = 'http://127.0.0.1/numero/'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--pages', type=int, default=2000,
+                        help="pages archivées (défaut: %(default)s)")
+    parser.add_argument('--lectures', type=int, default=1000,
+                        help="accès directs mesurés (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    modeles = charger_pages()
+    numeros = [str(40000 + i) for i in range(args.pages)]
+
+    def page(numero):
+        modele = page_pour(modeles, numero)
+        return modele['contenu'].replace(modele['numero'], numero).encode('utf-8')
+
+    brut = sum(len(page(n)) for n in numeros)
+    par_page = sum(len(gzip.compress(page(n))) for n in numeros)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'archive.sqlite')
+        archive = ArchivePages(chemin)
+        debut = time.perf_counter()
+        for numero in numeros:
+            archive.ajouter(SESSION, numero, page(numero))
+        duree_ecriture = time.perf_counter() - debut
+
+        tirage = random.Random(1)
+        debut = time.perf_counter()
+        for _ in range(args.lectures):
+            numero = tirage.choice(numeros)
+            assert archive.lire(numero, SESSION)[0] == page(numero)
+        duree_lecture = time.perf_counter() - debut
+
+        stats = archive.statistiques()
+        archive.fermer()
+        fichier = os.path.getsize(chemin)
+
+    archive_totale = stats['octets_compresses'] + stats['octets_dictionnaires']
+    print(f"🗜️  Archive de {args.pages} pages ({len(modeles)} cas, fr/ar)\n")
+    print(f"{'Stockage':<34} {'Ko':>9} {'taux':>7}")
+    print("-" * 52)
+    print(f"{'pages brutes':<34} {brut / 1024:>9.0f} {1:>7.1%}")
+    print(f"{'gzip page par page':<34} {par_page / 1024:>9.0f} {par_page / brut:>7.1%}")
+    print(f"{'archive (dictionnaires compris)':<34} {archive_totale / 1024:>9.0f} "
+          f"{archive_totale / brut:>7.2%}")
+    print(f"{'fichier SQLite':<34} {fichier / 1024:>9.0f} {fichier / brut:>7.2%}")
+    print(f"\nDictionnaires: {stats['dictionnaires']}, "
+          f"{stats['octets_compresses'] / args.pages:.0f} octets par page")
+    print(f"Archivage: {duree_ecriture / args.pages * 1000:.2f} ms/page ; "
+          f"accès direct: {duree_lecture / args.lectures * 1000:.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du démarrage de bac_simple (un processus par recherche)
+
+Mesure le temps total d'un processus Python, de son lancement à sa fin :
+interpréteur seul, import de bac_simple, puis une recherche complète en
+ligne de commande (client léger) et par la session requests, avec la page
+en cache ou téléchargée depuis le serveur factice (sans latence).
+
+Usage: python benchmarks/bench_demarrage.py [--repetitions N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from serveur_factice import ServeurFactice  # noqa: E402
+
+BAC_SIMPLE = os.path.join(RACINE, 'bac_simple.py')
+
+# Recherche par la session requests et le parseur configuré (chemin historique)
+CODE_REQUESTS = ("import sys; sys.path.insert(0, {racine!r}); import bac_simple; "
+                 "bac_simple.rechercher_bac_simple(sys.argv[1])")
+
+
+def commandes():
+    """
+    Scénarios mesurés : (libellé, commande sans le numéro, page en cache ?)
+    Le numéro est ajouté à la fin de la commande quand il y en a un.
+    """
+    requests_path = [sys.executable, '-c', CODE_REQUESTS.format(racine=RACINE)]
+    return [
+        ("interpréteur seul", [sys.executable, '-c', 'pass'], None),
+        ("import bac_simple", [sys.executable, '-c',
+                               f"import sys; sys.path.insert(0, {RACINE!r}); import bac_simple"], None),
+        ("CLI, page en cache", [sys.executable, BAC_SIMPLE], True),
+        ("CLI, téléchargement", [sys.executable, BAC_SIMPLE], False),
+        ("requests, page en cache", requests_path, True),
+        ("requests, téléchargement", requests_path, False),
+    ]
+
+
+def chronometrer(commande, dossier, environnement):
+    debut = time.perf_counter()
+    subprocess.run(commande, cwd=dossier, env=environnement, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--repetitions', type=int, default=15,
+                        help="processus lancés par scénario (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"🚀 Démarrage de bac_simple : {args.repetitions} processus par scénario\n")
+    print(f"{'Scénario':<26} {'médiane ms':>11} {'min ms':>8} {'max ms':>8}")
+    print("-" * 56)
+
+    numero_suivant = 40000
+    with ServeurFactice() as serveur, tempfile.TemporaryDirectory() as dossier:
+        environnement = {**os.environ, 'BAC_URL_BASE': serveur.url_base}
+        for libelle, commande, en_cache in commandes():
+            durees = []
+            for _ in range(args.repetitions):
+                if en_cache is None:
+                    complete = commande
+                else:
+                    if not en_cache:
+                        # Numéro jamais demandé : téléchargement obligatoire
+                        numero_suivant += 1
+                    complete = commande + [str(numero_suivant)]
+                    if en_cache:
+                        # Mettre la page en cache avant la mesure
+                        chronometrer(complete, dossier, environnement)
+                durees.append(chronometrer(complete, dossier, environnement))
+            print(f"{libelle:<26} {statistics.median(durees) * 1000:>11.1f} "
+                  f"{min(durees) * 1000:>8.1f} {max(durees) * 1000:>8.1f}")
+
+    print("\nNote: chaque recherche écrit aussi le résultat dans la base SQLite locale.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des backends d'analyse HTML (analyse_html.texte_page)
+Mesure, pour chaque backend, le temps d'analyse et la mémoire de pointe par page.
+Chaque backend tourne dans un sous-processus pour isoler la mémoire (RSS).
+
+Usage: python benchmarks/bench_parseurs.py [--pages N] [--fichier page.html]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import analyse_html  # noqa: E402
+from extraction import extraire_resultat  # noqa: E402
+
+
+def page_exemple(numero='19736'):
+    """
+    Page synthétique proche d'une page mauribac : gabarit volumineux
+    (navigation, scripts, pied de page) autour d'un petit bloc de résultat
+    """
+    navigation = ''.join(
+        f'<li><a href="/fr/page-{i}/">Rubrique {i} &amp; actualités</a></li>'
+        for i in range(400))
+    scripts = '<script>var config = {"pub": true, "id": 42};</script>' * 30
+    pied = '<p class="footer">Mauribac - tous droits réservés</p>' * 300
+    resultat = (
+        '<div class="result">'
+        f'<table><tr><td>Numéro</td><td>{numero}</td></tr>'
+        '<tr><td>الاسم</td><td>محمد أحمد</td></tr>'
+        '<tr><td>المعدل</td><td>المعدل 11.13</td></tr>'
+        '<tr><td>Décision</td><td>Admis</td></tr>'
+        '<tr><td>Série</td><td>العلوم الطبيعية</td></tr></table></div>')
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>BAC 2024</title>'
+        f'{scripts}</head><body><nav><ul>{navigation}</ul></nav>'
+        f'<main>{resultat}</main><footer>{pied}</footer></body></html>'
+    ).encode('utf-8')
+
+
+def mesurer(backend, contenu, pages):
+    """
+    Analyse `pages` fois la page avec un backend et retourne les mesures
+    """
+    texte_page = analyse_html.texte_page
+
+    # Mémoire Python de pointe pour une page
+    tracemalloc.start()
+    texte_page(contenu, backend)
+    _, pic_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    debut = time.perf_counter()
+    for _ in range(pages):
+        text = texte_page(contenu, backend)
+    duree = time.perf_counter() - debut
+
+    resultat = extraire_resultat(text, '19736')
+    return {
+        'backend': backend,
+        'ms_par_page': duree / pages * 1000,
+        'pic_python_ko': pic_python / 1024,
+        'rss_max_mo': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'moyenne': resultat.moyenne_texte,
+        'statut': resultat.code_statut,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--pages', type=int, default=200,
+                        help="nombre de pages analysées par backend (défaut: %(default)s)")
+    parser.add_argument('--fichier', help="page HTML à utiliser à la place de la page synthétique")
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fichier:
+        with open(args.fichier, 'rb') as f:
+            contenu = f.read()
+    else:
+        contenu = page_exemple()
+
+    # Sous-processus : mesurer un seul backend et renvoyer le résultat en JSON
+    if args.backend:
+        print(json.dumps(mesurer(args.backend, contenu, args.pages)))
+        return
+
+    print(f"📄 Page de {len(contenu) / 1024:.1f} Ko, {args.pages} analyses par backend\n")
+    print(f"{'Backend':<12} {'ms/page':>9} {'pic Python (Ko)':>16} {'RSS max (Mo)':>13}  Extraction")
+    print("-" * 72)
+
+    backends = [b for b in analyse_html.BACKENDS
+                if b != 'lxml' or analyse_html.LXML_DISPONIBLE]
+    for backend in backends:
+        commande = [sys.executable, os.path.abspath(__file__),
+                    '--backend', backend, '--pages', str(args.pages)]
+        if args.fichier:
+            commande += ['--fichier', args.fichier]
+        mesure = json.loads(subprocess.check_output(commande))
+        print(f"{backend:<12} {mesure['ms_par_page']:>9.2f} {mesure['pic_python_ko']:>16.0f} "
+              f"{mesure['rss_max_mo']:>13.1f}  {mesure['statut']} / {mesure['moyenne']}")
+
+    print("\nNote: le pic Python (tracemalloc) n'inclut pas la mémoire allouée par libxml2 ;")
+    print("      le RSS max couvre l'interpréteur et les imports de chaque sous-processus.")
+
+
+if __name__ == "__main__":
+    main()
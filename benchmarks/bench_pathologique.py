@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'extraction sur des pages pathologiques
+
+Chaque cas est une page construite pour faire revenir en arrière les
+anciens motifs (balises non fermées, numéro cité sans statut, longue suite
+d'espaces après « moyenne »...), à des tailles qui doublent. On mesure
+l'extraction complète (texte du bloc de résultat, extraire_resultat,
+chercher_patterns_bac) et les anciens motifs, recopiés ici pour comparaison.
+Un temps qui double avec la taille est linéaire ; un temps qui quadruple
+est quadratique.
+
+Usage: python benchmarks/bench_pathologique.py [--tailles 8]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import analyse_html  # noqa: E402
+from bac_avance import chercher_patterns_bac  # noqa: E402
+from extraction import extraire_resultat  # noqa: E402
+
+NUMERO = '19736'
+TAILLE_INITIALE = 4 * 1024
+
+# Au-delà de cette durée, les anciens motifs ne sont plus mesurés
+DUREE_MAX_ANCIEN = 2.0
+
+# Anciens motifs (avant la limitation au bloc de résultat)
+_ANCIEN_BALISES = re.compile(r'<!--.*?-->|<[^>]*>', re.DOTALL)
+_ANCIEN_STATUT = re.compile(rf'{NUMERO}.*?(?:admis|refusé|échec|réussi|mention)',
+                            re.IGNORECASE)
+_ANCIEN_MOYENNE = re.compile(r'e?\s*[:\-]?\s*(\d+[.,]\d+)')
+_ANCIEN_ETABLISSEMENT = re.compile(r'\s*[:\-]?\s*([^|]+)')
+
+# Motif répété jusqu'à la taille voulue (avec un préfixe éventuel)
+CAS = [
+    ('chevrons non fermés', '', '<a x '),
+    ('commentaires non fermés', '', '<!-- x '),
+    ('numéro sans statut', '', f'{NUMERO} x '),
+    ('espaces après moyenne', 'moyenne', ' '),
+    ('établissement sans |', '', 'établissement x '),
+    ('mots-clés répétés', '', 'admis moyenne: 1 '),
+]
+
+
+def page(prefixe, motif, taille):
+    # Page tronquée (pas de balise fermante après le motif répété)
+    corps = prefixe + motif * ((taille - len(prefixe)) // len(motif))
+    return f'<html><body><main>{corps}'.encode('utf-8')
+
+
+def extraction_actuelle(contenu):
+    text = analyse_html.texte_resultat(contenu, 'brut')
+    extraire_resultat(text, NUMERO)
+    chercher_patterns_bac(text, NUMERO)
+
+
+def extraction_ancienne(contenu):
+    text = _ANCIEN_BALISES.sub('', contenu.decode('utf-8'))
+    list(_ANCIEN_STATUT.finditer(re.sub(r'\s+', ' ', text)))
+    texte_min = text.lower()
+    for match in re.finditer('moyenn', texte_min):
+        _ANCIEN_MOYENNE.match(texte_min, match.end())
+    for match in re.finditer('établissement', texte_min):
+        _ANCIEN_ETABLISSEMENT.match(texte_min, match.end())
+
+
+def chronometrer(fonction, contenu):
+    debut = time.perf_counter()
+    fonction(contenu)
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--tailles', type=int, default=8,
+                        help="nombre de tailles (doublées à partir de 4 Ko, "
+                             "défaut: %(default)s)")
+    args = parser.parse_args()
+    tailles = [TAILLE_INITIALE << i for i in range(args.tailles)]
+
+    print(f"🐢 Pages pathologiques de {tailles[0] // 1024} à {tailles[-1] // 1024} Ko "
+          f"(temps en ms ; ×N = rapport avec la taille précédente)\n")
+    print(f"{'Cas':<26} {'Ko':>6} {'actuel':>9} {'×':>5} {'ancien':>10} {'×':>6}")
+    print("-" * 67)
+    for nom, prefixe, motif in CAS:
+        precedent_actuel = precedent_ancien = None
+        ancien_arrete = False
+        for taille in tailles:
+            contenu = page(prefixe, motif, taille)
+            actuel = chronometrer(extraction_actuelle, contenu)
+            ligne = f"{nom:<26} {taille // 1024:>6} {actuel * 1000:>9.2f} "
+            ligne += (f"{actuel / precedent_actuel:>5.1f}" if precedent_actuel else f"{'':>5}")
+            if ancien_arrete:
+                ligne += f" {'-':>10}"
+            else:
+                ancien = chronometrer(extraction_ancienne, contenu)
+                ligne += f" {ancien * 1000:>10.1f} "
+                ligne += (f"{ancien / precedent_ancien:>6.1f}" if precedent_ancien else f"{'':>6}")
+                precedent_ancien = ancien
+                ancien_arrete = ancien > DUREE_MAX_ANCIEN
+            precedent_actuel = actuel
+            print(ligne)
+            nom = ''
+        print()
+
+    print("Note: au-delà de analyse_html.TAILLE_MAX_PAGE, la page est tronquée et le")
+    print("      temps actuel cesse de croître ; l'extraction s'arrête aussi au-delà de")
+    print("      extraction.BUDGET_PAGE secondes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des recherches complètes (téléchargement + analyse) contre le
+serveur factice (benchmarks/serveur_factice.py), sans toucher mauribac.com
+
+Mesure pour extraire_info_bac (recherche_batch), chercher_patterns_bac
+(bac_avance) et rechercher_bac_simple (bac_simple) : pages/s, latence
+p50/p99, temps CPU par page, RSS max et exactitude des résultats.
+Chaque fonction tourne dans un sous-processus (mémoire et CPU isolés),
+dans un dossier temporaire (cache disque et base de résultats vides).
+
+Usage: python benchmarks/bench_recherche.py [--requetes N] [--workers W]
+           [--latence MS] [--gigue MS] [--taux-erreur P] [--taux-429 P]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from serveur_factice import ServeurFactice, charger_pages, page_pour  # noqa: E402
+
+CIBLES = ('extraire_info_bac', 'chercher_patterns_bac', 'rechercher_bac_simple')
+
+# Premier numéro demandé (les numéros suivants parcourent tous les cas)
+NUMERO_DEBUT = 30000
+
+
+def preparer_cible(cible):
+    """
+    Fonction numero -> admission obtenue (None si non trouvé, False si erreur ;
+    True quand la fonction ne fournit pas l'admission)
+    """
+    if cible == 'extraire_info_bac':
+        from recherche_batch import extraire_info_bac
+
+        def appeler(numero):
+            succes, info = extraire_info_bac(numero)
+            if not succes:
+                return False
+            return None if info['admission'] == 'Non trouvé' else info['admission']
+        return appeler
+
+    if cible == 'chercher_patterns_bac':
+        import requests
+        import analyse_html
+        import client_http
+        from bac_avance import chercher_patterns_bac
+
+        def appeler(numero):
+            try:
+                response = client_http.telecharger(numero)
+            except requests.exceptions.RequestException:
+                return False
+            soup = analyse_html.creer_soupe(response.content)
+            for motif in chercher_patterns_bac(soup.get_text(), numero):
+                if motif.startswith('Admission: '):
+                    return motif[len('Admission: '):]
+            return None
+        return appeler
+
+    if cible == 'rechercher_bac_simple':
+        from bac_simple import rechercher_bac_simple
+
+        # L'affichage est écarté par main (redirection de toute la mesure)
+        return rechercher_bac_simple
+
+    raise ValueError(f"cible inconnue: {cible}")
+
+
+def mesurer(cible, requetes, workers):
+    """
+    Exécute `requetes` recherches avec `workers` threads (dans le sous-processus)
+    """
+    import client_http
+    client_http.configurer_cache(actif=False)
+    pages = charger_pages()
+    appeler = preparer_cible(cible)
+    numeros = [str(NUMERO_DEBUT + i) for i in range(requetes)]
+
+    # Une recherche hors mesure : imports paresseux, connexion, etc.
+    appeler(str(NUMERO_DEBUT - 1))
+
+    def chronometrer(numero):
+        debut = time.perf_counter()
+        obtenu = appeler(numero)
+        return time.perf_counter() - debut, numero, obtenu
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_debut = usage.ru_utime + usage.ru_stime
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        mesures = list(executor.map(chronometrer, numeros))
+    duree = time.perf_counter() - debut
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = usage.ru_utime + usage.ru_stime - cpu_debut
+
+    latences = sorted(m[0] for m in mesures)
+    erreurs = exacts = verifies = 0
+    for _, numero, obtenu in mesures:
+        if obtenu is False:
+            erreurs += 1
+        elif obtenu is not True:
+            verifies += 1
+            attendu = page_pour(pages, numero)['attendu']['admission']
+            if (obtenu is None and attendu == 'Non trouvé') or \
+                    (obtenu is not None and obtenu.startswith(attendu)):
+                exacts += 1
+
+    def percentile(p):
+        return latences[min(len(latences) - 1, int(p / 100 * len(latences)))]
+
+    return {
+        'cible': cible,
+        'pages_par_s': requetes / duree,
+        'p50_ms': percentile(50) * 1000,
+        'p99_ms': percentile(99) * 1000,
+        'cpu_ms_par_page': cpu / requetes * 1000,
+        'rss_max_mo': usage.ru_maxrss / 1024,
+        'erreurs': erreurs,
+        'exacts': exacts,
+        'verifies': verifies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--requetes', type=int, default=200,
+                        help="recherches par fonction (défaut: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="recherches simultanées (défaut: %(default)s)")
+    parser.add_argument('--latence', type=float, default=20.0,
+                        help="latence du serveur factice en ms (défaut: %(default)s)")
+    parser.add_argument('--gigue', type=float, default=5.0,
+                        help="variation de la latence en ms (défaut: %(default)s)")
+    parser.add_argument('--taux-erreur', type=float, default=0.0,
+                        help="proportion de réponses 503 (défaut: %(default)s)")
+    parser.add_argument('--taux-429', type=float, default=0.0,
+                        help="proportion de réponses 429 (défaut: %(default)s)")
+    parser.add_argument('--cibles', nargs='+', choices=CIBLES, default=list(CIBLES),
+                        help="fonctions à mesurer (défaut: toutes)")
+    parser.add_argument('--cible', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Sous-processus : mesurer une seule fonction et renvoyer le résultat en JSON
+    if args.cible:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mesure = mesurer(args.cible, args.requetes, args.workers)
+        print(json.dumps(mesure))
+        return
+
+    serveur = ServeurFactice(latence=args.latence / 1000, gigue=args.gigue / 1000,
+                             taux_erreur=args.taux_erreur, taux_429=args.taux_429,
+                             graine=0)
+    print(f"🧪 Serveur factice: {len(serveur.pages)} pages enregistrées, latence "
+          f"{args.latence:.0f}±{args.gigue:.0f} ms, 503 {args.taux_erreur:.0%}, "
+          f"429 {args.taux_429:.0%}")
+    print(f"📄 {args.requetes} recherches par fonction, {args.workers} simultanée(s)\n")
+    print(f"{'Fonction':<22} {'pages/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'CPU ms/page':>12} {'RSS Mo':>7} {'erreurs':>8}  Exactitude")
+    print("-" * 92)
+
+    with serveur, tempfile.TemporaryDirectory() as dossier:
+        environnement = {**os.environ, 'BAC_URL_BASE': serveur.url_base}
+        for cible in args.cibles:
+            commande = [sys.executable, os.path.abspath(__file__), '--cible', cible,
+                        '--requetes', str(args.requetes), '--workers', str(args.workers)]
+            m = json.loads(subprocess.check_output(commande, cwd=dossier,
+                                                   env=environnement))
+            exactitude = f"{m['exacts']}/{m['verifies']}" if m['verifies'] else '-'
+            print(f"{cible:<22} {m['pages_par_s']:>8.1f} {m['p50_ms']:>8.1f} "
+                  f"{m['p99_ms']:>8.1f} {m['cpu_ms_par_page']:>12.2f} "
+                  f"{m['rss_max_mo']:>7.1f} {m['erreurs']:>8}  {exactitude}")
+        print(f"\n📡 Réponses du serveur factice: {dict(sorted(serveur.reponses.items()))}")
+
+    print("\nNote: le CPU par page inclut le client HTTP et l'analyse ; la latence du")
+    print("      serveur factice n'est pas comptée dans le CPU mais l'est dans p50/p99.")
+
+
+if __name__ == "__main__":
+    main()
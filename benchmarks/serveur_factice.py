@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur local qui remplace mauribac.com pendant les benchmarks
+Sert les pages enregistrées de benchmarks/pages/ (admis, échec, rattrapage,
+introuvable ; en arabe et en français) avec une latence, un taux d'erreurs
+et un taux de réponses 429 configurables.
+
+Le cas servi dépend du numéro demandé (numéro modulo le nombre de cas) et le
+numéro enregistré dans la page est remplacé par le numéro demandé.
+
+Usage:
+    python benchmarks/serveur_factice.py --port 8081 --latence 80 --taux-erreur 0.01
+    BAC_URL_BASE=http://127.0.0.1:8081/numero/ python bac_simple.py 19736
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DOSSIER_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+
+def charger_pages(dossier=DOSSIER_PAGES):
+    """
+    Pages enregistrées décrites par `index.json`, triées par nom de cas
+    Retourne une liste de dicts : cas, numero, langue, attendu, contenu (str)
+    """
+    with open(os.path.join(dossier, 'index.json'), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    pages = []
+    for cas in sorted(index):
+        description = index[cas]
+        with open(os.path.join(dossier, description['fichier']), 'r', encoding='utf-8') as f:
+            pages.append({'cas': cas, **description, 'contenu': f.read()})
+    return pages
+
+
+def page_pour(pages, numero):
+    """
+    Page servie pour un numéro (répartition déterministe entre les cas)
+    """
+    return pages[int(numero) % len(pages)]
+
+
+class ServeurFactice:
+    """
+    Serveur HTTP en arrière-plan (thread) ; utilisable comme gestionnaire de contexte
+
+    latence, gigue : délai de réponse en secondes (uniforme dans latence ± gigue)
+    taux_erreur : proportion de réponses 503 ; taux_429 : proportion de 429
+    """
+
+    def __init__(self, hote='127.0.0.1', port=0, latence=0.0, gigue=0.0,
+                 taux_erreur=0.0, taux_429=0.0, dossier=DOSSIER_PAGES, graine=None):
+        self.pages = charger_pages(dossier)
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.taux_429 = taux_429
+        self.requetes = 0
+        self.reponses = {}
+        self._aleatoire = random.Random(graine)
+        self._verrou = threading.Lock()
+
+        serveur_factice = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # En-têtes et corps envoyés ensemble (sinon Nagle + ACK retardé : +40 ms)
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                serveur_factice._repondre(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((hote, port), Gestionnaire)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url_base(self):
+        hote, port = self.httpd.server_address[:2]
+        return f'http://{hote}:{port}/numero/'
+
+    def _tirage(self):
+        with self._verrou:
+            self.requetes += 1
+            delai = max(0.0, self.latence + self._aleatoire.uniform(-self.gigue, self.gigue))
+            tirage = self._aleatoire.random()
+        if tirage < self.taux_429:
+            return delai, 429
+        if tirage < self.taux_429 + self.taux_erreur:
+            return delai, 503
+        return delai, 200
+
+    def _repondre(self, gestionnaire):
+        numero = gestionnaire.path.rstrip('/').rsplit('/', 1)[-1]
+        delai, code = self._tirage()
+        if delai:
+            time.sleep(delai)
+
+        if code == 200 and not numero.isdigit():
+            code = 404
+        if code == 200:
+            page = page_pour(self.pages, numero)
+            corps = page['contenu'].replace(page['numero'], numero).encode('utf-8')
+        else:
+            corps = f'<html><body>Erreur {code}</body></html>'.encode('utf-8')
+
+        with self._verrou:
+            self.reponses[code] = self.reponses.get(code, 0) + 1
+        gestionnaire.send_response(code)
+        gestionnaire.send_header('Content-Type', 'text/html; charset=utf-8')
+        gestionnaire.send_header('Content-Length', str(len(corps)))
+        if code == 429:
+            gestionnaire.send_header('Retry-After', '1')
+        gestionnaire.end_headers()
+        gestionnaire.wfile.write(corps)
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def arreter(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local remplaçant mauribac.com")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latence', type=float, default=0.0,
+                        help="latence moyenne en millisecondes (défaut: %(default)s)")
+    parser.add_argument('--gigue', type=float, default=0.0,
+                        help="variation de la latence en millisecondes (défaut: %(default)s)")
+    parser.add_argument('--taux-erreur', type=float, default=0.0,
+                        help="proportion de réponses 503 (défaut: %(default)s)")
+    parser.add_argument('--taux-429', type=float, default=0.0,
+                        help="proportion de réponses 429 (défaut: %(default)s)")
+    parser.add_argument('--graine', type=int, default=None,
+                        help="graine du tirage aléatoire (reproductibilité)")
+    args = parser.parse_args()
+
+    serveur = ServeurFactice(args.hote, args.port, args.latence / 1000, args.gigue / 1000,
+                             args.taux_erreur, args.taux_429, graine=args.graine)
+    print(f"🧪 Serveur factice sur {serveur.url_base} ({len(serveur.pages)} pages enregistrées)")
+    print(f"   BAC_URL_BASE={serveur.url_base}")
+    try:
+        serveur.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n🛑 Arrêt : {serveur.requetes} requête(s), réponses {serveur.reponses}")
+    finally:
+        serveur.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
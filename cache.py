@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache disque des pages de résultats (SQLite)
+Clé : URL de la page (session + numéro de candidat)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+# Emplacement par défaut du cache
+CHEMIN_CACHE = os.path.join('.cache_bac', 'pages.sqlite')
+
+# Durée de validité par défaut d'une page en cache (en secondes)
+TTL_PAR_DEFAUT = 24 * 3600
+
+
+class EntreeCache:
+    """
+    Page stockée dans le cache avec ses validateurs HTTP
+    """
+
+    __slots__ = ('url', 'contenu', 'etag', 'last_modified', 'date_stockage')
+
+    def __init__(self, url, contenu, etag, last_modified, date_stockage):
+        self.url = url
+        self.contenu = contenu
+        self.etag = etag
+        self.last_modified = last_modified
+        self.date_stockage = date_stockage
+
+    def est_fraiche(self, ttl):
+        """La page a-t-elle été stockée (ou revalidée) il y a moins de `ttl` secondes ?"""
+        return ttl is not None and time.time() - self.date_stockage < ttl
+
+    def headers_revalidation(self):
+        """En-têtes conditionnels pour revalider la page auprès du serveur"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class CachePages:
+    """
+    Cache SQLite partagé entre threads (une connexion par thread)
+    """
+
+    def __init__(self, chemin=CHEMIN_CACHE):
+        self.chemin = chemin
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self._local = threading.local()
+
+        connexion = self._connexion()
+        connexion.execute('PRAGMA journal_mode=WAL')
+        connexion.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' url TEXT PRIMARY KEY,'
+            ' contenu BLOB NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' date_stockage REAL NOT NULL)')
+        connexion.commit()
+
+    def _connexion(self):
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is None:
+            connexion = sqlite3.connect(self.chemin, timeout=30)
+            self._local.connexion = connexion
+        return connexion
+
+    def lire(self, url):
+        """
+        Retourne l'EntreeCache de l'URL, ou None si absente
+        """
+        ligne = self._connexion().execute(
+            'SELECT url, contenu, etag, last_modified, date_stockage '
+            'FROM pages WHERE url = ?', (url,)).fetchone()
+        return EntreeCache(*ligne) if ligne else None
+
+    def ecrire(self, url, contenu, etag=None, last_modified=None):
+        """
+        Stocke (ou remplace) une page
+        """
+        connexion = self._connexion()
+        with connexion:
+            connexion.execute(
+                'INSERT OR REPLACE INTO pages '
+                '(url, contenu, etag, last_modified, date_stockage) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, contenu, etag, last_modified, time.time()))
+
+    def pages(self):
+        """
+        Parcourt toutes les pages du cache : (url, contenu)
+        """
+        yield from self._connexion().execute('SELECT url, contenu FROM pages ORDER BY url')
+
+    def rafraichir(self, url):
+        """
+        Marque une page comme revalidée maintenant (réponse 304)
+        """
+        connexion = self._connexion()
+        with connexion:
+            connexion.execute('UPDATE pages SET date_stockage = ? WHERE url = ?',
+                              (time.time(), url))
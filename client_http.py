@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client HTTP partagé par bac_simple, bac_avance et recherche_batch
+Une seule session requests : pool de connexions persistantes (keep-alive),
+cache DNS, en-têtes et timeout définis en un seul endroit.
+Les pages sont servies depuis le cache disque (cache.py) quand c'est possible ;
+les numéros inexistants sont mémorisés dans le cache négatif (introuvables.py).
+Les pages téléchargées peuvent être archivées compressées (archive.py).
+URL, en-têtes et timeout sont définis dans client_leger (client sans requests).
+"""
+
+import atexit
+import os
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+from cache import CachePages, CHEMIN_CACHE, TTL_PAR_DEFAUT  # noqa: F401
+from client_leger import URL_BASE, TIMEOUT, HEADERS, url_candidat  # noqa: F401
+from introuvables import (CacheIntrouvables, CODES_INTROUVABLE, TTL_INTROUVABLES,
+                          chemin_session, page_introuvable)
+from metriques import METRIQUES
+
+
+# Taille du pool de connexions par hôte (>= nombre de workers du lot)
+TAILLE_POOL = 16
+
+# Durée de vie (en secondes) d'une résolution DNS en cache
+DUREE_CACHE_DNS = 300
+
+# Taille des blocs lus en lecture progressive (voir telecharger(suffisant=...))
+TAILLE_BLOC_LECTURE = 4096
+
+
+class AbsentDuCache(requests.exceptions.RequestException):
+    """Page absente du cache alors que le mode hors ligne est actif"""
+
+
+class CandidatIntrouvable(requests.exceptions.HTTPError):
+    """Numéro inexistant : code 404/410, page « aucun résultat » ou cache négatif"""
+
+
+_cache_dns = {}
+_verrou_dns = threading.Lock()
+
+
+def resoudre_hote(hote, port):
+    """
+    Résout un nom d'hôte en adresse IP avec un cache à durée limitée.
+    Retourne le nom d'origine si la résolution échoue (urllib3 lèvera
+    alors l'erreur habituelle à la connexion).
+    """
+    maintenant = time.monotonic()
+    with _verrou_dns:
+        entree = _cache_dns.get((hote, port))
+        if entree and entree[1] > maintenant:
+            return entree[0]
+
+    try:
+        infos = socket.getaddrinfo(hote, port, type=socket.SOCK_STREAM)
+    except OSError:
+        return hote
+
+    adresse = infos[0][4][0]
+    with _verrou_dns:
+        _cache_dns[(hote, port)] = (adresse, maintenant + DUREE_CACHE_DNS)
+    return adresse
+
+
+def _etablir(connexion, creer_socket):
+    """
+    Résout l'hôte (cache DNS) puis ouvre la socket TCP, en mesurant les deux étapes
+    """
+    debut = time.perf_counter()
+    connexion._dns_host = resoudre_hote(connexion.host, connexion.port)
+    resolu = time.perf_counter()
+    sock = creer_socket()
+    connexion._duree_tcp = time.perf_counter() - debut
+    METRIQUES.observer('dns', resolu - debut)
+    METRIQUES.observer('connexion', connexion._duree_tcp - (resolu - debut))
+    METRIQUES.ajouter_etablissement(connexion._duree_tcp)
+    return sock
+
+
+class _ConnexionHTTP(HTTPConnection):
+    """Connexion HTTP qui se connecte à l'IP en cache"""
+
+    def _new_conn(self):
+        return _etablir(self, super()._new_conn)
+
+
+class _ConnexionHTTPS(HTTPSConnection):
+    """
+    Connexion HTTPS qui se connecte à l'IP en cache ; le SNI et la
+    vérification du certificat utilisent toujours le nom d'hôte.
+    """
+
+    def _new_conn(self):
+        return _etablir(self, super()._new_conn)
+
+    def connect(self):
+        # connect() = _new_conn() (DNS + TCP) puis négociation TLS
+        debut = time.perf_counter()
+        self._duree_tcp = 0.0
+        super().connect()
+        duree_tls = time.perf_counter() - debut - self._duree_tcp
+        METRIQUES.observer('tls', duree_tls)
+        METRIQUES.ajouter_etablissement(duree_tls)
+
+
+class _PoolHTTP(HTTPConnectionPool):
+    ConnectionCls = _ConnexionHTTP
+
+
+class _PoolHTTPS(HTTPSConnectionPool):
+    ConnectionCls = _ConnexionHTTPS
+
+
+class AdaptateurPool(HTTPAdapter):
+    """Adaptateur requests utilisant les connexions avec cache DNS"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _PoolHTTP,
+            'https': _PoolHTTPS,
+        }
+
+
+_session = None
+_verrou_session = threading.Lock()
+
+
+def obtenir_session():
+    """
+    Retourne la session partagée (créée au premier appel)
+    """
+    global _session
+    if _session is None:
+        with _verrou_session:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                # Annoncer uniquement les codages que urllib3 sait décoder ici
+                # ('br' seulement si brotli est installé, 'zstd' si zstandard l'est)
+                session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+                adaptateur = AdaptateurPool(pool_connections=4,
+                                            pool_maxsize=TAILLE_POOL)
+                session.mount('https://', adaptateur)
+                session.mount('http://', adaptateur)
+                _session = session
+    return _session
+
+
+# Configuration du cache de pages (voir configurer_cache)
+_config_cache = {
+    'actif': True,
+    'chemin': CHEMIN_CACHE,
+    'ttl': TTL_PAR_DEFAUT,
+    'hors_ligne': False,
+    'introuvables': True,
+    'ttl_introuvables': TTL_INTROUVABLES,
+}
+_cache = None
+_introuvables = None
+_archive = None
+
+
+def configurer_cache(actif=None, chemin=None, ttl=None, hors_ligne=None,
+                     introuvables=None, ttl_introuvables=None):
+    """
+    Modifie la configuration du cache de pages
+    actif: utiliser le cache ; ttl: durée de validité des pages en secondes ;
+    hors_ligne: ne jamais accéder au réseau (lecture du cache uniquement) ;
+    introuvables: utiliser le cache négatif des numéros inexistants ;
+    ttl_introuvables: durée de validité du cache négatif en secondes (<= 0 :
+    numéros mémorisés ignorés pour ce traitement, sans être effacés)
+    """
+    global _cache, _introuvables
+    if introuvables is not None:
+        _config_cache['introuvables'] = introuvables
+    if actif is not None:
+        _config_cache['actif'] = actif
+    if chemin is not None and chemin != _config_cache['chemin']:
+        _config_cache['chemin'] = chemin
+        _cache = _introuvables = None
+    if ttl is not None:
+        _config_cache['ttl'] = ttl
+    if (ttl_introuvables is not None
+            and ttl_introuvables != _config_cache['ttl_introuvables']):
+        _config_cache['ttl_introuvables'] = ttl_introuvables
+        _introuvables = None
+    if hors_ligne is not None:
+        _config_cache['hors_ligne'] = hors_ligne
+
+
+def obtenir_cache():
+    """
+    Retourne le cache de pages, ou None s'il est désactivé
+    """
+    global _cache
+    if not _config_cache['actif']:
+        return None
+    if _cache is None:
+        with _verrou_session:
+            if _cache is None:
+                _cache = CachePages(_config_cache['chemin'])
+    return _cache
+
+
+def configurer_archive(chemin):
+    """
+    Archive compressée des pages téléchargées (archive.py) ; None pour la désactiver
+    """
+    global _archive
+    if chemin is None:
+        _archive = None
+    else:
+        from archive import ArchivePages
+        _archive = ArchivePages(chemin)
+
+
+def obtenir_introuvables():
+    """
+    Retourne le cache négatif de la session, ou None s'il est désactivé
+    (désactivé aussi avec le cache de pages)
+    """
+    global _introuvables
+    if not (_config_cache['actif'] and _config_cache['introuvables']):
+        return None
+    if _introuvables is None:
+        with _verrou_session:
+            if _introuvables is None:
+                _introuvables = CacheIntrouvables(
+                    chemin_session(URL_BASE, os.path.dirname(_config_cache['chemin'])),
+                    _config_cache['ttl_introuvables'])
+                atexit.register(_introuvables.enregistrer)
+    return _introuvables
+
+
+def est_introuvable(numero_candidat):
+    """
+    Le numéro est-il connu comme inexistant (cache négatif) ?
+    """
+    introuvables = obtenir_introuvables()
+    return introuvables is not None and numero_candidat in introuvables
+
+
+def _signaler_introuvable(numero_candidat, source, response=None):
+    """
+    Mémorise un numéro inexistant et lève CandidatIntrouvable
+    """
+    introuvables = obtenir_introuvables()
+    if introuvables is not None and source != 'cache_negatif':
+        introuvables.ajouter(numero_candidat)
+    METRIQUES.compter(f'introuvables:source={source}')
+    raise CandidatIntrouvable(f"Numéro {numero_candidat} inexistant ({source})",
+                              response=response)
+
+
+def est_hors_ligne():
+    """
+    Mode hors ligne actif (aucun accès réseau, cache uniquement) ?
+    """
+    return _config_cache['hors_ligne']
+
+
+def est_en_cache(numero_candidat):
+    """
+    La page du candidat serait-elle servie par le cache, sans accès réseau ?
+    """
+    cache = obtenir_cache()
+    entree = cache.lire(url_candidat(numero_candidat)) if cache else None
+    return entree is not None and (_config_cache['hors_ligne']
+                                   or entree.est_fraiche(_config_cache['ttl']))
+
+
+def _reponse_depuis_cache(entree):
+    """
+    Construit une réponse requests à partir d'une page en cache, pour que
+    les appelants la traitent comme une réponse réseau
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = entree.url
+    response._content = entree.contenu
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    if entree.etag:
+        response.headers['ETag'] = entree.etag
+    if entree.last_modified:
+        response.headers['Last-Modified'] = entree.last_modified
+    response.from_cache = True
+    response.partielle = False
+    return response
+
+
+def _mesurer_reponse(response, duree):
+    """
+    Répartit la durée d'une requête : `elapsed` (requests) va de l'envoi à la
+    réception des en-têtes, connexion comprise ; le reste est la lecture du corps
+    """
+    entetes = response.elapsed.total_seconds()
+    METRIQUES.observer('attente', max(0.0, entetes - METRIQUES.etablissement()))
+    METRIQUES.observer('telechargement', max(0.0, duree - entetes))
+    METRIQUES.compter('octets:type=decompresses', len(response.content))
+    try:
+        METRIQUES.compter('octets:type=recus', response.raw.tell())
+    except (AttributeError, OSError):
+        pass
+
+
+def _lire_progressivement(response, suffisant):
+    """
+    Lit le corps bloc par bloc et s'arrête dès que suffisant(début) est vrai :
+    la connexion est alors fermée sans lire la suite. Retourne True si la
+    lecture a été interrompue ; response.content contient ce qui a été lu.
+    suffisant reçoit le tampon de lecture lui-même (bytearray, sans copie à
+    chaque bloc) : il ne doit ni le modifier ni le conserver.
+    """
+    debut = bytearray()
+    interrompue = False
+    for bloc in response.iter_content(TAILLE_BLOC_LECTURE):
+        debut += bloc
+        if suffisant(debut):
+            interrompue = True
+            break
+
+    response._content = bytes(debut)
+    response._content_consumed = True
+    response.octets_economises = 0
+    if interrompue:
+        taille = response.headers.get('Content-Length')
+        recus = response.raw.tell()
+        if taille and taille.isdigit():
+            response.octets_economises = max(0, int(taille) - recus)
+        # La connexion, au milieu d'une réponse, n'est pas rendue au pool
+        response.close()
+        METRIQUES.compter('pages:lecture=interrompue')
+        METRIQUES.compter('octets:type=economises', response.octets_economises)
+    return interrompue
+
+
+def telecharger(numero_candidat, suffisant=None, **kwargs):
+    """
+    Télécharge la page de résultat d'un candidat via la session partagée
+
+    Une page fraîche en cache est retournée sans accès réseau ; une page
+    expirée est revalidée (If-None-Match / If-Modified-Since) quand le
+    serveur a fourni un ETag ou un Last-Modified.
+    Avec `suffisant` (fonction début de page en bytearray -> bool), la page est
+    lue progressivement et le téléchargement s'arrête dès que le début reçu
+    suffit : response.partielle est alors vrai, response.content ne contient
+    que ce début et la page n'est pas mise en cache.
+    Lève requests.exceptions.RequestException en cas d'erreur HTTP/réseau
+    (AbsentDuCache en mode hors ligne si la page n'est pas en cache).
+    Un numéro inexistant lève CandidatIntrouvable : numéro déjà dans le cache
+    négatif (aucun accès réseau), code 404/410 ou page « aucun résultat »
+    (reconnue sans analyse HTML) ; il est alors ajouté au cache négatif.
+    Les durées des étapes et les octets reçus sont comptés dans METRIQUES.
+    """
+    response, entree = consulter_cache(numero_candidat)
+    if response is not None:
+        return response
+    return telecharger_reseau(numero_candidat, entree, suffisant, **kwargs)
+
+
+def consulter_cache(numero_candidat):
+    """
+    Partie de telecharger() servie sans accès réseau (une seule lecture du cache)
+
+    Retourne (response, entree) : response est la page servie depuis le cache
+    (fraîche ou mode hors ligne), None s'il faut passer par le réseau ; entree
+    est alors l'entrée expirée à revalider (None si absente), à passer à
+    telecharger_reseau(). Lève CandidatIntrouvable et AbsentDuCache comme
+    telecharger().
+    """
+    if est_introuvable(numero_candidat):
+        _signaler_introuvable(numero_candidat, 'cache_negatif')
+
+    cache = obtenir_cache()
+    entree = cache.lire(url_candidat(numero_candidat)) if cache else None
+
+    if entree and (_config_cache['hors_ligne']
+                   or entree.est_fraiche(_config_cache['ttl'])):
+        METRIQUES.compter('pages:source=cache')
+        if page_introuvable(entree.contenu, numero_candidat):
+            _signaler_introuvable(numero_candidat, 'signature')
+        return _reponse_depuis_cache(entree), None
+    if _config_cache['hors_ligne']:
+        raise AbsentDuCache("Page absente du cache (mode hors ligne): "
+                            f"{url_candidat(numero_candidat)}")
+    return None, entree
+
+
+def telecharger_reseau(numero_candidat, entree=None, suffisant=None, **kwargs):
+    """
+    Partie réseau de telecharger(), après consulter_cache()
+
+    `entree` est l'entrée de cache expirée retournée par consulter_cache(),
+    revalidée auprès du serveur quand elle a un ETag ou un Last-Modified.
+    """
+    url = url_candidat(numero_candidat)
+    cache = obtenir_cache()
+    kwargs.setdefault('timeout', TIMEOUT)
+    if entree:
+        kwargs['headers'] = {**entree.headers_revalidation(),
+                             **kwargs.get('headers', {})}
+
+    METRIQUES.debut_requete()
+    debut = time.perf_counter()
+    try:
+        response = obtenir_session().get(url, stream=suffisant is not None, **kwargs)
+        response.partielle = (suffisant is not None and response.status_code == 200
+                              and _lire_progressivement(response, suffisant))
+    except requests.exceptions.RequestException:
+        METRIQUES.compter('erreurs:type=reseau')
+        raise
+    _mesurer_reponse(response, time.perf_counter() - debut)
+
+    if response.status_code == 304 and entree:
+        METRIQUES.compter('pages:source=revalidee')
+        cache.rafraichir(url)
+        if page_introuvable(entree.contenu, numero_candidat):
+            _signaler_introuvable(numero_candidat, 'signature', response)
+        return _reponse_depuis_cache(entree)
+
+    if response.status_code >= 400:
+        # Rendre la connexion au pool (corps non lu en lecture progressive)
+        response.close()
+    if response.status_code in CODES_INTROUVABLE:
+        _signaler_introuvable(numero_candidat, 'statut', response)
+    if response.status_code >= 400:
+        METRIQUES.compter(f'erreurs:type=http_{response.status_code}')
+    response.raise_for_status()
+    METRIQUES.compter('pages:source=reseau')
+    response.from_cache = False
+    if _archive is not None:
+        _archive.ajouter(URL_BASE, numero_candidat, response.content, response.partielle)
+    if page_introuvable(response.content, numero_candidat):
+        # Le cache négatif suffit : la page elle-même n'est pas gardée
+        _signaler_introuvable(numero_candidat, 'signature', response)
+    if cache and not response.partielle:
+        cache.ecrire(url, response.content,
+                     response.headers.get('ETag'),
+                     response.headers.get('Last-Modified'))
+    return response
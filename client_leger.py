@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client HTTP léger, limité à la bibliothèque standard
+Utilisé par bac_simple en ligne de commande : ni requests ni urllib3 ne
+sont importés, et une page en cache est servie sans même importer urllib.
+Même URL, mêmes en-têtes et même cache de pages que client_http (qui
+reprend les constantes définies ici).
+"""
+
+import gzip
+import os
+
+from cache import CachePages, CHEMIN_CACHE, TTL_PAR_DEFAUT
+from introuvables import (CacheIntrouvables, CODES_INTROUVABLE, chemin_session,
+                          page_introuvable)
+from metriques import METRIQUES
+
+
+# URL de la session BAC 2024 sur mauribac.com ; la variable d'environnement
+# BAC_URL_BASE permet de viser un autre serveur (ex. benchmarks/serveur_factice.py)
+URL_BASE = os.environ.get('BAC_URL_BASE',
+                          'https://www.mauribac.com/fr/bac-2024-uKolupoGL/numero/')
+
+# Timeout (en secondes) appliqué à toutes les requêtes
+TIMEOUT = 10
+
+# Headers pour simuler un navigateur réel
+HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                   'AppleWebKit/537.36 (KHTML, like Gecko) '
+                   'Chrome/91.0.4472.124 Safari/537.36'),
+    'Accept': ('text/html,application/xhtml+xml,application/xml;q=0.9,'
+               'image/webp,*/*;q=0.8'),
+    'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
+    # Seuls les codages décodés ici (gzip, bibliothèque standard) ; client_http
+    # annonce ceux que urllib3 sait décoder (brotli / zstd s'ils sont installés)
+    'Accept-Encoding': 'gzip',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class CandidatIntrouvable(LookupError):
+    """Numéro inexistant : code 404/410, page « aucun résultat » ou cache négatif"""
+
+
+def url_candidat(numero_candidat):
+    """
+    Construit l'URL de la page de résultat d'un candidat
+    """
+    return f'{URL_BASE}{numero_candidat}/'
+
+
+def telecharger(numero_candidat, ttl=TTL_PAR_DEFAUT, chemin_cache=CHEMIN_CACHE):
+    """
+    Retourne le contenu (bytes) de la page d'un candidat
+
+    Page fraîche en cache : aucun accès réseau. Sinon, téléchargement avec
+    urllib (revalidation If-None-Match / If-Modified-Since si possible) et
+    mise en cache. Les erreurs réseau et HTTP sont levées en OSError
+    (urllib.error.URLError / HTTPError, TimeoutError). Un numéro inexistant
+    lève CandidatIntrouvable et est ajouté au cache négatif de la session
+    (même fichier que client_http) ; les fois suivantes, sans accès réseau.
+    """
+    introuvables = CacheIntrouvables(chemin_session(URL_BASE, os.path.dirname(chemin_cache)))
+
+    def introuvable(source):
+        if source != 'cache_negatif':
+            introuvables.ajouter(numero_candidat)
+            introuvables.enregistrer()
+        METRIQUES.compter(f'introuvables:source={source}')
+        return CandidatIntrouvable(f"Numéro {numero_candidat} inexistant ({source})")
+
+    if numero_candidat in introuvables:
+        raise introuvable('cache_negatif')
+
+    url = url_candidat(numero_candidat)
+    cache = CachePages(chemin_cache)
+    entree = cache.lire(url)
+    if entree and entree.est_fraiche(ttl):
+        METRIQUES.compter('pages:source=cache')
+        if page_introuvable(entree.contenu, numero_candidat):
+            raise introuvable('signature')
+        return entree.contenu
+
+    import urllib.error
+    import urllib.request
+
+    headers = dict(HEADERS)
+    if entree:
+        headers.update(entree.headers_revalidation())
+
+    try:
+        with METRIQUES.mesurer('telechargement'):
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers),
+                                        timeout=TIMEOUT) as reponse:
+                contenu = reponse.read()
+                entetes = reponse.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and entree:
+            METRIQUES.compter('pages:source=revalidee')
+            cache.rafraichir(url)
+            if page_introuvable(entree.contenu, numero_candidat):
+                raise introuvable('signature')
+            return entree.contenu
+        if e.code in CODES_INTROUVABLE:
+            raise introuvable('statut')
+        METRIQUES.compter(f'erreurs:type=http_{e.code}')
+        raise
+    except OSError:
+        METRIQUES.compter('erreurs:type=reseau')
+        raise
+
+    METRIQUES.compter('pages:source=reseau')
+    METRIQUES.compter('octets:type=recus', len(contenu))
+    if entetes.get('Content-Encoding') == 'gzip':
+        contenu = gzip.decompress(contenu)
+    METRIQUES.compter('octets:type=decompresses', len(contenu))
+    if page_introuvable(contenu, numero_candidat):
+        raise introuvable('signature')
+    cache.ecrire(url, contenu, entetes.get('ETag'), entetes.get('Last-Modified'))
+    return contenu
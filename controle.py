@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contrôle adaptatif du trafic vers le site des résultats
+
+- concurrence AIMD : le nombre de requêtes simultanées augmente tant que la
+  latence reste saine et est divisé en cas de surcharge (timeout, 429, 5xx) ;
+- reprises avec attente exponentielle aléatoire (Retry-After respecté) ;
+- disjoncteur : après une série d'échecs de surcharge, plus aucune requête
+  n'est envoyée pendant un moment, puis une requête test décide de la reprise ;
+- file de reprises : un candidat en échec est reprogrammé plus tard au lieu
+  d'être marqué en erreur.
+"""
+
+import heapq
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from limiteur import LimiteurDebit
+
+
+# Nombre de tentatives par candidat avant de le marquer en erreur
+TENTATIVES_PAR_DEFAUT = 5
+
+# Attente avant reprise : aléatoire dans [0, min(MAX, BASE * 2^(tentative-1))]
+ATTENTE_BASE = 0.5
+ATTENTE_MAX = 30.0
+
+# Latence « saine » : au plus ce facteur fois la meilleure latence observée
+FACTEUR_LATENCE_SAINE = 2.0
+
+# Disjoncteur : échecs de surcharge consécutifs avant ouverture, et durée
+# d'ouverture initiale (doublée à chaque requête test ratée)
+SEUIL_DISJONCTEUR = 8
+OUVERTURE_DISJONCTEUR = 15.0
+OUVERTURE_DISJONCTEUR_MAX = 120.0
+
+
+def code_http(erreur):
+    """Code HTTP d'une erreur requests, ou None (timeout, connexion...)"""
+    response = getattr(erreur, 'response', None)
+    return response.status_code if response is not None else None
+
+
+def est_surcharge(erreur):
+    """
+    L'erreur indique-t-elle un serveur surchargé ou indisponible ?
+    (timeout, connexion refusée/coupée, 429, 5xx)
+    """
+    if isinstance(erreur, (requests.exceptions.Timeout,
+                           requests.exceptions.ConnectionError)):
+        return True
+    code = code_http(erreur)
+    return code is not None and (code == 429 or code >= 500)
+
+
+def attente_demandee(erreur):
+    """
+    Délai demandé par le serveur (en-tête Retry-After), en secondes, ou None
+    """
+    response = getattr(erreur, 'response', None)
+    valeur = response.headers.get('Retry-After') if response is not None else None
+    if not valeur:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ConcurrenceAIMD:
+    """
+    Limite de requêtes simultanées ajustée en AIMD
+
+    Chaque succès à latence saine ajoute 1/limite (soit +1 par « fenêtre »
+    de requêtes) ; une surcharge multiplie la limite par `reduction`, au plus
+    une fois par intervalle de latence pour ne pas réagir plusieurs fois à
+    la même rafale d'erreurs.
+    """
+
+    def __init__(self, maximum, minimum=1, initiale=None, reduction=0.5):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limite = float(initiale or max(self.minimum, self.maximum // 2))
+        self.reduction = reduction
+        self.en_cours = 0
+        self.meilleure_latence = None
+        self.latence_moyenne = None
+        self.reductions = 0
+        self.limite_min_atteinte = self.limite
+        self._derniere_reduction = 0.0
+        self._condition = threading.Condition()
+
+    def acquerir(self):
+        with self._condition:
+            while self.en_cours >= int(self.limite):
+                self._condition.wait()
+            self.en_cours += 1
+
+    def liberer(self, latence=None, surcharge=False):
+        """
+        Libère une place ; `latence` pour un succès, `surcharge` pour un échec
+        """
+        with self._condition:
+            self.en_cours -= 1
+            maintenant = time.monotonic()
+            if surcharge:
+                delai = self.latence_moyenne or 1.0
+                if maintenant - self._derniere_reduction >= delai:
+                    self.limite = max(self.minimum, self.limite * self.reduction)
+                    self.limite_min_atteinte = min(self.limite_min_atteinte, self.limite)
+                    self._derniere_reduction = maintenant
+                    self.reductions += 1
+            elif latence is not None:
+                if self.meilleure_latence is None or latence < self.meilleure_latence:
+                    self.meilleure_latence = latence
+                self.latence_moyenne = (latence if self.latence_moyenne is None
+                                        else 0.8 * self.latence_moyenne + 0.2 * latence)
+                if self.latence_moyenne <= FACTEUR_LATENCE_SAINE * self.meilleure_latence:
+                    self.limite = min(self.maximum, self.limite + 1 / self.limite)
+            self._condition.notify_all()
+
+
+class Disjoncteur:
+    """
+    Disjoncteur fermé / ouvert / semi-ouvert
+
+    Ouvert après `seuil` échecs de surcharge consécutifs : les appelants
+    attendent la fin de l'ouverture, puis une seule requête test passe.
+    Succès : fermeture ; échec : nouvelle ouverture, deux fois plus longue.
+    """
+
+    FERME, OUVERT, SEMI_OUVERT = 'fermé', 'ouvert', 'semi-ouvert'
+
+    def __init__(self, seuil=SEUIL_DISJONCTEUR, duree=OUVERTURE_DISJONCTEUR,
+                 duree_max=OUVERTURE_DISJONCTEUR_MAX):
+        self.seuil = seuil
+        self.duree_initiale = duree
+        self.duree = duree
+        self.duree_max = duree_max
+        self.etat = self.FERME
+        self.echecs_consecutifs = 0
+        self.ouvertures = 0
+        self._reouverture = 0.0
+        self._test_en_cours = False
+        self._condition = threading.Condition()
+
+    def attendre(self):
+        """
+        Bloque tant que le disjoncteur est ouvert (ou qu'une requête test est en cours)
+        Retourne True si l'appelant est chargé de la requête test
+        """
+        with self._condition:
+            while True:
+                if self.etat == self.FERME:
+                    return False
+                maintenant = time.monotonic()
+                if self.etat == self.OUVERT and maintenant >= self._reouverture:
+                    self.etat = self.SEMI_OUVERT
+                if self.etat == self.SEMI_OUVERT and not self._test_en_cours:
+                    self._test_en_cours = True
+                    return True
+                delai = self._reouverture - maintenant if self.etat == self.OUVERT else None
+                self._condition.wait(delai)
+
+    def succes(self):
+        with self._condition:
+            if self.etat != self.FERME:
+                print("🟢 Disjoncteur refermé : le site répond de nouveau")
+            self.etat = self.FERME
+            self.duree = self.duree_initiale
+            self.echecs_consecutifs = 0
+            self._test_en_cours = False
+            self._condition.notify_all()
+
+    def echec(self, surcharge):
+        with self._condition:
+            if not surcharge:
+                # Erreur propre au candidat : le site répond
+                self.echecs_consecutifs = 0
+                if self._test_en_cours:
+                    self.etat = self.FERME
+                    self._test_en_cours = False
+                    self._condition.notify_all()
+                return
+            self.echecs_consecutifs += 1
+            if self.etat == self.SEMI_OUVERT:
+                self.duree = min(self.duree_max, self.duree * 2)
+                self._ouvrir()
+            elif self.etat == self.FERME and self.echecs_consecutifs >= self.seuil:
+                self._ouvrir()
+
+    def abandonner(self):
+        """
+        La requête test n'a pas abouti (erreur locale, interruption) : le
+        disjoncteur reste semi-ouvert et un autre appelant refait le test
+        """
+        with self._condition:
+            if self.etat == self.SEMI_OUVERT and self._test_en_cours:
+                self._test_en_cours = False
+                self._condition.notify_all()
+
+    def _ouvrir(self):
+        self.etat = self.OUVERT
+        self.ouvertures += 1
+        self._test_en_cours = False
+        self._reouverture = time.monotonic() + self.duree
+        print(f"🔴 Disjoncteur ouvert : {self.echecs_consecutifs} échec(s) consécutif(s), "
+              f"pause de {self.duree:.0f} s")
+        self._condition.notify_all()
+
+
+class ControleTrafic:
+    """
+    Réunit plafond de débit, concurrence AIMD, disjoncteur et politique de
+    reprise pour les moteurs de traitement en lot
+    """
+
+    def __init__(self, workers, requetes_par_seconde=None,
+                 tentatives=TENTATIVES_PAR_DEFAUT, adaptatif=True):
+        self.limiteur = LimiteurDebit(requetes_par_seconde)
+        self.concurrence = ConcurrenceAIMD(workers) if adaptatif else None
+        self.disjoncteur = Disjoncteur()
+        self.tentatives = max(1, tentatives)
+        self.reprises = 0
+        self.abandons = 0
+        self._verrou = threading.Lock()
+
+    def executer(self, fonction, *args, **kwargs):
+        """
+        Appelle `fonction` (une requête) en respectant disjoncteur, concurrence
+        et débit ; les erreurs requests sont comptabilisées puis propagées
+        """
+        test = self.disjoncteur.attendre()
+        try:
+            if self.concurrence:
+                self.concurrence.acquerir()
+            self.limiteur.attendre()
+        except BaseException:
+            if test:
+                self.disjoncteur.abandonner()
+            raise
+        debut = time.monotonic()
+        try:
+            resultat = fonction(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            surcharge = est_surcharge(e)
+            if self.concurrence:
+                self.concurrence.liberer(surcharge=surcharge)
+            self.disjoncteur.echec(surcharge)
+            raise
+        except BaseException:
+            if self.concurrence:
+                self.concurrence.liberer()
+            if test:
+                self.disjoncteur.abandonner()
+            raise
+        if self.concurrence:
+            self.concurrence.liberer(latence=time.monotonic() - debut)
+        self.disjoncteur.succes()
+        return resultat
+
+    def reessayable(self, erreur, tentative):
+        """
+        Faut-il reprogrammer le candidat après cette erreur (tentative n°`tentative`) ?
+        """
+        if est_surcharge(erreur) and tentative < self.tentatives:
+            with self._verrou:
+                self.reprises += 1
+            return True
+        with self._verrou:
+            self.abandons += 1
+        return False
+
+    @staticmethod
+    def delai_reprise(tentative, erreur=None):
+        """
+        Attente avant la tentative suivante : exponentielle avec aléa complet,
+        au moins le Retry-After demandé par le serveur
+        """
+        delai = random.uniform(0, min(ATTENTE_MAX, ATTENTE_BASE * 2 ** (tentative - 1)))
+        demande = attente_demandee(erreur) if erreur is not None else None
+        if demande is not None:
+            delai = max(delai, min(demande, ATTENTE_MAX))
+        return delai
+
+    def afficher_bilan(self):
+        print("\n" + "=" * 60)
+        print("🚦 CONTRÔLE DU TRAFIC")
+        print(f"  • Reprises programmées: {self.reprises}, abandons: {self.abandons}")
+        if self.concurrence:
+            c = self.concurrence
+            latence = f"{c.latence_moyenne * 1000:.0f} ms" if c.latence_moyenne else "-"
+            print(f"  • Concurrence: {c.limite:.1f} en fin de traitement "
+                  f"(min {c.limite_min_atteinte:.1f}, max {c.maximum}), "
+                  f"{c.reductions} réduction(s), latence moyenne {latence}")
+        print(f"  • Disjoncteur: {self.disjoncteur.ouvertures} ouverture(s)")
+
+
+class FileReprises:
+    """
+    Candidats à relancer plus tard : chaque élément est rendu à `soumettre`
+    une fois son délai écoulé, par un thread dédié
+    """
+
+    def __init__(self, soumettre):
+        self._soumettre = soumettre
+        self._tas = []
+        self._compteur = 0
+        self._arret = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._boucle, daemon=True)
+        self._thread.start()
+
+    def programmer(self, delai, element):
+        with self._condition:
+            self._compteur += 1
+            heapq.heappush(self._tas, (time.monotonic() + delai, self._compteur, element))
+            self._condition.notify()
+
+    def __len__(self):
+        return len(self._tas)
+
+    def _boucle(self):
+        while True:
+            with self._condition:
+                while not self._arret and (
+                        not self._tas or self._tas[0][0] > time.monotonic()):
+                    delai = self._tas[0][0] - time.monotonic() if self._tas else None
+                    self._condition.wait(delai)
+                if self._arret:
+                    return
+                _, _, element = heapq.heappop(self._tas)
+            self._soumettre(element)
+
+    def arreter(self):
+        with self._condition:
+            self._arret = True
+            self._condition.notify()
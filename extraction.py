@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extraction des informations BAC à partir du texte d'une page de résultat
+Moteur unique utilisé par bac_simple, bac_avance et recherche_batch :
+le texte est normalisé une fois puis parcouru en une seule passe avec des
+motifs précompilés (moyenne, décision, série, mention, établissement).
+Tous les motifs sont ancrés et de longueur bornée, et le parcours s'arrête
+au-delà d'un budget de temps par page : le coût reste linéaire en la taille
+du texte, même sur une page pathologique.
+"""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from metriques import METRIQUES
+
+
+# Codes de série
+SERIE_SN = 'SN'
+SERIE_SM = 'SM'
+SERIE_LETTRES = 'LETTRES'
+
+# Libellés utilisés dans les exports (format de recherche_batch)
+LIBELLES_SERIE = {
+    SERIE_SN: 'BAC - Sciences naturelles (SN)',
+    SERIE_SM: 'BAC - Sciences mathématiques (SM)',
+    SERIE_LETTRES: 'BAC - Lettres',
+}
+
+# Codes de statut (voir ResultatBac.code_statut)
+STATUT_ADMIS = 'admis'                    # décision explicite
+STATUT_REFUSE = 'refuse'                  # décision explicite
+STATUT_ADMIS_MOYENNE = 'admis_moyenne'    # moyenne >= 10
+STATUT_RATTRAPAGE = 'rattrapage'          # 8 <= moyenne < 10
+STATUT_ECHEC_MOYENNE = 'echec_moyenne'    # moyenne < 8
+STATUT_A_VERIFIER = 'a_verifier'          # candidat présent, statut inconnu
+
+# (statut, admission) au format de recherche_batch
+STATUTS_EXPORT = {
+    STATUT_ADMIS: ('Admis', 'Admis'),
+    STATUT_REFUSE: ('Échec', 'Refusé'),
+    STATUT_ADMIS_MOYENNE: ('Admis (moyenne ≥10)', 'Admis'),
+    STATUT_RATTRAPAGE: ('Session de rattrapage (8 ≤ moyenne < 10)',
+                        'Session de rattrapage'),
+    STATUT_ECHEC_MOYENNE: ('Échec (moyenne <8)', 'Échec'),
+    STATUT_A_VERIFIER: ('Trouvé (statut à vérifier)', 'À vérifier'),
+    None: ('Non déterminé', 'Non trouvé'),
+}
+
+# Mots-clés recherchés en une seule passe sur le texte mis en minuscules.
+# Chaque alternative commence par un littéral, ce qui permet au moteur de
+# sauter rapidement les positions sans intérêt.
+_MOTS_CLES = re.compile(
+    r'المعدل|moyenn'
+    r'|ناجح|réussi|admis'
+    r'|راسب|échec|refusé'
+    r'|العلوم\s+الطبيعية|sciences\s+naturelles|sn'
+    r'|الرياضيات|sciences\s+mathématiques|sm'
+    r'|الآداب|lettres'
+    r'|bac|decision'
+    r'|mention|établissement|académie')
+
+# Catégorie de chaque mot-clé (les expressions à espaces sont traitées
+# par leur premier mot, voir _categorie)
+_CATEGORIES = {
+    'المعدل': 'moy_ar', 'moyenn': 'moy_fr',
+    'ناجح': 'admis', 'réussi': 'admis', 'admis': 'admis',
+    'راسب': 'refus', 'échec': 'refus', 'refusé': 'refus',
+    'العلوم': 'sn', 'sn': 'sn',
+    'الرياضيات': 'sm', 'sm': 'sm',
+    'الآداب': 'lettres', 'lettres': 'lettres',
+    'bac': 'bac', 'decision': 'bac',
+    'mention': 'mention', 'établissement': 'etablissement',
+    'académie': 'academie',
+}
+
+# Valeurs lues juste après un mot-clé (motifs ancrés, appliqués avec .match).
+# Séparateurs et valeurs sont bornés : une longue suite d'espaces ou un
+# texte sans '|' ne coûte pas plus de quelques dizaines de caractères.
+_VALEURS = {
+    'moy_ar': re.compile(r'\s{0,20}(\d{1,3}\.?\d{0,4})'),
+    'moy_fr': re.compile(r'e?\s{0,20}[:\-]?\s{0,20}(\d{1,3}[.,]\d{1,4})'),
+    'mention': re.compile(r'\s{0,20}[:\-]?\s{0,20}(\w{1,40})'),
+    'etablissement': re.compile(r'\s{0,20}[:\-]?\s{0,20}([^|\n]{1,150})'),
+    'academie': re.compile(r'\s{0,20}[:\-]?\s{0,20}([^|\n]{1,150})'),
+}
+
+# Taille maximale du texte parcouru (le bloc de résultat fait ~1 Ko)
+TAILLE_MAX_TEXTE = 256 * 1024
+
+# Budget de temps par page (secondes), vérifié tous les VERIFICATION_BUDGET
+# mots-clés : au-delà, l'extraction s'arrête avec ce qui a été trouvé
+BUDGET_PAGE = 0.2
+VERIFICATION_BUDGET = 256
+
+
+def _categorie(mot):
+    if mot.startswith('sciences'):
+        return 'sn' if mot.endswith('naturelles') else 'sm'
+    return _CATEGORIES[mot.split()[0]]
+
+
+@dataclass
+class ResultatBac:
+    """
+    Informations extraites d'une page de résultat
+    """
+    numero: str
+    trouve: bool = False                   # numéro présent dans la page
+    moyenne: Optional[float] = None
+    moyenne_texte: Optional[str] = None    # ex. '11.13' (virgule normalisée)
+    decision: Optional[str] = None         # STATUT_ADMIS / STATUT_REFUSE si explicite
+    serie: Optional[str] = None            # SERIE_SN / SERIE_SM / SERIE_LETTRES
+    mention: Optional[str] = None
+    etablissement: Optional[str] = None
+    academie: Optional[str] = None
+    page_bac: bool = False                 # mots-clés 'bac' / 'decision' présents
+
+    @property
+    def code_statut(self):
+        """
+        Statut déduit : décision explicite, sinon moyenne, sinon indices
+        """
+        if self.decision:
+            return self.decision
+        if self.moyenne is not None and self.trouve:
+            if self.moyenne >= 10.0:
+                return STATUT_ADMIS_MOYENNE
+            if self.moyenne >= 8.0:
+                return STATUT_RATTRAPAGE
+            return STATUT_ECHEC_MOYENNE
+        if self.trouve and self.page_bac:
+            return STATUT_A_VERIFIER
+        return None
+
+    def vers_dict(self):
+        """
+        Informations au format de recherche_batch (statut, admission, série, moyenne)
+        """
+        statut, admission = STATUTS_EXPORT[self.code_statut]
+        return {
+            'statut': statut,
+            'admission': admission,
+            'serie': LIBELLES_SERIE.get(self.serie, 'Non spécifiée'),
+            'moyenne': self.moyenne_texte or 'Non disponible',
+        }
+
+
+def normaliser_texte(text):
+    """
+    Forme normalisée du texte utilisée pour la recherche (minuscules)
+    """
+    return text.lower()
+
+
+@METRIQUES.chronometrer('extraction')
+def extraire_resultat(text, numero_candidat, budget=BUDGET_PAGE):
+    """
+    Extrait un ResultatBac du texte d'une page en une seule passe
+    (au plus TAILLE_MAX_TEXTE caractères et `budget` secondes)
+    """
+    return extraire_sans_mesure(text, numero_candidat, budget)
+
+
+def extraire_sans_mesure(text, numero_candidat, budget=BUDGET_PAGE):
+    """
+    extraire_resultat sans observation dans METRIQUES (analyses répétées
+    d'un début de page pendant la lecture partielle)
+    """
+    if len(text) > TAILLE_MAX_TEXTE:
+        METRIQUES.compter('pages:analyse=tronquee')
+        text = text[:TAILLE_MAX_TEXTE]
+    limite = time.perf_counter() + budget
+    texte_min = normaliser_texte(text)
+    # Les valeurs libres sont relues dans le texte d'origine pour garder
+    # la casse, sauf si la mise en minuscules a décalé les positions
+    source = text if len(texte_min) == len(text) else texte_min
+
+    resultat = ResultatBac(numero=numero_candidat,
+                           trouve=numero_candidat in text)
+    valeurs = {}
+    admis = refus = False
+    series = set()
+
+    for i, match in enumerate(_MOTS_CLES.finditer(texte_min), 1):
+        if i % VERIFICATION_BUDGET == 0 and time.perf_counter() > limite:
+            METRIQUES.compter('pages:analyse=budget_depasse')
+            break
+        categorie = _categorie(match.group())
+        if categorie == 'admis':
+            admis = True
+        elif categorie == 'refus':
+            refus = True
+        elif categorie in ('sn', 'sm', 'lettres'):
+            series.add(categorie)
+        elif categorie == 'bac':
+            resultat.page_bac = True
+        elif categorie not in valeurs:
+            valeur = _VALEURS[categorie].match(source, match.end())
+            if valeur:
+                valeurs[categorie] = valeur.group(1)
+
+    # La moyenne en arabe (المعدل) est prioritaire
+    moyenne = valeurs.get('moy_ar') or valeurs.get('moy_fr')
+    if moyenne:
+        resultat.moyenne_texte = moyenne.replace(',', '.')
+        resultat.moyenne = float(resultat.moyenne_texte)
+
+    if admis:
+        resultat.decision = STATUT_ADMIS
+    elif refus:
+        resultat.decision = STATUT_REFUSE
+
+    if 'sn' in series:
+        resultat.serie = SERIE_SN
+    elif 'sm' in series:
+        resultat.serie = SERIE_SM
+    elif 'lettres' in series:
+        resultat.serie = SERIE_LETTRES
+
+    resultat.mention = valeurs.get('mention')
+    if 'etablissement' in valeurs:
+        resultat.etablissement = valeurs['etablissement'].strip()
+    if 'academie' in valeurs:
+        resultat.academie = valeurs['academie'].strip()
+
+    return resultat
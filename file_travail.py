@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File de travail partagée (SQLite) pour répartir une recherche en lot
+entre plusieurs travailleurs (processus ou machines)
+
+Le coordinateur remplit la file depuis un fichier de matricules ; chaque
+travailleur prend des candidats sous bail (durée limitée, prolongée tant
+qu'il est vivant). Le bail d'un travailleur arrêté expire et le candidat
+est repris par un autre. L'enregistrement d'un résultat est idempotent :
+le premier résultat définitif reçu pour un matricule est conservé.
+
+Plusieurs machines : la base doit être sur un système de fichiers partagé
+dont les verrous fonctionnent (SQLite déconseille certains montages NFS).
+
+Usage (voir recherche_batch.py) :
+    python recherche_batch.py etu.txt --file-travail travail.sqlite            # coordinateur
+    python recherche_batch.py --file-travail travail.sqlite --travailleur      # sur chaque nœud
+    python recherche_batch.py etu.txt --file-travail travail.sqlite --travailleurs-locaux 4
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from metriques import METRIQUES
+from sortie import EcrivainResultats, lire_resultats_jsonl, est_termine
+from recherche_batch import (lancer_recherche, afficher_resume, sauvegarder_resultats,
+                             ouvrir_base, demarrer_metriques,
+                             DUREE_BAIL_PAR_DEFAUT, TENTATIVES_FILE_PAR_DEFAUT)
+
+# Secondes entre deux affichages de l'avancement par le coordinateur
+INTERVALLE_SUIVI = 5.0
+
+# États d'un candidat ; un bail est prolongé tous les tiers de sa durée
+ATTENTE, BAIL, FAIT = 'attente', 'bail', 'fait'
+
+
+class FileTravail:
+    """
+    File SQLite partagée entre processus : une ligne par candidat, dans
+    l'ordre du fichier de matricules. Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, chemin, duree_bail=DUREE_BAIL_PAR_DEFAUT,
+                 tentatives=TENTATIVES_FILE_PAR_DEFAUT):
+        self.chemin = chemin
+        self.duree_bail = duree_bail
+        self.tentatives = max(1, tentatives)
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+        # Transactions explicites (BEGIN IMMEDIATE) : isolation_level=None
+        self.connexion = sqlite3.connect(chemin, timeout=60, isolation_level=None,
+                                         check_same_thread=False)
+        self._verrou = threading.Lock()
+        self.connexion.execute('PRAGMA journal_mode=WAL')
+        self.connexion.execute(
+            'CREATE TABLE IF NOT EXISTS taches ('
+            ' position INTEGER PRIMARY KEY,'
+            ' nom TEXT NOT NULL,'
+            ' matricule TEXT NOT NULL UNIQUE,'
+            " etat TEXT NOT NULL DEFAULT 'attente',"
+            ' travailleur TEXT,'
+            ' fin_bail REAL,'
+            ' tentatives INTEGER NOT NULL DEFAULT 0,'
+            ' reprises INTEGER NOT NULL DEFAULT 0,'
+            ' resultat TEXT)')
+        self.connexion.execute('CREATE INDEX IF NOT EXISTS idx_taches_etat '
+                               'ON taches (etat, position)')
+
+    def _transaction(self, fonction):
+        """
+        Exécute fonction(curseur) dans une transaction d'écriture exclusive
+        """
+        with self._verrou:
+            curseur = self.connexion.cursor()
+            curseur.execute('BEGIN IMMEDIATE')
+            try:
+                valeur = fonction(curseur)
+            except BaseException:
+                curseur.execute('ROLLBACK')
+                raise
+            curseur.execute('COMMIT')
+            return valeur
+
+    # --- Coordinateur -----------------------------------------------------
+
+    def remplir(self, matricules):
+        """
+        Ajoute des (nom, matricule) à la file ; un matricule déjà présent
+        est ignoré (relancer le coordinateur ne duplique rien).
+        Retourne le nombre de candidats ajoutés.
+        """
+        def inserer(curseur):
+            avant = curseur.execute('SELECT COUNT(*) FROM taches').fetchone()[0]
+            curseur.executemany('INSERT OR IGNORE INTO taches (nom, matricule) VALUES (?, ?)',
+                                matricules)
+            return curseur.execute('SELECT COUNT(*) FROM taches').fetchone()[0] - avant
+        return self._transaction(inserer)
+
+    def etat(self):
+        """
+        Compteurs de la file : total, attente, bail (dont expirés), fait, reprises
+        """
+        with self._verrou:
+            lignes = self.connexion.execute(
+                'SELECT etat, COUNT(*), SUM(fin_bail < ?), SUM(reprises) '
+                'FROM taches GROUP BY etat', (time.time(),)).fetchall()
+        compteurs = {ATTENTE: 0, BAIL: 0, FAIT: 0, 'expires': 0, 'reprises': 0}
+        for etat, nombre, expires, reprises in lignes:
+            compteurs[etat] = nombre
+            if etat == BAIL:
+                compteurs['expires'] = expires or 0
+            compteurs['reprises'] += reprises or 0
+        compteurs['total'] = compteurs[ATTENTE] + compteurs[BAIL] + compteurs[FAIT]
+        return compteurs
+
+    def resultats(self):
+        """
+        Résultats enregistrés, dans l'ordre du fichier de matricules
+        Lus au fil de l'eau par une connexion dédiée (mémoire constante).
+        """
+        lecture = sqlite3.connect(self.chemin, timeout=60)
+        try:
+            for (resultat,) in lecture.execute(
+                    'SELECT resultat FROM taches WHERE etat = ? ORDER BY position', (FAIT,)):
+                yield json.loads(resultat)
+        finally:
+            lecture.close()
+
+    # --- Travailleur ------------------------------------------------------
+
+    def prendre(self, travailleur):
+        """
+        Prend sous bail le premier candidat disponible (en attente, ou dont
+        le bail a expiré) ; retourne (nom, matricule) ou None
+        """
+        def prendre_un(curseur):
+            maintenant = time.time()
+            ligne = curseur.execute(
+                'SELECT position, nom, matricule, etat FROM taches '
+                'WHERE etat = ? OR (etat = ? AND fin_bail < ?) '
+                'ORDER BY position LIMIT 1', (ATTENTE, BAIL, maintenant)).fetchone()
+            if ligne is None:
+                return None
+            position, nom, matricule, etat = ligne
+            curseur.execute(
+                'UPDATE taches SET etat = ?, travailleur = ?, fin_bail = ?,'
+                ' tentatives = tentatives + 1, reprises = reprises + ? '
+                'WHERE position = ?',
+                (BAIL, travailleur, maintenant + self.duree_bail,
+                 int(etat == BAIL), position))
+            return nom, matricule
+        return self._transaction(prendre_un)
+
+    def liberer(self, travailleur):
+        """
+        Remet en attente les candidats sous bail du travailleur (arrêt propre)
+        """
+        self._transaction(lambda curseur: curseur.execute(
+            'UPDATE taches SET etat = ?, travailleur = NULL, fin_bail = NULL '
+            'WHERE etat = ? AND travailleur = ?', (ATTENTE, BAIL, travailleur)))
+
+    def prolonger(self, travailleur):
+        """
+        Prolonge les baux en cours du travailleur (signe de vie)
+        """
+        self._transaction(lambda curseur: curseur.execute(
+            'UPDATE taches SET fin_bail = ? WHERE etat = ? AND travailleur = ?',
+            (time.time() + self.duree_bail, BAIL, travailleur)))
+
+    def terminer(self, travailleur, resultat):
+        """
+        Enregistre le résultat d'un candidat (idempotent)
+
+        Un résultat définitif, ou une erreur après `tentatives` essais, est
+        gardé si le candidat n'est pas déjà fait ; une erreur plus tôt remet
+        le candidat en attente (un autre travailleur, une autre IP, pourra
+        réussir) si le bail est toujours détenu. Retourne True si le résultat
+        a été enregistré.
+        """
+        def enregistrer(curseur):
+            if est_termine(resultat):
+                return curseur.execute(
+                    'UPDATE taches SET etat = ?, travailleur = ?, resultat = ? '
+                    'WHERE matricule = ? AND etat != ?',
+                    (FAIT, travailleur, json.dumps(resultat, ensure_ascii=False),
+                     resultat['matricule'], FAIT)).rowcount > 0
+            tentatives = curseur.execute(
+                'SELECT tentatives FROM taches WHERE matricule = ? AND etat = ? '
+                'AND travailleur = ?', (resultat['matricule'], BAIL, travailleur)).fetchone()
+            if tentatives is None:
+                return False
+            if tentatives[0] >= self.tentatives:
+                curseur.execute(
+                    'UPDATE taches SET etat = ?, resultat = ? WHERE matricule = ?',
+                    (FAIT, json.dumps(resultat, ensure_ascii=False), resultat['matricule']))
+                return True
+            curseur.execute(
+                'UPDATE taches SET etat = ?, travailleur = NULL, fin_bail = NULL '
+                'WHERE matricule = ?', (ATTENTE, resultat['matricule']))
+            return False
+        return self._transaction(enregistrer)
+
+    def fermer(self):
+        with self._verrou:
+            self.connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def identifiant_travailleur():
+    """
+    Nom du travailleur dans la file : machine et PID
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def ouvrir_file(args):
+    """
+    File de travail choisie en ligne de commande
+    """
+    return FileTravail(args.file_travail, args.bail, args.tentatives_file)
+
+
+def ligne_avancement(etat):
+    """
+    Avancement de la file sur une ligne
+    """
+    total = etat['total'] or 1
+    return (f"📋 File: {etat[FAIT]}/{etat['total']} fait(s) ({etat[FAIT] / total:.0%}), "
+            f"{etat[BAIL]} sous bail (dont {etat['expires']} expiré(s)), "
+            f"{etat[ATTENTE]} en attente, {etat['reprises']} reprise(s) de bail")
+
+
+def travailler(args):
+    """
+    Mode travailleur : prend les candidats de la file sous bail et les
+    recherche avec le moteur de recherche_batch (débit, reprises, AIMD),
+    jusqu'à ce que la file soit vide. Les baux sont prolongés par un thread
+    tant que le processus est vivant.
+    """
+    file = ouvrir_file(args)
+    nom = identifiant_travailleur()
+    arret = threading.Event()
+    bilan = {'enregistres': 0, 'ignores': 0}
+
+    def signes_de_vie():
+        while not arret.wait(file.duree_bail / 3):
+            file.prolonger(nom)
+
+    def taches():
+        attente_signalee = False
+        while not arret.is_set():
+            tache = file.prendre(nom)
+            if tache:
+                attente_signalee = False
+                yield tache
+                continue
+            etat = file.etat()
+            if etat[ATTENTE] + etat[BAIL] == 0:
+                return
+            # Candidats sous bail ailleurs : attendre leur fin ou l'expiration du bail
+            if not attente_signalee:
+                print(f"\n⏳ {etat[BAIL]} candidat(s) sous bail, en attente de leur fin")
+                attente_signalee = True
+            time.sleep(min(INTERVALLE_SUIVI, file.duree_bail / 3))
+
+    def sur_resultat(resultat):
+        if file.terminer(nom, resultat):
+            bilan['enregistres'] += 1
+        else:
+            # Déjà fait par un autre travailleur, ou erreur remise en file
+            bilan['ignores'] += 1
+
+    print(f"🧑‍🏭 Travailleur {nom} sur la file {file.chemin} "
+          f"(bail de {file.duree_bail:.0f} s)")
+    print(ligne_avancement(file.etat()))
+    threading.Thread(target=signes_de_vie, daemon=True).start()
+    ecrivain_metriques = demarrer_metriques(args)
+    try:
+        lancer_recherche(taches(), args, sur_resultat)
+    except KeyboardInterrupt:
+        print("\n⏸️  Travailleur interrompu : ses candidats sont remis en attente")
+    finally:
+        arret.set()
+        file.liberer(nom)
+        if ecrivain_metriques:
+            ecrivain_metriques.arreter()
+
+    print(f"\n🧑‍🏭 Travailleur {nom}: {bilan['enregistres']} résultat(s) enregistré(s), "
+          f"{bilan['ignores']} ignoré(s) (doublon ou erreur remise en file)")
+    print(ligne_avancement(file.etat()))
+    METRIQUES.afficher()
+    file.fermer()
+
+
+def lancer_travailleurs(args):
+    """
+    Lance `--travailleurs-locaux` processus travailleurs sur cette machine
+    (le plafond de requêtes/seconde est réparti entre eux) ; journaux dans
+    `<sortie>_travailleur<i>.log`
+    """
+    nombre = args.travailleurs_locaux
+    rps = (args.rps / nombre) if args.rps else 0
+    commande = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              'recherche_batch.py'),
+                '--file-travail', args.file_travail, '--travailleur',
+                '--bail', str(args.bail), '--tentatives-file', str(args.tentatives_file),
+                '--workers', str(args.workers), '--rps', str(rps),
+                '--tentatives', str(args.tentatives), '--parseur', args.parseur,
+                '--stats-tous', '0']
+    for option in ('concurrence_fixe', 'lecture_partielle', 'sans_cache',
+                   'sans_cache_negatif', 'hors_ligne', 'pipeline'):
+        if getattr(args, option):
+            commande.append('--' + option.replace('_', '-'))
+    if args.ttl is not None:
+        commande += ['--ttl', str(args.ttl)]
+    if args.ttl_cache_negatif is not None:
+        commande += ['--ttl-cache-negatif', str(args.ttl_cache_negatif)]
+    if args.archive:
+        commande += ['--archive', args.archive]
+
+    processus = []
+    for index in range(nombre):
+        journal = open(f"{args.sortie}_travailleur{index}.log", 'w', encoding='utf-8')
+        processus.append((subprocess.Popen(commande, stdout=journal,
+                                           stderr=subprocess.STDOUT), journal))
+        print(f"🚀 Travailleur local {index} lancé (PID {processus[-1][0].pid})")
+    return processus
+
+
+def fusionner_file(file, args):
+    """
+    Écrit les résultats de la file (ordre du fichier de matricules) dans
+    `<sortie>.jsonl/.csv`, la base et le rapport `<sortie>.txt`, puis
+    affiche le résumé habituel
+    """
+    base = ouvrir_base(args)
+    with EcrivainResultats(args.sortie, flush_tous=args.flush) as ecrivain:
+        for resultat in file.resultats():
+            ecrivain.ajouter(resultat)
+            if base:
+                base.ajouter(resultat)
+    if base:
+        base.fermer()
+    print(f"\n🧩 {ecrivain.nombre} résultat(s) fusionné(s): "
+          f"{ecrivain.chemin('jsonl')}, {ecrivain.chemin('csv')}")
+
+    afficher_resume(lire_resultats_jsonl(ecrivain.chemin('jsonl')))
+    sauvegarder_resultats(lire_resultats_jsonl(ecrivain.chemin('jsonl')),
+                          ecrivain.chemin('txt'))
+
+
+def coordonner(args, matricules):
+    """
+    Mode coordinateur : remplit la file (sans doublon), lance éventuellement
+    des travailleurs locaux, suit l'avancement puis fusionne les résultats
+    quand la file est vide. Relancer la même commande reprend le suivi.
+    """
+    file = ouvrir_file(args)
+    ajoutes = file.remplir(matricules)
+    etat = file.etat()
+    print(f"📋 File de travail {file.chemin}: {ajoutes} candidat(s) ajouté(s), "
+          f"{etat['total']} au total")
+
+    processus = lancer_travailleurs(args) if args.travailleurs_locaux else []
+    if not processus and etat[FAIT] < etat['total']:
+        print(f"   Travailleurs: python recherche_batch.py --file-travail {file.chemin} "
+              "--travailleur")
+    try:
+        while True:
+            etat = file.etat()
+            print(ligne_avancement(etat))
+            if etat[FAIT] >= etat['total']:
+                break
+            if processus and all(p.poll() is not None for p, _ in processus):
+                print("⚠️  Tous les travailleurs locaux sont arrêtés avant la fin "
+                      "(voir les fichiers .log) ; relancez la commande pour reprendre")
+                return
+            time.sleep(INTERVALLE_SUIVI)
+    except KeyboardInterrupt:
+        print("\n⏸️  Suivi interrompu : la file est conservée, relancez la même "
+              "commande pour reprendre le suivi et fusionner")
+        return
+    finally:
+        for proc, journal in processus:
+            proc.wait()
+            journal.close()
+
+    fusionner_file(file, args)
+    file.fermer()
+    print("\n🎯 Traitement terminé!")
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Numéros de candidats inexistants : détection rapide et cache négatif
+Une page « aucun résultat » est reconnue à son code HTTP (404, 410) ou à
+sa signature, par une simple recherche dans les octets reçus (sans analyse
+HTML). Les numéros inexistants sont gardés dans des bitmaps persistants,
+par session du BAC (URL de base), pour que les lots et balayages suivants
+les sautent sans aucun accès réseau.
+
+Un 404 passager ou une page lue avant la publication des résultats ne doit
+pas écarter un numéro pour toujours : chaque bitmap couvre une tranche de
+temps (une « génération ») et est supprimé dès que son début est plus
+ancien que la durée de validité (celle du cache de pages).
+
+Usage:
+    python introuvables.py stats
+    python introuvables.py vider          # oublier tous les numéros inexistants
+"""
+
+import argparse
+import os
+import threading
+import time
+import zlib
+
+
+# Codes HTTP d'un numéro inexistant
+CODES_INTROUVABLE = (404, 410)
+
+# Messages « aucun résultat » du site (français, arabe), en octets UTF-8
+SIGNATURES_INTROUVABLE = (
+    'Aucun résultat trouvé'.encode('utf-8'),
+    'لا توجد نتيجة'.encode('utf-8'),
+)
+
+# Dossier des bitmaps (à côté du cache de pages)
+DOSSIER_INTROUVABLES = '.cache_bac'
+
+# Numéro maximal mémorisé (bitmap de 1,25 Mo au plus)
+NUMERO_MAX = 10_000_000
+
+# Nouveaux numéros entre deux écritures du bitmap sur disque
+ECRITURE_TOUS = 50
+
+# Durée de validité par défaut d'un numéro inexistant (secondes)
+TTL_INTROUVABLES = 24 * 3600
+
+# Générations par durée de validité : un numéro expire un peu avant la fin
+# de sa durée de validité (au plus 1/GENERATIONS_PAR_TTL plus tôt)
+GENERATIONS_PAR_TTL = 24
+DUREE_GENERATION_MIN = 60
+
+
+def page_introuvable(contenu, numero_candidat):
+    """
+    La page (bytes, éventuellement tronquée) est-elle une page « aucun
+    résultat » ? Signature présente et numéro absent : une page de résultat
+    qui citerait la signature ailleurs n'est pas prise pour une absence.
+    """
+    return (numero_candidat.encode('ascii') not in contenu
+            and any(signature in contenu for signature in SIGNATURES_INTROUVABLE))
+
+
+def chemin_session(url_base, dossier=DOSSIER_INTROUVABLES):
+    """
+    Préfixe des bitmaps propres à une session (URL de base des résultats) :
+    un fichier <préfixe>.<début de la génération>.bin par génération
+    """
+    empreinte = f"{zlib.crc32(url_base.encode('utf-8')):08x}"
+    return os.path.join(dossier, f'introuvables-{empreinte}')
+
+
+def _lire_fichier(chemin):
+    try:
+        with open(chemin, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return b''
+
+
+def _fusionner(bits, autres):
+    """OU bit à bit de `autres` dans `bits` (bytearray agrandi si besoin)"""
+    if len(autres) > len(bits):
+        bits.extend(bytes(len(autres) - len(bits)))
+    for i, octet in enumerate(autres):
+        if octet:
+            bits[i] |= octet
+
+
+def _supprimer(chemin):
+    try:
+        os.remove(chemin)
+    except FileNotFoundError:
+        pass
+
+
+class CacheIntrouvables:
+    """
+    Bitmaps persistants des numéros inexistants (bit n = numéro n), partagés
+    entre threads
+
+    Les ajouts vont dans le bitmap de la génération courante et sont écrits
+    par lots (tous les `ecriture_tous` numéros et à la fermeture) ; l'écriture
+    fusionne le fichier existant (OU bit à bit), ce qui permet à plusieurs
+    processus (shards de balayage.py) de partager les mêmes fichiers. Les
+    générations expirées sont supprimées au chargement, et rechargées en
+    cours de route quand une nouvelle génération commence. Avec ttl <= 0,
+    les numéros déjà mémorisés sont ignorés (mais pas effacés) : seuls ceux
+    trouvés pendant le traitement sont connus. Les numéros non numériques ou
+    trop grands sont ignorés.
+    """
+
+    def __init__(self, prefixe, ttl=TTL_INTROUVABLES, ecriture_tous=ECRITURE_TOUS):
+        self.prefixe = prefixe
+        self.ttl = ttl
+        self.duree_generation = max(DUREE_GENERATION_MIN, ttl / GENERATIONS_PAR_TTL)
+        self.ecriture_tous = max(1, ecriture_tous)
+        self._verrou = threading.Lock()
+        self._charger()
+
+    def _generations(self):
+        """
+        (début, chemin) des bitmaps existants de la session ; le fichier
+        <préfixe>.bin sans génération (non daté) a pour début 0
+        """
+        dossier, nom = os.path.split(self.prefixe)
+        try:
+            fichiers = os.listdir(dossier or '.')
+        except FileNotFoundError:
+            return []
+        generations = []
+        for fichier in fichiers:
+            if fichier == f'{nom}.bin':
+                generations.append((0, os.path.join(dossier, fichier)))
+            elif fichier.startswith(f'{nom}.') and fichier.endswith('.bin'):
+                debut = fichier[len(nom) + 1:-len('.bin')]
+                if debut.isdigit():
+                    generations.append((int(debut), os.path.join(dossier, fichier)))
+        return generations
+
+    def _charger(self):
+        maintenant = time.time()
+        self._debut = int(maintenant // self.duree_generation * self.duree_generation)
+        self._fin = self._debut + self.duree_generation
+        self._bits = bytearray()          # toutes générations valides
+        self._nouveaux = bytearray()      # génération courante
+        self._non_ecrits = 0
+        if self.ttl <= 0:
+            return
+        for debut, chemin in self._generations():
+            if maintenant - debut >= self.ttl:
+                # Génération expirée : ses numéros sont tous plus anciens que ttl
+                _supprimer(chemin)
+            else:
+                _fusionner(self._bits, _lire_fichier(chemin))
+
+    def _renouveler(self):
+        with self._verrou:
+            if time.time() < self._fin:
+                return
+            if self._non_ecrits:
+                self._ecrire()
+            self._charger()
+
+    @staticmethod
+    def _position(numero_candidat):
+        if not numero_candidat.isdigit():
+            return None
+        numero = int(numero_candidat)
+        return numero if numero <= NUMERO_MAX else None
+
+    def __contains__(self, numero_candidat):
+        if time.time() >= self._fin:
+            self._renouveler()
+        numero = self._position(numero_candidat)
+        if numero is None:
+            return False
+        octet = numero >> 3
+        bits = self._bits
+        return octet < len(bits) and bool(bits[octet] & (1 << (numero & 7)))
+
+    def __len__(self):
+        return sum(bin(octet).count('1') for octet in self._bits)
+
+    def ajouter(self, numero_candidat):
+        numero = self._position(numero_candidat)
+        if numero is None:
+            return
+        with self._verrou:
+            octet = numero >> 3
+            masque = 1 << (numero & 7)
+            for bits in (self._bits, self._nouveaux):
+                if octet >= len(bits):
+                    bits.extend(bytes(octet + 1 - len(bits)))
+            if self._bits[octet] & masque:
+                return
+            self._bits[octet] |= masque
+            self._nouveaux[octet] |= masque
+            self._non_ecrits += 1
+            if self._non_ecrits >= self.ecriture_tous:
+                self._ecrire()
+
+    def enregistrer(self):
+        """
+        Écrit les ajouts en attente sur disque
+        """
+        with self._verrou:
+            if self._non_ecrits:
+                self._ecrire()
+
+    def _ecrire(self):
+        # Fusion avec les numéros ajoutés entre-temps par d'autres processus
+        chemin = f'{self.prefixe}.{self._debut}.bin'
+        disque = _lire_fichier(chemin)
+        _fusionner(self._nouveaux, disque)
+        if self.ttl > 0:
+            _fusionner(self._bits, disque)
+
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with open(temporaire, 'wb') as f:
+            f.write(self._nouveaux)
+        os.replace(temporaire, chemin)
+        self._non_ecrits = 0
+
+    def vider(self):
+        """
+        Oublie tous les numéros inexistants de la session (fichiers supprimés)
+        """
+        with self._verrou:
+            for _, chemin in self._generations():
+                _supprimer(chemin)
+            self._bits = bytearray()
+            self._nouveaux = bytearray()
+            self._non_ecrits = 0
+
+
+def main():
+    from client_leger import URL_BASE
+
+    parser = argparse.ArgumentParser(description="Cache négatif des numéros inexistants")
+    parser.add_argument('--dossier', default=DOSSIER_INTROUVABLES,
+                        help="dossier du cache (défaut: %(default)s)")
+    parser.add_argument('--session', default=URL_BASE,
+                        help="URL de base de la session (défaut: %(default)s)")
+    parser.add_argument('--ttl', type=float, default=TTL_INTROUVABLES,
+                        help="durée de validité en secondes (défaut: %(default)s)")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    commandes.add_parser('stats', help="nombre de numéros inexistants mémorisés")
+    commandes.add_parser('vider', help="oublier tous les numéros inexistants de la session")
+    args = parser.parse_args()
+
+    introuvables = CacheIntrouvables(chemin_session(args.session, args.dossier), args.ttl)
+    if args.commande == 'stats':
+        generations = sorted(debut for debut, _ in introuvables._generations())
+        print(f"🚫 {len(introuvables)} numéro(s) inexistant(s) mémorisé(s) pour {args.session}")
+        if generations:
+            print(f"  • {len(generations)} génération(s), la plus ancienne du "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(generations[0]))}, "
+                  f"expiration après {args.ttl / 3600:g} h")
+    elif args.commande == 'vider':
+        nombre = len(introuvables)
+        introuvables.vider()
+        print(f"🗑️  {nombre} numéro(s) inexistant(s) oublié(s) pour {args.session}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Limiteur de débit partagé entre les threads de recherche
+Remplace les pauses fixes (time.sleep) par un budget global de requêtes/seconde
+"""
+
+import threading
+import time
+
+
+class LimiteurDebit:
+    """
+    Seau à jetons thread-safe : au plus `requetes_par_seconde` requêtes en
+    moyenne, avec une rafale maximale de `rafale` requêtes.
+    Un débit nul ou None désactive la limitation.
+    """
+
+    def __init__(self, requetes_par_seconde, rafale=1):
+        self.requetes_par_seconde = requetes_par_seconde
+        self.rafale = max(1, rafale)
+        self._jetons = float(self.rafale)
+        self._dernier = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def _recharger(self, maintenant):
+        ecoule = maintenant - self._dernier
+        self._dernier = maintenant
+        self._jetons = min(self.rafale,
+                           self._jetons + ecoule * self.requetes_par_seconde)
+
+    def attendre(self):
+        """
+        Bloque jusqu'à ce qu'un jeton soit disponible puis le consomme.
+        Retourne le temps passé à attendre (en secondes).
+        """
+        if not self.requetes_par_seconde:
+            return 0.0
+
+        debut = time.monotonic()
+        while True:
+            with self._verrou:
+                maintenant = time.monotonic()
+                self._recharger(maintenant)
+                if self._jetons >= 1:
+                    self._jetons -= 1
+                    return maintenant - debut
+                manque = (1 - self._jetons) / self.requetes_par_seconde
+            time.sleep(manque)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure du temps passé dans chaque étape d'une recherche
+
+Étapes : dns, connexion (TCP), tls, attente (premier octet), telechargement
+(corps de la page), analyse_html, extraction. Compteurs : pages (réseau /
+cache), octets reçus (sur le réseau / après décompression).
+
+Les mesures sont exportées au format texte Prometheus : fichier réécrit
+périodiquement, petit serveur HTTP (/metrics) ou route /metrics de
+serveur.py. La variable d'environnement BAC_METRIQUES=chemin écrit le
+fichier à la fin de n'importe quel script (bac_simple, bac_avance...).
+"""
+
+import atexit
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Étapes mesurées, dans l'ordre d'affichage
+ETAPES = ('dns', 'connexion', 'tls', 'attente', 'telechargement',
+          'analyse_html', 'extraction')
+
+# Bornes (en secondes) des classes de l'histogramme de chaque étape
+BORNES = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+          0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Intervalle par défaut entre deux écritures du fichier de métriques
+INTERVALLE_ECRITURE = 10.0
+
+
+class _Histogramme:
+    __slots__ = ('nombre', 'somme', 'classes')
+
+    def __init__(self):
+        self.nombre = 0
+        self.somme = 0.0
+        self.classes = [0] * (len(BORNES) + 1)
+
+    def observer(self, duree):
+        self.nombre += 1
+        self.somme += duree
+        for i, borne in enumerate(BORNES):
+            if duree <= borne:
+                self.classes[i] += 1
+                return
+        self.classes[-1] += 1
+
+    def percentile(self, p):
+        """Borne supérieure de la classe contenant le percentile p"""
+        rang = p / 100 * self.nombre
+        cumul = 0
+        for i, effectif in enumerate(self.classes):
+            cumul += effectif
+            if effectif and cumul >= rang:
+                return BORNES[i] if i < len(BORNES) else float('inf')
+        return None
+
+
+class Metriques:
+    """
+    Registre thread-safe des durées par étape et des compteurs
+    """
+
+    def __init__(self):
+        self._histogrammes = {}
+        self._compteurs = {}
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+        self.debut = time.time()
+
+    def observer(self, etape, duree):
+        with self._verrou:
+            histogramme = self._histogrammes.get(etape)
+            if histogramme is None:
+                histogramme = self._histogrammes[etape] = _Histogramme()
+            histogramme.observer(duree)
+
+    def compter(self, nom, valeur=1):
+        with self._verrou:
+            self._compteurs[nom] = self._compteurs.get(nom, 0) + valeur
+
+    @contextmanager
+    def mesurer(self, etape):
+        """Mesure la durée du bloc comme une observation de `etape`"""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(etape, time.perf_counter() - debut)
+
+    def chronometrer(self, etape):
+        """Décorateur : chaque appel de la fonction est une observation de `etape`"""
+        def decorateur(fonction):
+            @functools.wraps(fonction)
+            def enveloppe(*args, **kwargs):
+                debut = time.perf_counter()
+                try:
+                    return fonction(*args, **kwargs)
+                finally:
+                    self.observer(etape, time.perf_counter() - debut)
+            return enveloppe
+        return decorateur
+
+    # --- Établissement des connexions (par thread) ----------------------------
+
+    def debut_requete(self):
+        """Remet à zéro le temps d'établissement de connexion du thread courant"""
+        self._local.etablissement = 0.0
+
+    def ajouter_etablissement(self, duree):
+        self._local.etablissement = getattr(self._local, 'etablissement', 0.0) + duree
+
+    def etablissement(self):
+        """Temps passé à établir des connexions depuis debut_requete()"""
+        return getattr(self._local, 'etablissement', 0.0)
+
+    # --- Transfert entre processus (pipeline) ---------------------------------
+
+    def reinitialiser(self):
+        """
+        Registre vide, avec un verrou neuf : à appeler au démarrage d'un
+        processus fils (un fork hérite des mesures du parent, et de son
+        verrou peut-être pris par un autre thread)
+        """
+        self._verrou = threading.Lock()
+        self._histogrammes = {}
+        self._compteurs = {}
+
+    def vider(self):
+        """
+        Retourne les mesures accumulées (sous forme sérialisable) et les efface
+        """
+        with self._verrou:
+            donnees = ({etape: (h.nombre, h.somme, h.classes)
+                        for etape, h in self._histogrammes.items()},
+                       dict(self._compteurs))
+            self._histogrammes = {}
+            self._compteurs = {}
+        return donnees
+
+    def fusionner(self, donnees):
+        """Ajoute des mesures obtenues par vider() dans un autre processus"""
+        histogrammes, compteurs = donnees
+        with self._verrou:
+            for etape, (nombre, somme, classes) in histogrammes.items():
+                histogramme = self._histogrammes.get(etape)
+                if histogramme is None:
+                    histogramme = self._histogrammes[etape] = _Histogramme()
+                histogramme.nombre += nombre
+                histogramme.somme += somme
+                histogramme.classes = [a + b for a, b in zip(histogramme.classes, classes)]
+            for nom, valeur in compteurs.items():
+                self._compteurs[nom] = self._compteurs.get(nom, 0) + valeur
+
+    # --- Export -------------------------------------------------------------
+
+    def _etapes_triees(self):
+        return sorted(self._histogrammes,
+                      key=lambda e: (ETAPES.index(e) if e in ETAPES else len(ETAPES), e))
+
+    def texte_prometheus(self):
+        """
+        Mesures au format d'exposition texte de Prometheus
+        """
+        lignes = [
+            '# HELP bac_etape_duree_secondes Durée des étapes de recherche',
+            '# TYPE bac_etape_duree_secondes histogram',
+        ]
+        with self._verrou:
+            for etape in self._etapes_triees():
+                h = self._histogrammes[etape]
+                cumul = 0
+                for borne, effectif in zip(BORNES, h.classes):
+                    cumul += effectif
+                    lignes.append(f'bac_etape_duree_secondes_bucket{{etape="{etape}",le="{borne}"}} {cumul}')
+                lignes.append(f'bac_etape_duree_secondes_bucket{{etape="{etape}",le="+Inf"}} {h.nombre}')
+                lignes.append(f'bac_etape_duree_secondes_sum{{etape="{etape}"}} {h.somme:.6f}')
+                lignes.append(f'bac_etape_duree_secondes_count{{etape="{etape}"}} {h.nombre}')
+            declares = set()
+            for nom in sorted(self._compteurs):
+                metrique, _, etiquette = nom.partition(':')
+                if metrique not in declares:
+                    declares.add(metrique)
+                    lignes.append(f'# TYPE bac_{metrique}_total counter')
+                if etiquette:
+                    cle, _, valeur = etiquette.partition('=')
+                    lignes.append(f'bac_{metrique}_total{{{cle}="{valeur}"}} {self._compteurs[nom]}')
+                else:
+                    lignes.append(f'bac_{metrique}_total {self._compteurs[nom]}')
+        lignes.append('# TYPE bac_debut_secondes gauge')
+        lignes.append(f'bac_debut_secondes {self.debut:.0f}')
+        return '\n'.join(lignes) + '\n'
+
+    def ecrire(self, chemin):
+        """Écrit les mesures dans un fichier (remplacement atomique)"""
+        temporaire = f"{chemin}.tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            f.write(self.texte_prometheus())
+        os.replace(temporaire, chemin)
+
+    def afficher(self):
+        """
+        Tableau récapitulatif : nombre, moyenne, p50/p95 et part du temps par étape
+        """
+        with self._verrou:
+            etapes = [(e, self._histogrammes[e]) for e in self._etapes_triees()]
+            compteurs = dict(self._compteurs)
+        if not etapes:
+            return
+        total = sum(h.somme for _, h in etapes) or 1.0
+
+        print("\n⏱️  TEMPS PAR ÉTAPE")
+        print(f"  {'Étape':<15} {'nombre':>7} {'moy. ms':>9} {'p50 ≤ ms':>9} "
+              f"{'p95 ≤ ms':>9} {'part':>6}")
+        for etape, h in etapes:
+            print(f"  {etape:<15} {h.nombre:>7} {h.somme / h.nombre * 1000:>9.2f} "
+                  f"{h.percentile(50) * 1000:>9.1f} {h.percentile(95) * 1000:>9.1f} "
+                  f"{h.somme / total:>6.0%}")
+        reseau = compteurs.get('pages:source=reseau', 0)
+        cache = compteurs.get('pages:source=cache', 0)
+        recus = compteurs.get('octets:type=recus', 0)
+        decompresses = compteurs.get('octets:type=decompresses', 0)
+        print(f"  Pages: {reseau} du réseau, {cache} du cache ; "
+              f"{recus / 1024:.0f} Ko reçus ({decompresses / 1024:.0f} Ko décompressés)")
+        interrompues = compteurs.get('pages:lecture=interrompue', 0)
+        if interrompues:
+            print(f"  Lecture partielle: {interrompues} page(s) interrompue(s), "
+                  f"{compteurs.get('octets:type=economises', 0) / 1024:.0f} Ko non téléchargés")
+        sautes = compteurs.get('introuvables:source=cache_negatif', 0)
+        detectes = (compteurs.get('introuvables:source=statut', 0)
+                    + compteurs.get('introuvables:source=signature', 0))
+        if sautes or detectes:
+            print(f"  Numéros inexistants: {detectes} détecté(s), "
+                  f"{sautes} sauté(s) sans requête (cache négatif)")
+        tronquees = compteurs.get('pages:analyse=tronquee', 0)
+        hors_budget = compteurs.get('pages:analyse=budget_depasse', 0)
+        if tronquees or hors_budget:
+            print(f"  Pages anormales: {tronquees} tronquée(s) à l'analyse, "
+                  f"{hors_budget} hors budget d'extraction")
+
+
+# Registre partagé par tous les modules
+METRIQUES = Metriques()
+
+
+class EcrivainMetriques:
+    """
+    Thread qui réécrit le fichier de métriques toutes les `intervalle` secondes
+    """
+
+    def __init__(self, chemin, intervalle=INTERVALLE_ECRITURE, metriques=METRIQUES):
+        self.chemin = chemin
+        self.intervalle = intervalle
+        self.metriques = metriques
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle, daemon=True)
+        self._thread.start()
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            self.metriques.ecrire(self.chemin)
+
+    def arreter(self):
+        self._arret.set()
+        self.metriques.ecrire(self.chemin)
+
+
+def demarrer_serveur_metriques(port, hote='127.0.0.1', metriques=METRIQUES):
+    """
+    Expose les mesures sur http://hote:port/metrics (thread en arrière-plan)
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Gestionnaire(BaseHTTPRequestHandler):
+        wbufsize = -1
+
+        def do_GET(self):
+            corps = metriques.texte_prometheus().encode('utf-8')
+            self.send_response(200 if self.path.startswith('/metrics') else 404)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(corps)))
+            self.end_headers()
+            self.wfile.write(corps)
+
+        def log_message(self, format, *args):
+            pass
+
+    serveur = ThreadingHTTPServer((hote, port), Gestionnaire)
+    serveur.daemon_threads = True
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur
+
+
+class Profileur:
+    """
+    Profilage cProfile d'un échantillon de pages (proportion `taux`)
+
+    Un seul appel est profilé à la fois ; les profils sont cumulés puis
+    écrits dans `chemin` (format pstats, lisible par snakeviz, flameprof
+    ou gprof2dot pour un graphe en flammes).
+    """
+
+    def __init__(self, taux, chemin):
+        self.taux = taux
+        self.chemin = chemin
+        self.pages = 0
+        self._stats = None
+        self._verrou = threading.Lock()
+
+    def executer(self, fonction, *args, **kwargs):
+        import cProfile
+        import pstats
+        import random
+
+        if random.random() >= self.taux or not self._verrou.acquire(blocking=False):
+            return fonction(*args, **kwargs)
+        profil = cProfile.Profile()
+        try:
+            return profil.runcall(fonction, *args, **kwargs)
+        finally:
+            if self._stats is None:
+                self._stats = pstats.Stats(profil)
+            else:
+                self._stats.add(profil)
+            self.pages += 1
+            self._verrou.release()
+
+    def terminer(self, lignes=15):
+        """Écrit le profil cumulé et affiche les fonctions les plus coûteuses"""
+        import io
+
+        if self._stats is None:
+            print("\n🔬 Profilage : aucune page échantillonnée")
+            return
+        self._stats.dump_stats(self.chemin)
+        sortie = io.StringIO()
+        self._stats.stream = sortie
+        self._stats.strip_dirs().sort_stats('cumulative').print_stats(lignes)
+        print(f"\n🔬 Profilage de {self.pages} page(s) : {self.chemin}")
+        print("   (graphe en flammes : flameprof, snakeviz ou gprof2dot sur ce fichier)")
+        for ligne in sortie.getvalue().splitlines():
+            if ligne.strip() and not ligne.lstrip().startswith(('Ordered by', 'List reduced')):
+                print(f"   {ligne}")
+
+
+if os.environ.get('BAC_METRIQUES'):
+    atexit.register(METRIQUES.ecrire, os.environ['BAC_METRIQUES'])
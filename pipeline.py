@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Traitement en lot en pipeline : téléchargement et analyse séparés
+
+- étage réseau : des threads téléchargent les pages brutes (bytes) et les
+  déposent dans une file bornée ;
+- étage analyse : un pool de processus extrait les informations, ce qui
+  contourne le GIL et occupe tous les cœurs.
+
+La file bornée et le nombre limité d'analyses en cours assurent la
+contre-pression : les téléchargements ralentissent si l'analyse ne suit
+pas, et la mémoire reste plafonnée.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                wait, FIRST_COMPLETED)
+
+import requests
+
+import analyse_html
+import client_http
+from controle import ControleTrafic, FileReprises, TENTATIVES_PAR_DEFAUT
+from metriques import METRIQUES
+from table_resultats import TableResultats
+from recherche_batch import (analyser_contenu, formater_resultat,
+                             formater_erreur, detecteur_bloc_resultat,
+                             telecharger_controle,
+                             WORKERS_PAR_DEFAUT,
+                             REQUETES_PAR_SECONDE_PAR_DEFAUT)
+
+
+# Nombre de processus d'analyse par défaut (un cœur laissé au réseau)
+WORKERS_ANALYSE_PAR_DEFAUT = max(1, (os.cpu_count() or 2) - 1)
+
+# Capacité par défaut de la file entre téléchargement et analyse
+TAILLE_FILE_PAR_DEFAUT = 64
+
+# Attente maximale d'un dépôt dans la file pleine avant de vérifier l'arrêt
+ATTENTE_DEPOT = 0.2
+
+_FIN = object()
+
+
+def _initialiser_processus():
+    METRIQUES.reinitialiser()
+
+
+def analyser_candidat(nom, matricule, contenu, backend):
+    """
+    Étage analyse (exécuté dans un processus du pool)
+    Retourne (résultat, lignes, mesures) : les mesures de temps du processus
+    sont renvoyées au parent pour être fusionnées dans ses METRIQUES
+    """
+    try:
+        info = analyser_contenu(contenu, matricule, backend)
+        resultat, lignes = formater_resultat(nom, matricule, True, info)
+    except Exception as e:
+        resultat, lignes = formater_erreur(nom, matricule, e)
+    return resultat, lignes, METRIQUES.vider()
+
+
+class StatistiquesPipeline:
+    """
+    Compteurs des deux étages, affichés en fin de traitement
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.octets = 0
+        self.erreurs_reseau = 0
+        self.duree_reseau = 0.0
+        self.file_max = 0
+        self.attente_file = 0.0
+        self._verrou = threading.Lock()
+
+    def telechargement(self, octets, duree):
+        with self._verrou:
+            self.pages += 1
+            self.octets += octets
+            self.duree_reseau += duree
+
+    def erreur(self):
+        with self._verrou:
+            self.erreurs_reseau += 1
+
+    def depot(self, attente, taille_file):
+        with self._verrou:
+            self.attente_file += attente
+            self.file_max = max(self.file_max, taille_file)
+
+
+def rechercher_resultats_pipeline(matricules, workers=WORKERS_PAR_DEFAUT,
+                                  workers_analyse=WORKERS_ANALYSE_PAR_DEFAUT,
+                                  taille_file=TAILLE_FILE_PAR_DEFAUT,
+                                  requetes_par_seconde=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                                  sur_resultat=None, conserver=True,
+                                  tentatives=TENTATIVES_PAR_DEFAUT, adaptatif=True,
+                                  lecture_partielle=False):
+    """
+    Équivalent de recherche_batch.rechercher_resultats_batch en pipeline
+
+    `workers` threads téléchargent les pages, `workers_analyse` processus
+    les analysent ; au plus `taille_file` pages attendent entre les deux.
+    Concurrence adaptative et reprises comme en mode lot (voir controle.py).
+    Avec `lecture_partielle`, les threads réseau arrêtent chaque téléchargement
+    après le bloc de résultat.
+    """
+    total = len(matricules) if hasattr(matricules, '__len__') else '?'
+    workers = max(1, workers)
+    workers_analyse = max(1, workers_analyse)
+    taille_file = max(1, taille_file)
+    backend = analyse_html.backend_actif()
+
+    print(f"🎓 Recherche en lot (pipeline) - {total} candidat(s) à traiter")
+    print(f"⚙️  Réseau: {workers} thread(s), {requetes_par_seconde or 'sans limite'} requête(s)/seconde")
+    print(f"⚙️  Analyse: {workers_analyse} processus (parseur {backend}), file de {taille_file} page(s)")
+    print("=" * 60)
+
+    controle = ControleTrafic(workers, requetes_par_seconde, tentatives, adaptatif)
+    stats = StatistiquesPipeline()
+    file_pages = queue.Queue(maxsize=taille_file)
+    resultats = TableResultats() if conserver else None
+    termines = 0
+    debut = time.monotonic()
+
+    # Candidats lus mais pas encore déposés dans la file (reprises comprises)
+    places = threading.BoundedSemaphore(2 * workers)
+    suivi = {'en_vol': 0, 'alimentation_finie': False, 'erreur': None}
+    verrou_suivi = threading.Lock()
+    arret = threading.Event()
+
+    def mettre_en_file(element):
+        # Bloque si l'étage analyse est en retard (contre-pression), sauf
+        # après une interruption : plus personne ne vide alors la file
+        while not arret.is_set():
+            try:
+                file_pages.put(element, timeout=ATTENTE_DEPOT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def deposer(element):
+        t0 = time.monotonic()
+        if not mettre_en_file(element):
+            return
+        stats.depot(time.monotonic() - t0, file_pages.qsize())
+        places.release()
+        with verrou_suivi:
+            suivi['en_vol'] -= 1
+            fin = suivi['alimentation_finie'] and suivi['en_vol'] == 0
+        if fin:
+            mettre_en_file(_FIN)
+
+    def telecharger(index, nom, matricule, tentative=1):
+        t0 = time.monotonic()
+        try:
+            if client_http.est_introuvable(matricule):
+                # Cache négatif : ni requête ni analyse
+                METRIQUES.compter('introuvables:source=cache_negatif')
+                deposer((index, nom, matricule, None, 'Numéro inexistant (cache négatif)'))
+                return
+            suffisant = detecteur_bloc_resultat(matricule) if lecture_partielle else None
+            contenu = telecharger_controle(matricule, controle, suffisant).content
+            stats.telechargement(len(contenu), time.monotonic() - t0)
+            element = (index, nom, matricule, contenu, None)
+        except client_http.CandidatIntrouvable:
+            element = (index, nom, matricule, None, 'Numéro inexistant')
+        except requests.exceptions.RequestException as e:
+            if controle.reessayable(e, tentative):
+                reprises.programmer(controle.delai_reprise(tentative, e),
+                                    (index, nom, matricule, tentative + 1))
+                return
+            stats.erreur()
+            element = (index, nom, matricule, None, 'Erreur de connexion')
+        except Exception:
+            stats.erreur()
+            element = (index, nom, matricule, None, 'Erreur inconnue')
+        deposer(element)
+
+    def soumettre(element):
+        try:
+            executor_reseau.submit(telecharger, *element)
+        except RuntimeError:
+            # Pool arrêté après une interruption
+            if not arret.is_set():
+                raise
+
+    def alimenter():
+        try:
+            for i, (nom, matricule) in enumerate(matricules):
+                places.acquire()
+                if arret.is_set():
+                    break
+                with verrou_suivi:
+                    suivi['en_vol'] += 1
+                soumettre((i, nom, matricule))
+        except Exception as e:
+            # Relevée par la boucle principale une fois les candidats en vol traités
+            suivi['erreur'] = e
+        finally:
+            with verrou_suivi:
+                suivi['alimentation_finie'] = True
+                fin = suivi['en_vol'] == 0
+            if fin:
+                mettre_en_file(_FIN)
+
+    def terminer(index, nom, matricule, resultat, lignes):
+        nonlocal termines
+        termines += 1
+        print(f"\n[{termines}/{total}] Traitement de {nom} (#{matricule})")
+        print("-" * 50)
+        for ligne in lignes:
+            print(ligne)
+        if sur_resultat:
+            sur_resultat(resultat)
+        if conserver:
+            resultats.ajouter(resultat, index)
+
+    def recuperer(analyses):
+        for future in analyses:
+            index, nom, matricule = analyses_en_cours.pop(future)
+            resultat, lignes, mesures = future.result()
+            METRIQUES.fusionner(mesures)
+            terminer(index, nom, matricule, resultat, lignes)
+
+    analyses_en_cours = {}
+    with ProcessPoolExecutor(max_workers=workers_analyse,
+                             initializer=_initialiser_processus) as executor_analyse, \
+            ThreadPoolExecutor(max_workers=workers) as executor_reseau:
+        reprises = FileReprises(soumettre)
+        alimentation = threading.Thread(target=alimenter, daemon=True)
+        alimentation.start()
+
+        try:
+            while True:
+                element = file_pages.get()
+                if element is _FIN:
+                    break
+                index, nom, matricule, contenu, erreur = element
+
+                if erreur:
+                    resultat, lignes = formater_resultat(nom, matricule, False,
+                                                         {'statut': erreur})
+                    terminer(index, nom, matricule, resultat, lignes)
+                    continue
+
+                # Nombre d'analyses en cours borné : la file se remplit sinon
+                if len(analyses_en_cours) >= 2 * workers_analyse:
+                    finies, _ = wait(analyses_en_cours, return_when=FIRST_COMPLETED)
+                    recuperer(finies)
+
+                future = executor_analyse.submit(analyser_candidat, nom, matricule,
+                                                 contenu, backend)
+                analyses_en_cours[future] = (index, nom, matricule)
+
+            recuperer(list(wait(analyses_en_cours).done))
+            alimentation.join()
+            if suivi['erreur']:
+                raise suivi['erreur']
+        except BaseException:
+            # Interruption : ne pas attendre les tâches encore en file, et
+            # débloquer les threads réseau en attente de place dans la file
+            arret.set()
+            executor_reseau.shutdown(wait=False, cancel_futures=True)
+            executor_analyse.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            reprises.arreter()
+
+    duree = time.monotonic() - debut
+    print("\n" + "=" * 60)
+    print("⚙️  BILAN DU PIPELINE")
+    print(f"  • Réseau: {workers} thread(s), {stats.pages} page(s) téléchargée(s), "
+          f"{stats.erreurs_reseau} erreur(s), {stats.octets / 1024:.0f} Ko")
+    if stats.pages:
+        print(f"  • Temps moyen de téléchargement: {stats.duree_reseau / stats.pages * 1000:.0f} ms")
+    print(f"  • Analyse: {workers_analyse} processus")
+    print(f"  • File: occupation max {stats.file_max}/{taille_file}, "
+          f"attente cumulée des threads réseau {stats.attente_file:.1f} s")
+    if duree > 0:
+        print(f"  • Débit: {termines / duree:.1f} candidat(s)/s sur {duree:.1f} s")
+    controle.afficher_bilan()
+
+    if conserver:
+        resultats.trier_par_position()
+    return resultats
@@ -2,15 +2,85 @@
 # -*- coding: utf-8 -*-
 """
 Script pour rechercher les résultats BAC en lot à partir d'un fichier de matricules
-Usage: python recherche_batch.py [fichier_matricules]
+Usage: python recherche_batch.py [fichier_matricules] [--workers N] [--rps R]
+       cat matricules.txt | python recherche_batch.py - > resultats.ndjson
 """
 
 import sys
 import time
 import os
-import requests
-from bs4 import BeautifulSoup
+import json
 import re
+import argparse
+from contextlib import redirect_stdout
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+import analyse_html
+import client_http
+from extraction import extraire_resultat, extraire_sans_mesure
+from introuvables import TTL_INTROUVABLES, page_introuvable
+from controle import ControleTrafic, FileReprises, TENTATIVES_PAR_DEFAUT
+from metriques import (METRIQUES, EcrivainMetriques, Profileur,
+                       demarrer_serveur_metriques, INTERVALLE_ECRITURE)
+from statistiques import AgregateurStatistiques
+from table_resultats import TableResultats
+from base_resultats import BaseResultats, CHEMIN_BASE
+from archive import CHEMIN_ARCHIVE
+from sortie import (EcrivainResultats, lire_resultats_jsonl, lire_resultats,
+                    preparer_reprise, peut_changer, appliquer_mises_a_jour,
+                    FLUSH_PAR_DEFAUT)
+
+
+# Paramètres par défaut du traitement concurrent
+WORKERS_PAR_DEFAUT = 4
+REQUETES_PAR_SECONDE_PAR_DEFAUT = 2.0
+
+# File de travail partagée (voir file_travail.py) : durée d'un bail en
+# secondes, et tentatives tous travailleurs confondus avant de garder une erreur
+DUREE_BAIL_PAR_DEFAUT = 60.0
+TENTATIVES_FILE_PAR_DEFAUT = 3
+
+_FIN = object()
+
+# Balises fermant un bloc de page (fin possible du bloc de résultat)
+_FIN_BLOC = re.compile(rb'</(?:table|div|section|main)\s*>', re.IGNORECASE)
+
+
+def iterer_matricules(lignes, dedupliquer=True):
+    """
+    Lit les matricules au fil de l'eau depuis un itérable de lignes
+    (fichier ouvert, sys.stdin...) et produit des couples (nom, matricule)
+    Format attendu: nom:matricule ou juste matricule
+    Les doublons sont ignorés à la volée si `dedupliquer` est vrai.
+    """
+    vus = set()
+    for ligne_num, ligne in enumerate(lignes, 1):
+        ligne = ligne.strip()
+        if not ligne or ligne.startswith('#'):
+            continue
+        
+        # Gérer les formats: "nom:matricule" ou juste "matricule"
+        if ':' in ligne:
+            nom, matricule = ligne.split(':', 1)
+            matricule = matricule.strip()
+            nom = nom.strip()
+        else:
+            matricule = ligne.strip()
+            nom = f"Candidat_{matricule}"
+        
+        # Vérifier que le matricule est valide
+        if not matricule.isdigit():
+            print(f"⚠️  Ligne {ligne_num}: Matricule invalide '{matricule}' ignoré")
+            continue
+
+        if dedupliquer:
+            if matricule in vus:
+                continue
+            vus.add(matricule)
+        yield nom, matricule
 
 
 def lire_matricules(fichier_path):
@@ -18,29 +88,9 @@ def lire_matricules(fichier_path):
     Lit les matricules depuis un fichier texte
     Format attendu: nom:matricule ou juste matricule
     """
-    matricules = []
-    
     try:
         with open(fichier_path, 'r', encoding='utf-8') as f:
-            for ligne_num, ligne in enumerate(f, 1):
-                ligne = ligne.strip()
-                if not ligne or ligne.startswith('#'):
-                    continue
-                
-                # Gérer les formats: "nom:matricule" ou juste "matricule"
-                if ':' in ligne:
-                    nom, matricule = ligne.split(':', 1)
-                    matricule = matricule.strip()
-                    nom = nom.strip()
-                else:
-                    matricule = ligne.strip()
-                    nom = f"Candidat_{matricule}"
-                
-                # Vérifier que le matricule est valide
-                if matricule.isdigit():
-                    matricules.append((nom, matricule))
-                else:
-                    print(f"⚠️  Ligne {ligne_num}: Matricule invalide '{matricule}' ignoré")
+            return list(iterer_matricules(f, dedupliquer=False))
     
     except FileNotFoundError:
         print(f"❌ Fichier '{fichier_path}' non trouvé")
@@ -48,210 +98,304 @@ def lire_matricules(fichier_path):
     except Exception as e:
         print(f"❌ Erreur lors de la lecture du fichier: {e}")
         return []
+
+
+def analyser_contenu(contenu, numero_candidat, backend=None):
+    """
+    Extrait les informations BAC du contenu HTML d'une page
+    """
+    text = analyse_html.texte_resultat(contenu, backend)
     
-    return matricules
+    # Extraire les informations (moteur commun, une seule passe)
+    return extraire_resultat(text, numero_candidat).vers_dict()
+
+
+def detecteur_bloc_resultat(numero_candidat):
+    """
+    Fonction début de page (bytearray) -> bool pour
+    client_http.telecharger(suffisant=...)
+
+    Le début reçu est coupé après la dernière balise fermante de bloc : s'il
+    contient déjà le numéro, la moyenne, la série et la décision (ou, sans
+    décision, si le bloc de résultat est refermé), la suite de la page (pied
+    de page, etc.) est inutile. Une page « aucun résultat » s'arrête de même
+    dès que sa signature est reçue, et une page plus grande que ce qui sera
+    analysé (analyse_html.TAILLE_MAX_PAGE) dès cette taille atteinte.
+    Le temps de ces analyses successives est compté dans l'étape 'detection'.
+    """
+    examine = 0
+    dernier_bloc = 0
+
+    def suffisant(debut):
+        nonlocal examine, dernier_bloc
+        if len(debut) >= analyse_html.TAILLE_MAX_PAGE:
+            return True
+        fin = None
+        # Reprendre un peu avant la fin précédente : balise à cheval sur deux blocs
+        for match in _FIN_BLOC.finditer(debut, max(0, examine - 16)):
+            fin = match.end()
+        examine = len(debut)
+        if fin is None or fin <= dernier_bloc:
+            return False
+        dernier_bloc = fin
+        with METRIQUES.mesurer('detection'):
+            # Seule copie du tampon, à chaque nouvelle balise fermante de bloc
+            page = bytes(memoryview(debut)[:fin])
+            if page_introuvable(page, numero_candidat):
+                return True
+            bloc, ferme = analyse_html.delimiter_bloc_resultat(page)
+            resultat = extraire_sans_mesure(
+                analyse_html.texte_page_sans_mesure(bloc, 'brut'), numero_candidat)
+        return (resultat.trouve and resultat.moyenne is not None
+                and resultat.serie is not None
+                and (resultat.decision is not None or ferme))
+
+    return suffisant
 
 
 def extraire_info_bac(numero_candidat):
     """
     Recherche et extrait les informations détaillées du BAC
     """
-    url = f'https://www.mauribac.com/fr/bac-2024-uKolupoGL/numero/{numero_candidat}/'
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        
-        soup = BeautifulSoup(response.content, 'html.parser', from_encoding='utf-8')
-        text = soup.get_text()
-        
-        # Extraire les informations
-        info = {
-            'statut': 'Non déterminé',
-            'admission': 'Non trouvé',
-            'serie': 'Non spécifiée',
-            'moyenne': 'Non disponible'
-        }
-        
-        # Rechercher le statut et l'admission avec logique améliorée
-        text_lower = text.lower()
-        moyenne_val = None
-        
-        # D'abord extraire la moyenne pour la logique de fallback
-        moyenne_match = re.search(r'المعدل\s*(\d+\.?\d*)', text)
-        if not moyenne_match:
-            moyenne_match = re.search(r'moyenne?\s*[:\-]?\s*(\d+[.,]\d+)', text, re.IGNORECASE)
-        if moyenne_match:
-            moyenne_val = float(moyenne_match.group(1).replace(',', '.'))
-            info['moyenne'] = moyenne_match.group(1).replace(',', '.')
-        
-        # Détection du statut avec patterns et logique de moyenne
-        if re.search(r'ناجح|réussi|admis|decision.*admis', text, re.IGNORECASE):
-            info['statut'] = 'Admis'
-            info['admission'] = 'Admis'
-        elif re.search(r'راسب|échec|refusé|decision.*refusé', text, re.IGNORECASE):
-            info['statut'] = 'Échec'
-            info['admission'] = 'Refusé'
-        elif moyenne_val is not None and numero_candidat in text:
-            # Logique basée sur la moyenne
-            if moyenne_val >= 10.0:
-                info['statut'] = 'Admis (moyenne ≥10)'
-                info['admission'] = 'Admis'
-            elif moyenne_val >= 8.0:
-                info['statut'] = 'Session de rattrapage (8 ≤ moyenne < 10)'
-                info['admission'] = 'Session de rattrapage'
-            else:
-                info['statut'] = 'Échec (moyenne <8)'
-                info['admission'] = 'Échec'
-        elif numero_candidat in text and ('bac' in text_lower or 'decision' in text_lower):
-            info['statut'] = 'Trouvé (statut à vérifier)'
-            info['admission'] = 'À vérifier'
-        
-        # Rechercher la série
-        if 'العلوم الطبيعية' in text or 'sciences naturelles' in text.lower() or 'sn' in text.lower():
-            info['serie'] = 'BAC - Sciences naturelles (SN)'
-        elif 'الرياضيات' in text or 'sciences mathématiques' in text.lower() or 'sm' in text.lower():
-            info['serie'] = 'BAC - Sciences mathématiques (SM)'
-        elif 'الآداب' in text or 'lettres' in text.lower():
-            info['serie'] = 'BAC - Lettres'
-        
-        return True, info
+        response = client_http.telecharger(numero_candidat)
+        return True, analyser_contenu(response.content, numero_candidat)
         
+    except client_http.CandidatIntrouvable:
+        return False, {'statut': 'Numéro inexistant'}
     except requests.exceptions.RequestException:
         return False, {'statut': 'Erreur de connexion', 'admission': 'Erreur', 'serie': 'Erreur', 'moyenne': 'Erreur'}
     except Exception:
         return False, {'statut': 'Erreur inconnue', 'admission': 'Erreur', 'serie': 'Erreur', 'moyenne': 'Erreur'}
 
 
-def rechercher_resultats_batch(matricules):
+def formater_resultat(nom, matricule, success, info):
+    """
+    Construit le résultat d'un candidat et les lignes à afficher
+    """
+    lignes = []
+    if success:
+        resultat = {
+            'nom': nom,
+            'matricule': matricule,
+            'statut': info['statut'],
+            'admission': info['admission'],
+            'serie': info['serie'],
+            'moyenne': info['moyenne']
+        }
+        lignes.append(f"✅ Résultat trouvé pour {nom}")
+        lignes.append(f"   📊 Statut: {info['statut']}")
+        lignes.append(f"   🎓 Admission: {info['admission']}")
+        lignes.append(f"   📚 Série: {info['serie']}")
+        lignes.append(f"   📈 Moyenne: {info['moyenne']}")
+    else:
+        resultat = {
+            'nom': nom,
+            'matricule': matricule,
+            'statut': info['statut'],
+            'admission': 'Non trouvé',
+            'serie': 'Non spécifiée',
+            'moyenne': 'Non disponible'
+        }
+        lignes.append(f"❌ Aucun résultat pour {nom}: {info['statut']}")
+
+    return resultat, lignes
+
+
+def formater_erreur(nom, matricule, erreur):
+    """
+    Résultat d'un candidat dont le traitement a levé une exception
+    """
+    resultat = {
+        'nom': nom,
+        'matricule': matricule,
+        'statut': f'Erreur: {erreur}',
+        'admission': 'Erreur',
+        'serie': 'Erreur',
+        'moyenne': 'Erreur'
+    }
+    return resultat, [f"❌ Erreur pour {nom}: {erreur}"]
+
+
+def traiter_candidat(nom, matricule):
+    """
+    Recherche un candidat et retourne (résultat, lignes à afficher)
+    """
+    try:
+        # Utiliser la nouvelle fonction d'extraction
+        success, info = extraire_info_bac(matricule)
+        return formater_resultat(nom, matricule, success, info)
+    except Exception as e:
+        return formater_erreur(nom, matricule, e)
+
+
+def telecharger_controle(matricule, controle, suffisant=None):
     """
-    Recherche les résultats pour une liste de matricules
+    Télécharge la page d'un candidat sous le contrôle de trafic ; une page
+    servie sans réseau (cache frais, mode hors ligne) ne consomme ni débit
+    ni place de concurrence
+    """
+    response, entree = client_http.consulter_cache(matricule)
+    if response is not None:
+        return response
+    return controle.executer(client_http.telecharger_reseau, matricule, entree,
+                             suffisant=suffisant)
+
+
+def rechercher_candidat(nom, matricule, controle, lecture_partielle=False):
     """
-    print(f"🎓 Recherche en lot - {len(matricules)} candidat(s) à traiter")
+    Recherche un candidat sous le contrôle de trafic et retourne
+    (résultat, lignes à afficher) ; les erreurs réseau sont propagées
+    (RequestException) pour que l'appelant puisse reprogrammer le candidat
+    Avec `lecture_partielle`, le téléchargement s'arrête après le bloc de résultat.
+    Un numéro du cache négatif est écarté sans requête ni consommation du débit,
+    et une page en cache est lue sans passer par le contrôle de trafic.
+    """
+    if client_http.est_introuvable(matricule):
+        METRIQUES.compter('introuvables:source=cache_negatif')
+        return formater_resultat(nom, matricule, False,
+                                 {'statut': 'Numéro inexistant (cache négatif)'})
+    suffisant = detecteur_bloc_resultat(matricule) if lecture_partielle else None
+    try:
+        response = telecharger_controle(matricule, controle, suffisant)
+    except client_http.CandidatIntrouvable:
+        return formater_resultat(nom, matricule, False, {'statut': 'Numéro inexistant'})
+    try:
+        return formater_resultat(nom, matricule, True,
+                                 analyser_contenu(response.content, matricule))
+    except Exception as e:
+        return formater_erreur(nom, matricule, e)
+
+
+def rechercher_resultats_batch(matricules, workers=WORKERS_PAR_DEFAUT,
+                               requetes_par_seconde=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                               sur_resultat=None, conserver=True,
+                               tentatives=TENTATIVES_PAR_DEFAUT, adaptatif=True,
+                               profileur=None, lecture_partielle=False):
+    """
+    Recherche les résultats pour une liste (ou un itérable) de matricules
+
+    Jusqu'à `workers` requêtes sont en cours simultanément, et le débit
+    global est plafonné à `requetes_par_seconde` (None = sans limite).
+    Avec `adaptatif`, la concurrence réelle s'ajuste entre 1 et `workers`
+    selon la santé du site (AIMD) ; un candidat dont la requête échoue
+    (timeout, 429, 5xx) est reprogrammé jusqu'à `tentatives` fois avant
+    d'être marqué en erreur.
+    `sur_resultat` est appelé avec chaque résultat dès qu'il est disponible.
+    Avec conserver=True, les résultats sont aussi retournés dans l'ordre des
+    matricules, sous forme de TableResultats (itérer dessus donne les dicts
+    habituels) ; avec conserver=False rien n'est gardé en mémoire et la
+    fonction retourne None.
+    Avec un `profileur` (metriques.Profileur), un échantillon des recherches
+    est profilé avec cProfile. Avec `lecture_partielle`, chaque téléchargement
+    s'arrête dès que le bloc de résultat est reçu.
+    """
+    # Un itérable sans longueur (plage, flux) est consommé au fur et à mesure
+    total = len(matricules) if hasattr(matricules, '__len__') else '?'
+    print(f"🎓 Recherche en lot - {total} candidat(s) à traiter")
+    print(f"⚙️  {workers} requête(s) simultanée(s){' au plus (adaptatif)' if adaptatif else ''}, "
+          f"{requetes_par_seconde or 'sans limite'} requête(s)/seconde, "
+          f"{tentatives} tentative(s) par candidat")
     print("=" * 60)
-    
-    resultats = []
-    
-    for i, (nom, matricule) in enumerate(matricules, 1):
-        print(f"\n[{i}/{len(matricules)}] Traitement de {nom} (#{matricule})")
-        print("-" * 50)
-        
+
+    workers = max(1, workers)
+    controle = ControleTrafic(workers, requetes_par_seconde, tentatives, adaptatif)
+    resultats = TableResultats() if conserver else None
+    termines = 0
+
+    # Les matricules sont consommés par un thread d'alimentation : une
+    # entrée lente (flux) ne retarde pas la sortie des résultats déjà prêts.
+    # Le nombre de candidats en cours (reprises comprises) est borné pour
+    # garder une mémoire constante.
+    file_termines = queue.Queue()
+    places = threading.BoundedSemaphore(2 * workers)
+    arret = threading.Event()
+
+    def tache(index, nom, matricule, tentative=1):
         try:
-            # Utiliser la nouvelle fonction d'extraction
-            success, info = extraire_info_bac(matricule)
-            
-            if success:
-                resultats.append({
-                    'nom': nom,
-                    'matricule': matricule,
-                    'statut': info['statut'],
-                    'admission': info['admission'],
-                    'serie': info['serie'],
-                    'moyenne': info['moyenne']
-                })
-                print(f"✅ Résultat trouvé pour {nom}")
-                print(f"   📊 Statut: {info['statut']}")
-                print(f"   🎓 Admission: {info['admission']}")
-                print(f"   📚 Série: {info['serie']}")
-                print(f"   📈 Moyenne: {info['moyenne']}")
+            if profileur:
+                resultat = profileur.executer(rechercher_candidat, nom, matricule,
+                                              controle, lecture_partielle)
             else:
-                resultats.append({
-                    'nom': nom,
-                    'matricule': matricule,
-                    'statut': info['statut'],
-                    'admission': 'Non trouvé',
-                    'serie': 'Non spécifiée',
-                    'moyenne': 'Non disponible'
-                })
-                print(f"❌ Aucun résultat pour {nom}: {info['statut']}")
-        
+                resultat = rechercher_candidat(nom, matricule, controle, lecture_partielle)
+        except requests.exceptions.RequestException as e:
+            if controle.reessayable(e, tentative) and not arret.is_set():
+                # Le candidat garde sa place jusqu'à son résultat définitif
+                reprises.programmer(controle.delai_reprise(tentative, e),
+                                    (index, nom, matricule, tentative + 1))
+                return
+            resultat = formater_resultat(nom, matricule, False,
+                                         {'statut': 'Erreur de connexion'})
         except Exception as e:
-            print(f"❌ Erreur pour {nom}: {e}")
-            resultats.append({
-                'nom': nom,
-                'matricule': matricule,
-                'statut': f'Erreur: {e}',
-                'admission': 'Erreur',
-                'serie': 'Erreur',
-                'moyenne': 'Erreur'
-            })
-        
-        # Pause entre les requêtes pour respecter le serveur
-        if i < len(matricules):
-            print("⏳ Pause de 3 secondes...")
-            time.sleep(3)
-    
+            resultat = formater_erreur(nom, matricule, e)
+        file_termines.put((index, nom, matricule, resultat))
+        places.release()
+
+    def alimenter(executor):
+        nombre = 0
+        erreur = None
+        try:
+            for i, (nom, matricule) in enumerate(matricules):
+                places.acquire()
+                if arret.is_set():
+                    break
+                executor.submit(tache, i, nom, matricule)
+                nombre += 1
+        except Exception as e:
+            erreur = e
+        file_termines.put((_FIN, nombre, erreur))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        reprises = FileReprises(lambda element: executor.submit(tache, *element))
+        threading.Thread(target=alimenter, args=(executor,), daemon=True).start()
+        try:
+            attendus = None
+            while attendus is None or termines < attendus:
+                element = file_termines.get()
+                if element[0] is _FIN:
+                    _, attendus, erreur = element
+                    if erreur:
+                        raise erreur
+                    continue
+
+                index, nom, matricule, (resultat, lignes) = element
+                termines += 1
+
+                # Afficher le bloc d'un candidat d'un seul tenant
+                print(f"\n[{termines}/{total}] Traitement de {nom} (#{matricule})")
+                print("-" * 50)
+                for ligne in lignes:
+                    print(ligne)
+
+                if sur_resultat:
+                    sur_resultat(resultat)
+                if conserver:
+                    resultats.ajouter(resultat, index)
+        except BaseException:
+            # Interruption : ne pas attendre les tâches encore en file
+            arret.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            reprises.arreter()
+
+    controle.afficher_bilan()
+
+    if conserver:
+        resultats.trier_par_position()
     return resultats
 
 
 def afficher_resume(resultats):
     """
     Affiche un résumé des résultats avec support session de rattrapage
+    Un seul parcours, en mémoire constante : `resultats` peut être un flux.
     """
-    print("\n" + "=" * 60)
-    print("📊 RÉSUMÉ DE LA RECHERCHE EN LOT")
-    print("=" * 60)
-    
-    total = len(resultats)
-    admis = len([r for r in resultats if r['admission'] == 'Admis'])
-    refuses = len([r for r in resultats if r['admission'] in ['Refusé', 'Échec']])
-    rattrapage = len([r for r in resultats if r['admission'] == 'Session de rattrapage'])
-    non_trouves = len([r for r in resultats if r['admission'] == 'Non trouvé'])
-    a_verifier = len([r for r in resultats if r['admission'] == 'À vérifier'])
-    erreurs = len([r for r in resultats if r['admission'] == 'Erreur'])
-    
-    print(f"📈 Total candidats traités: {total}")
-    print(f"✅ Admis: {admis}")
-    print(f"🔄 Session de rattrapage: {rattrapage}")
-    print(f"❌ Refusés/Échec: {refuses}")
-    print(f"🔍 À vérifier: {a_verifier}")
-    print(f"❓ Non trouvés: {non_trouves}")
-    print(f"⚠️  Erreurs: {erreurs}")
-    
-    # Statistiques par série
-    series = {}
-    for r in resultats:
-        if r['serie'] != 'Erreur' and r['serie'] != 'Non spécifiée':
-            series[r['serie']] = series.get(r['serie'], 0) + 1
-    
-    if series:
-        print("\n📚 Répartition par série:")
-        for serie, count in series.items():
-            print(f"  • {serie}: {count} candidat(s)")
-    
-    # Statistiques par moyenne
-    moyennes_valides = []
+    stats = AgregateurStatistiques()
     for r in resultats:
-        if r['moyenne'] != 'Non disponible' and r['moyenne'] != 'Erreur':
-            try:
-                moyenne_val = float(r['moyenne'].replace(',', '.'))
-                moyennes_valides.append(moyenne_val)
-            except:
-                pass
-    
-    if moyennes_valides:
-        moyenne_generale = sum(moyennes_valides) / len(moyennes_valides)
-        print(f"\n📊 Statistiques des moyennes:")
-        print(f"  • Moyenne générale: {moyenne_generale:.2f}")
-        print(f"  • Moyenne min: {min(moyennes_valides):.2f}")
-        print(f"  • Moyenne max: {max(moyennes_valides):.2f}")
-        print(f"  • Candidats avec moyenne: {len(moyennes_valides)}/{total}")
-    
-    if erreurs > 0:
-        print("\n🔍 Détail des erreurs:")
-        for r in resultats:
-            if r['admission'] == 'Erreur':
-                print(f"  • {r['nom']} (#{r['matricule']}): {r['statut']}")
+        stats.ajouter(r)
+    stats.afficher()
+    return stats
 
 
 def sauvegarder_resultats(resultats, fichier_sortie="resultats_batch.txt"):
@@ -279,19 +423,330 @@ def sauvegarder_resultats(resultats, fichier_sortie="resultats_batch.txt"):
         print(f"❌ Erreur lors de la sauvegarde: {e}")
 
 
+def lancer_recherche(matricules, args, sur_resultat, profileur=None):
+    """
+    Lance la recherche avec le moteur choisi en ligne de commande
+    """
+    if args.pipeline:
+        from pipeline import rechercher_resultats_pipeline
+        if args.profil:
+            print("⚠️  --profil n'est pas disponible en mode --pipeline (ignoré)")
+        options = {}
+        if args.workers_analyse:
+            options['workers_analyse'] = args.workers_analyse
+        if args.file_attente:
+            options['taille_file'] = args.file_attente
+        rechercher_resultats_pipeline(matricules, workers=args.workers,
+                                      requetes_par_seconde=args.rps or None,
+                                      sur_resultat=sur_resultat, conserver=False,
+                                      tentatives=args.tentatives,
+                                      adaptatif=not args.concurrence_fixe,
+                                      lecture_partielle=args.lecture_partielle, **options)
+    else:
+        rechercher_resultats_batch(matricules, workers=args.workers,
+                                   requetes_par_seconde=args.rps or None,
+                                   sur_resultat=sur_resultat, conserver=False,
+                                   tentatives=args.tentatives,
+                                   adaptatif=not args.concurrence_fixe,
+                                   profileur=profileur,
+                                   lecture_partielle=args.lecture_partielle)
+
+
+def demarrer_metriques(args):
+    """
+    Export des mesures choisi en ligne de commande : fichier réécrit
+    périodiquement et/ou endpoint HTTP /metrics ; retourne l'écrivain
+    du fichier (None si pas de fichier)
+    """
+    if args.metriques_port:
+        demarrer_serveur_metriques(args.metriques_port)
+        print(f"📈 Métriques: http://127.0.0.1:{args.metriques_port}/metrics")
+    if args.metriques_fichier:
+        print(f"📈 Métriques: {args.metriques_fichier} (toutes les "
+              f"{args.metriques_intervalle:.0f} s)")
+        return EcrivainMetriques(args.metriques_fichier, args.metriques_intervalle)
+    return None
+
+
+def ouvrir_base(args):
+    """
+    Base locale des résultats choisie en ligne de commande (None si désactivée)
+    """
+    return None if args.sans_base else BaseResultats(args.base)
+
+
+def traiter_flux(args):
+    """
+    Mode flux (non interactif) : matricules lus au fil de l'eau depuis
+    l'entrée standard ou un fichier, un résultat NDJSON par ligne sur la
+    sortie standard dès qu'il est prêt. Les messages de progression sont
+    envoyés sur la sortie d'erreur.
+    """
+    sortie_ndjson = sys.stdout
+    stats = AgregateurStatistiques()
+    base = ouvrir_base(args)
+    with redirect_stdout(sys.stderr):
+        ecrivain_metriques = demarrer_metriques(args)
+    stats.demarrer_chrono()
+
+    def ecrire(resultat):
+        sortie_ndjson.write(json.dumps(resultat, ensure_ascii=False) + '\n')
+        sortie_ndjson.flush()
+        stats.ajouter(resultat)
+        if base:
+            base.ajouter(resultat)
+        if args.stats_tous and stats.total % args.stats_tous == 0:
+            print(f"\n{stats.ligne_progression()}")
+
+    entree = sys.stdin if args.fichier == '-' else open(args.fichier, 'r', encoding='utf-8')
+    try:
+        with redirect_stdout(sys.stderr):
+            lancer_recherche(iterer_matricules(entree), args, ecrire)
+            METRIQUES.afficher()
+    except KeyboardInterrupt:
+        print("\n⏸️  Flux interrompu", file=sys.stderr)
+    except BrokenPipeError:
+        # Lecteur de la sortie fermé (ex: | head) : arrêt silencieux
+        sys.stderr.close()
+    finally:
+        if base:
+            base.fermer()
+        if ecrivain_metriques:
+            ecrivain_metriques.arreter()
+        if entree is not sys.stdin:
+            entree.close()
+
+
+def source_rafraichissement(prefixe):
+    """
+    Sortie précédente à rafraîchir : `<prefixe>.jsonl`, sinon le rapport
+    `<prefixe>.txt` des versions qui n'écrivaient pas de flux JSONL
+    """
+    for extension in ('jsonl', 'txt'):
+        chemin = f"{prefixe}.{extension}"
+        if os.path.exists(chemin):
+            return chemin
+    return None
+
+
+def rafraichir(args):
+    """
+    Rafraîchissement : ne recherche à nouveau que les candidats dont le
+    statut peut encore changer (rattrapage, à vérifier, erreurs) dans la
+    sortie précédente, puis y fusionne les nouveaux résultats
+
+    Les nouveaux résultats sont d'abord écrits dans `<sortie>.rafraichi.jsonl`
+    (rien n'est perdu en cas d'interruption) ; la fusion conserve l'ordre
+    et n'écrase jamais un résultat par une erreur.
+    """
+    source = source_rafraichissement(args.sortie)
+    if not source:
+        print(f"❌ Aucune sortie précédente ({args.sortie}.jsonl ou {args.sortie}.txt)")
+        return
+
+    a_rechercher = {}
+    total = 0
+    for resultat in lire_resultats(source):
+        total += 1
+        if peut_changer(resultat):
+            a_rechercher[resultat['matricule']] = resultat['nom']
+    print(f"🔁 Rafraîchissement de {source}: {len(a_rechercher)} candidat(s) sur {total} "
+          f"dont le statut peut encore changer")
+    if not a_rechercher:
+        print("✅ Tous les résultats sont définitifs, rien à rechercher")
+        return
+
+    if not args.oui:
+        reponse = input(f"\n🤔 Rechercher à nouveau {len(a_rechercher)} candidat(s)? (o/N): ")
+        if reponse.lower() not in ['o', 'oui', 'y', 'yes']:
+            print("🚫 Rafraîchissement annulé")
+            return
+
+    matricules = [(nom, matricule) for matricule, nom in a_rechercher.items()]
+    stats = AgregateurStatistiques()
+    stats.demarrer_chrono(len(matricules))
+    mises_a_jour = {}
+    base = ouvrir_base(args)
+    ecrivain_metriques = demarrer_metriques(args)
+    with EcrivainResultats(f"{args.sortie}.rafraichi", formats=('jsonl',),
+                           flush_tous=args.flush) as ecrivain:
+        def sur_resultat(resultat):
+            ecrivain.ajouter(resultat)
+            mises_a_jour[resultat['matricule']] = resultat
+            if base:
+                base.ajouter(resultat)
+            stats.ajouter(resultat)
+            if args.stats_tous and stats.total % args.stats_tous == 0:
+                print(f"\n{stats.ligne_progression()}")
+
+        try:
+            lancer_recherche(matricules, args, sur_resultat)
+        except KeyboardInterrupt:
+            print(f"\n⏸️  Rafraîchissement interrompu après {ecrivain.nombre} résultat(s) ; "
+                  "fusion des résultats obtenus")
+        finally:
+            if base:
+                base.fermer()
+            if ecrivain_metriques:
+                ecrivain_metriques.arreter()
+
+    # Fusion dans la sortie complète (JSONL et CSV réécrits, ordre conservé)
+    changements = appliquer_mises_a_jour(lire_resultats(source), mises_a_jour, args.sortie)
+    print(f"\n🧩 {len(mises_a_jour)} résultat(s) fusionné(s) dans {args.sortie}.jsonl/.csv, "
+          f"{len(changements)} statut(s) modifié(s)")
+    transitions = {}
+    for ancien, nouveau in changements:
+        cle = (ancien['admission'], nouveau['admission'])
+        transitions[cle] = transitions.get(cle, 0) + 1
+    for (avant, apres), nombre in sorted(transitions.items(), key=lambda t: -t[1]):
+        print(f"  • {avant} → {apres}: {nombre}")
+    os.remove(ecrivain.chemin('jsonl'))
+
+    afficher_resume(lire_resultats_jsonl(f"{args.sortie}.jsonl"))
+    sauvegarder_resultats(lire_resultats_jsonl(f"{args.sortie}.jsonl"), f"{args.sortie}.txt")
+
+
 def main():
     """
     Fonction principale
     """
-    # Déterminer le fichier à utiliser
-    if len(sys.argv) > 1:
-        fichier_matricules = sys.argv[1]
-    else:
-        fichier_matricules = "etu.txt"
-    
+    parser = argparse.ArgumentParser(
+        description="Recherche les résultats BAC en lot à partir d'un fichier de matricules")
+    parser.add_argument('fichier', nargs='?', default='etu.txt',
+                        help="fichier de matricules (nom:matricule par ligne), "
+                             "'-' pour l'entrée standard (mode flux)")
+    parser.add_argument('--workers', type=int, default=WORKERS_PAR_DEFAUT,
+                        help="nombre maximal de requêtes simultanées (défaut: %(default)s)")
+    parser.add_argument('--rps', type=float, default=REQUETES_PAR_SECONDE_PAR_DEFAUT,
+                        help="plafond global de requêtes par seconde, 0 = sans limite "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--tentatives', type=int, default=TENTATIVES_PAR_DEFAUT,
+                        help="tentatives par candidat en cas de timeout, 429 ou 5xx, "
+                             "avec attente exponentielle (défaut: %(default)s)")
+    parser.add_argument('--concurrence-fixe', action='store_true',
+                        help="garder --workers requêtes simultanées au lieu d'ajuster "
+                             "la concurrence à la santé du site")
+    parser.add_argument('--ttl', type=float, default=None,
+                        help="durée de validité du cache de pages en secondes "
+                             f"(défaut: {client_http.TTL_PAR_DEFAUT})")
+    parser.add_argument('--hors-ligne', action='store_true',
+                        help="n'utiliser que le cache, sans accès réseau")
+    parser.add_argument('--sans-cache', action='store_true',
+                        help="désactiver le cache de pages")
+    parser.add_argument('--parseur', choices=analyse_html.BACKENDS,
+                        default=analyse_html.backend_actif(),
+                        help="backend d'analyse HTML (défaut: %(default)s)")
+    parser.add_argument('--archive', nargs='?', const=CHEMIN_ARCHIVE, default=None,
+                        metavar='SQLITE',
+                        help="archiver chaque page téléchargée, compressée (défaut: "
+                             f"{CHEMIN_ARCHIVE} ; voir python archive.py stats)")
+    parser.add_argument('--lecture-partielle', action='store_true',
+                        help="arrêter chaque téléchargement dès que le bloc de résultat "
+                             "est reçu (moins d'octets, mais une connexion par page)")
+    parser.add_argument('--sortie', default='resultats_batch',
+                        help="préfixe des fichiers de sortie .jsonl/.csv/.txt "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--flush', type=int, default=FLUSH_PAR_DEFAUT,
+                        help="nombre de résultats entre deux écritures sur disque "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--base', default=CHEMIN_BASE,
+                        help="base SQLite où enregistrer les résultats (défaut: %(default)s)")
+    parser.add_argument('--sans-base', action='store_true',
+                        help="ne pas enregistrer les résultats dans la base SQLite")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="séparer téléchargement (threads) et analyse (processus)")
+    parser.add_argument('--workers-analyse', type=int, default=None,
+                        help="processus d'analyse en mode --pipeline "
+                             "(défaut: nombre de cœurs - 1)")
+    parser.add_argument('--file-attente', type=int, default=None,
+                        help="pages en attente d'analyse au maximum en mode --pipeline")
+    parser.add_argument('--flux', action='store_true',
+                        help="mode flux non interactif : lecture au fil de l'eau, "
+                             "résultats NDJSON sur la sortie standard")
+    parser.add_argument('-o', '--oui', action='store_true',
+                        help="ne pas demander de confirmation")
+    parser.add_argument('--stats-tous', type=int, default=100,
+                        help="afficher les statistiques en cours tous les N résultats, "
+                             "0 pour désactiver (défaut: %(default)s)")
+    parser.add_argument('--reprendre', action='store_true',
+                        help="reprendre un traitement interrompu : ignorer les matricules "
+                             "déjà traités avec succès dans le flux de sortie")
+    parser.add_argument('--sans-cache-negatif', action='store_true',
+                        help="rechercher aussi les numéros déjà reconnus comme inexistants "
+                             "(cache négatif de la session)")
+    parser.add_argument('--ttl-cache-negatif', type=float, default=None,
+                        help="durée de validité du cache négatif en secondes, "
+                             "indépendante de --ttl et de --rafraichir "
+                             f"(défaut: {TTL_INTROUVABLES})")
+    parser.add_argument('--rafraichir', action='store_true',
+                        help="rechercher à nouveau uniquement les candidats dont le statut "
+                             "peut changer (rattrapage, à vérifier, erreurs) dans la sortie "
+                             "précédente, et y fusionner les résultats")
+    parser.add_argument('--file-travail', default=None, metavar='SQLITE',
+                        help="répartir la recherche via une file de travail partagée : "
+                             "avec un fichier de matricules, remplir la file, suivre "
+                             "l'avancement et fusionner (coordinateur)")
+    parser.add_argument('--travailleur', action='store_true',
+                        help="traiter les candidats de --file-travail jusqu'à ce qu'elle "
+                             "soit vide (à lancer sur chaque nœud)")
+    parser.add_argument('--travailleurs-locaux', type=int, default=0, metavar='N',
+                        help="coordinateur : lancer aussi N travailleurs sur cette machine "
+                             "(--rps réparti entre eux)")
+    parser.add_argument('--bail', type=float, default=DUREE_BAIL_PAR_DEFAUT,
+                        help="durée en secondes d'un bail sur un candidat de la file ; "
+                             "un travailleur arrêté perd ses candidats après ce délai "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--tentatives-file', type=int, default=TENTATIVES_FILE_PAR_DEFAUT,
+                        help="candidats en erreur : remises en file avant de garder "
+                             "l'erreur (défaut: %(default)s)")
+    parser.add_argument('--metriques-fichier', default=None,
+                        help="fichier de métriques (format texte Prometheus) réécrit "
+                             "périodiquement")
+    parser.add_argument('--metriques-intervalle', type=float, default=INTERVALLE_ECRITURE,
+                        help="secondes entre deux écritures du fichier de métriques "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--metriques-port', type=int, default=None,
+                        help="exposer les métriques sur http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--profil', type=float, default=0, metavar='TAUX',
+                        help="profiler avec cProfile cette proportion des recherches "
+                             "(ex. 0.05) ; profil écrit dans <sortie>.prof")
+    args = parser.parse_args()
+    if args.rafraichir and (args.reprendre or args.flux):
+        parser.error("--rafraichir ne se combine pas avec --reprendre ou --flux")
+    if (args.travailleur or args.travailleurs_locaux) and not args.file_travail:
+        parser.error("--travailleur et --travailleurs-locaux demandent --file-travail")
+    if args.file_travail and (args.reprendre or args.flux or args.rafraichir):
+        parser.error("--file-travail ne se combine pas avec --reprendre, --flux "
+                     "ou --rafraichir (la file est déjà reprenable)")
+
+    analyse_html.configurer(args.parseur)
+
+    # En rafraîchissement, les pages en cache sont revalidées auprès du site
+    ttl = 0 if args.rafraichir and args.ttl is None else args.ttl
+    client_http.configurer_cache(actif=not args.sans_cache, ttl=ttl,
+                                 hors_ligne=args.hors_ligne,
+                                 introuvables=not args.sans_cache_negatif,
+                                 ttl_introuvables=args.ttl_cache_negatif)
+    client_http.configurer_archive(args.archive)
+
+    if args.rafraichir:
+        rafraichir(args)
+        return
+
+    if args.travailleur:
+        from file_travail import travailler
+        travailler(args)
+        return
+
+    fichier_matricules = args.fichier
+
+    if args.flux or fichier_matricules == '-':
+        traiter_flux(args)
+        return
+
     if not os.path.exists(fichier_matricules):
         print(f"❌ Fichier '{fichier_matricules}' non trouvé")
-        print("Usage: python recherche_batch.py [fichier_matricules]")
+        print("Usage: python recherche_batch.py [fichier_matricules] [--workers N] [--rps R]")
         return
     
     print(f"📂 Lecture du fichier: {fichier_matricules}")
@@ -303,24 +758,77 @@ def main():
         print("❌ Aucun matricule valide trouvé")
         return
     
+    if args.file_travail:
+        from file_travail import coordonner
+        coordonner(args, matricules)
+        return
+
+    if args.reprendre:
+        termines = preparer_reprise(args.sortie)
+        restants = [(nom, matricule) for nom, matricule in matricules
+                    if matricule not in termines]
+        print(f"♻️  Reprise: {len(matricules) - len(restants)} candidat(s) déjà traité(s), "
+              f"{len(restants)} à (re)chercher")
+        matricules = restants
+
     print(f"📋 {len(matricules)} matricule(s) trouvé(s):")
     for nom, matricule in matricules:
         print(f"  • {nom}: {matricule}")
     
     # Demander confirmation
-    reponse = input(f"\n🤔 Continuer avec la recherche pour {len(matricules)} candidat(s)? (o/N): ")
-    if reponse.lower() not in ['o', 'oui', 'y', 'yes']:
-        print("🚫 Recherche annulée")
-        return
+    if not args.oui:
+        reponse = input(f"\n🤔 Continuer avec la recherche pour {len(matricules)} candidat(s)? (o/N): ")
+        if reponse.lower() not in ['o', 'oui', 'y', 'yes']:
+            print("🚫 Recherche annulée")
+            return
     
-    # Effectuer les recherches
-    resultats = rechercher_resultats_batch(matricules)
-    
-    # Afficher le résumé
-    afficher_resume(resultats)
+    # Statistiques mises à jour à chaque résultat (y compris ceux d'une
+    # exécution précédente en cas de reprise)
+    stats = AgregateurStatistiques()
+    if args.reprendre and os.path.exists(f"{args.sortie}.jsonl"):
+        for resultat in lire_resultats_jsonl(f"{args.sortie}.jsonl"):
+            stats.ajouter(resultat)
+
+    # Effectuer les recherches : chaque résultat est écrit dès qu'il arrive
+    # (fichiers de sortie, et base SQLite par transactions groupées)
+    base = ouvrir_base(args)
+    ecrivain_metriques = demarrer_metriques(args)
+    profileur = Profileur(args.profil, f"{args.sortie}.prof") if args.profil > 0 else None
+    stats.demarrer_chrono(stats.total + len(matricules))
+    with EcrivainResultats(args.sortie, flush_tous=args.flush,
+                           ajout=args.reprendre) as ecrivain:
+        def sur_resultat(resultat):
+            ecrivain.ajouter(resultat)
+            if base:
+                base.ajouter(resultat)
+            stats.ajouter(resultat)
+            if args.stats_tous and stats.total % args.stats_tous == 0:
+                print(f"\n{stats.ligne_progression()}")
+
+        try:
+            lancer_recherche(matricules, args, sur_resultat, profileur)
+        except KeyboardInterrupt:
+            print(f"\n⏸️  Traitement interrompu après {ecrivain.nombre} résultat(s)")
+            print("   Relancez avec --reprendre pour continuer là où il s'est arrêté")
+            return
+        finally:
+            if base:
+                base.fermer()
+            if ecrivain_metriques:
+                ecrivain_metriques.arreter()
+    print(f"\n📁 Flux de résultats: {ecrivain.chemin('jsonl')}, {ecrivain.chemin('csv')}")
+    if base:
+        print(f"🗄️  Base de résultats: {base.chemin} (python base_resultats.py requete --help)")
+
+    # Afficher le résumé (statistiques déjà calculées au fil de l'eau)
+    stats.afficher()
+    METRIQUES.afficher()
+    if profileur:
+        profileur.terminer()
     
-    # Sauvegarder les résultats
-    sauvegarder_resultats(resultats)
+    # Générer le rapport texte à partir du flux
+    sauvegarder_resultats(lire_resultats_jsonl(ecrivain.chemin('jsonl')),
+                          ecrivain.chemin('txt'))
     
     print("\n🎯 Traitement terminé!")
 
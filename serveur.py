@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur local de consultation des résultats (JSON)
+Processus long : imports, session HTTP et cache mémoire restent chauds, une
+consultation déjà faite répond en quelques millisecondes.
+
+- cache LRU en mémoire, de taille bornée et à durée de vie limitée ;
+- requêtes simultanées pour un même matricule regroupées en un seul
+  téléchargement ;
+- compteurs succès/échecs du cache sur /stats ;
+- temps par étape (réseau, analyse, extraction) au format Prometheus sur /metrics.
+
+Usage:
+    python serveur.py [--port 8080] [--taille-lru 10000] [--ttl-lru 600]
+    curl http://127.0.0.1:8080/resultat/19736
+    curl http://127.0.0.1:8080/stats
+    curl http://127.0.0.1:8080/metrics
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+import analyse_html
+import client_http
+from bac_simple import obtenir_resultat, ligne_info, MESSAGES_STATUT
+from metriques import METRIQUES
+
+
+# Paramètres par défaut du service
+HOTE_PAR_DEFAUT = '127.0.0.1'
+PORT_PAR_DEFAUT = 8080
+TAILLE_LRU_PAR_DEFAUT = 10000
+TTL_LRU_PAR_DEFAUT = 600
+
+
+class CacheLRU:
+    """
+    Cache mémoire thread-safe : au plus `taille_max` entrées, chacune
+    valable `ttl` secondes ; la moins récemment utilisée est évincée
+    """
+
+    def __init__(self, taille_max=TAILLE_LRU_PAR_DEFAUT, ttl=TTL_LRU_PAR_DEFAUT):
+        self.taille_max = max(1, taille_max)
+        self.ttl = ttl
+        self._entrees = OrderedDict()    # clé -> (valeur, date d'expiration)
+        self._verrou = threading.Lock()
+
+    def lire(self, cle):
+        """
+        Valeur en cache pour la clé, ou None si absente ou expirée
+        """
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                return None
+            valeur, expiration = entree
+            if time.monotonic() >= expiration:
+                del self._entrees[cle]
+                return None
+            self._entrees.move_to_end(cle)
+            return valeur
+
+    def ecrire(self, cle, valeur):
+        with self._verrou:
+            self._entrees[cle] = (valeur, time.monotonic() + self.ttl)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entrees)
+
+
+class _Consultation:
+    """Téléchargement en cours, partagé par les requêtes qui l'attendent"""
+
+    __slots__ = ('termine', 'resultat', 'erreur')
+
+    def __init__(self):
+        self.termine = threading.Event()
+        self.resultat = None
+        self.erreur = None
+
+
+class ServiceResultats:
+    """
+    Consultation des résultats avec cache LRU et regroupement des requêtes
+    """
+
+    def __init__(self, taille_lru=TAILLE_LRU_PAR_DEFAUT, ttl_lru=TTL_LRU_PAR_DEFAUT):
+        self.cache = CacheLRU(taille_lru, ttl_lru)
+        self.succes_cache = 0
+        self.echecs_cache = 0
+        self.regroupees = 0
+        self.erreurs = 0
+        self.debut = time.time()
+        self._en_cours = {}
+        self._verrou = threading.Lock()
+
+    def consulter(self, numero_candidat):
+        """
+        Retourne (résultat JSON, source) avec source 'memoire', 'regroupee'
+        ou 'recherche' ; les erreurs réseau sont propagées (et non mises en cache)
+        """
+        resultat = self.cache.lire(numero_candidat)
+        if resultat is not None:
+            with self._verrou:
+                self.succes_cache += 1
+            return resultat, 'memoire'
+
+        with self._verrou:
+            consultation = self._en_cours.get(numero_candidat)
+            proprietaire = consultation is None
+            if proprietaire:
+                consultation = _Consultation()
+                self._en_cours[numero_candidat] = consultation
+                self.echecs_cache += 1
+            else:
+                self.regroupees += 1
+
+        if not proprietaire:
+            # Une autre requête télécharge déjà cette page : attendre son résultat
+            consultation.termine.wait()
+            if consultation.erreur:
+                raise consultation.erreur
+            return consultation.resultat, 'regroupee'
+
+        try:
+            consultation.resultat = self._rechercher(numero_candidat)
+            self.cache.ecrire(numero_candidat, consultation.resultat)
+            return consultation.resultat, 'recherche'
+        except Exception as e:
+            consultation.erreur = e
+            with self._verrou:
+                self.erreurs += 1
+            raise
+        finally:
+            with self._verrou:
+                del self._en_cours[numero_candidat]
+            consultation.termine.set()
+
+    @staticmethod
+    def _rechercher(numero_candidat):
+        resultat, text = obtenir_resultat(numero_candidat)
+        return {
+            'matricule': numero_candidat,
+            **resultat.vers_dict(),
+            'code_statut': resultat.code_statut,
+            'message': MESSAGES_STATUT[resultat.code_statut],
+            'mention': resultat.mention,
+            'etablissement': resultat.etablissement,
+            'academie': resultat.academie,
+            'info': ligne_info(text, numero_candidat),
+        }
+
+    def statistiques(self):
+        with self._verrou:
+            consultations = self.succes_cache + self.echecs_cache + self.regroupees
+            return {
+                'succes_cache': self.succes_cache,
+                'echecs_cache': self.echecs_cache,
+                'regroupees': self.regroupees,
+                'erreurs': self.erreurs,
+                'taux_succes_cache': (round(self.succes_cache / consultations, 3)
+                                      if consultations else None),
+                'entrees_cache': len(self.cache),
+                'taille_max_cache': self.cache.taille_max,
+                'ttl_cache': self.cache.ttl,
+                'en_cours': len(self._en_cours),
+                'duree_fonctionnement': round(time.time() - self.debut, 1),
+            }
+
+
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    """
+    Routes : /resultat/<numero>, /stats, /metrics, /sante
+    """
+
+    service = None
+    silencieux = False
+    protocol_version = 'HTTP/1.1'
+    # En-têtes et corps envoyés ensemble (sinon Nagle + ACK retardé : +40 ms)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        chemin = self.path.split('?', 1)[0].rstrip('/')
+
+        if chemin == '/stats':
+            self._repondre(200, self.service.statistiques())
+        elif chemin == '/metrics':
+            self._repondre_texte(METRIQUES.texte_prometheus())
+        elif chemin == '/sante':
+            self._repondre(200, {'etat': 'ok'})
+        elif chemin.startswith('/resultat/'):
+            self._resultat(chemin[len('/resultat/'):])
+        else:
+            self._repondre(404, {'erreur': 'route inconnue',
+                                 'routes': ['/resultat/<numero>', '/stats',
+                                            '/metrics', '/sante']})
+
+    def _resultat(self, numero):
+        if not numero.isdigit():
+            self._repondre(400, {'erreur': f"numéro invalide '{numero}'"})
+            return
+
+        debut = time.perf_counter()
+        try:
+            resultat, source = self.service.consulter(numero)
+        except requests.exceptions.RequestException as e:
+            self._repondre(502, {'matricule': numero, 'erreur': f"Erreur de connexion: {e}"})
+            return
+        except Exception as e:
+            self._repondre(500, {'matricule': numero, 'erreur': f"Erreur: {e}"})
+            return
+        duree = (time.perf_counter() - debut) * 1000
+        METRIQUES.observer('consultation', duree / 1000)
+        METRIQUES.compter(f'consultations:source={source}')
+
+        self._repondre(200, {**resultat, 'source': source, 'duree_ms': round(duree, 2)})
+        if not self.silencieux:
+            print(f"🔎 {numero}: {resultat['admission']} ({source}, {duree:.1f} ms)")
+
+    def _repondre(self, code, donnees):
+        corps = json.dumps(donnees, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _repondre_texte(self, texte):
+        corps = texte.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        # Journal HTTP par défaut remplacé par la ligne de _resultat
+        pass
+
+
+def main():
+    """
+    Fonction principale
+    """
+    parser = argparse.ArgumentParser(
+        description="Serveur local de consultation des résultats BAC (JSON)")
+    parser.add_argument('--hote', default=HOTE_PAR_DEFAUT,
+                        help="adresse d'écoute (défaut: %(default)s)")
+    parser.add_argument('--port', type=int, default=PORT_PAR_DEFAUT,
+                        help="port d'écoute (défaut: %(default)s)")
+    parser.add_argument('--taille-lru', type=int, default=TAILLE_LRU_PAR_DEFAUT,
+                        help="nombre maximal de résultats gardés en mémoire "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--ttl-lru', type=float, default=TTL_LRU_PAR_DEFAUT,
+                        help="durée de validité d'un résultat en mémoire, en secondes "
+                             "(défaut: %(default)s)")
+    parser.add_argument('--ttl', type=float, default=None,
+                        help="durée de validité du cache disque des pages en secondes "
+                             f"(défaut: {client_http.TTL_PAR_DEFAUT})")
+    parser.add_argument('--hors-ligne', action='store_true',
+                        help="n'utiliser que le cache disque, sans accès réseau")
+    parser.add_argument('--parseur', choices=analyse_html.BACKENDS,
+                        default=analyse_html.backend_actif(),
+                        help="backend d'analyse HTML (défaut: %(default)s)")
+    parser.add_argument('--silencieux', action='store_true',
+                        help="ne pas afficher chaque consultation")
+    args = parser.parse_args()
+
+    analyse_html.configurer(args.parseur)
+    client_http.configurer_cache(ttl=args.ttl, hors_ligne=args.hors_ligne)
+
+    GestionnaireRequetes.service = ServiceResultats(args.taille_lru, args.ttl_lru)
+    GestionnaireRequetes.silencieux = args.silencieux
+    serveur = ThreadingHTTPServer((args.hote, args.port), GestionnaireRequetes)
+    serveur.daemon_threads = True
+
+    print(f"🌐 Serveur de résultats sur http://{args.hote}:{args.port}/resultat/<numero>")
+    print(f"💾 Cache mémoire: {args.taille_lru} résultat(s), {args.ttl_lru:.0f} s "
+          f"| statistiques: http://{args.hote}:{args.port}/stats")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt du serveur")
+    finally:
+        serveur.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Écriture incrémentale des résultats du traitement en lot (JSONL et CSV)
+Chaque candidat est écrit dès qu'il est traité ; le rapport texte
+(resultats_batch.txt) est ensuite généré à partir du flux JSONL.
+Le flux JSONL sert aussi de point de reprise (voir preparer_reprise) et
+de base au rafraîchissement des seuls résultats non définitifs (voir
+peut_changer et appliquer_mises_a_jour).
+"""
+
+import csv
+import json
+import os
+
+
+# Champs d'un résultat de recherche_batch, dans l'ordre des exports
+CHAMPS = ['nom', 'matricule', 'statut', 'admission', 'serie', 'moyenne']
+
+# Nombre de résultats écrits entre deux vidages des tampons sur disque
+FLUSH_PAR_DEFAUT = 20
+
+# Admissions encore susceptibles de changer (seconde session, vérification)
+ADMISSIONS_NON_DEFINITIVES = ('Session de rattrapage', 'À vérifier')
+
+# Libellés du rapport texte (sauvegarder_resultats) -> champs
+_LIBELLES_TXT = {'Nom': 'nom', 'Matricule': 'matricule', 'Statut': 'statut',
+                 'Admission': 'admission', 'Série': 'serie', 'Moyenne': 'moyenne'}
+
+
+class EcrivainResultats:
+    """
+    Ajoute les résultats à `<prefixe>.jsonl` et `<prefixe>.csv` au fil de l'eau
+
+    Les fichiers sont vidés sur disque tous les `flush_tous` résultats et à
+    la fermeture : en cas d'arrêt brutal, seuls les derniers résultats non
+    vidés sont perdus.
+    """
+
+    def __init__(self, prefixe='resultats_batch', formats=('jsonl', 'csv'),
+                 flush_tous=FLUSH_PAR_DEFAUT, ajout=False):
+        self.prefixe = prefixe
+        self.flush_tous = max(1, flush_tous)
+        self.nombre = 0
+        self._jsonl = None
+        self._csv = None
+        self._csv_writer = None
+        mode = 'a' if ajout else 'w'
+
+        if 'jsonl' in formats:
+            self._jsonl = open(self.chemin('jsonl'), mode, encoding='utf-8')
+        if 'csv' in formats:
+            self._csv = open(self.chemin('csv'), mode, encoding='utf-8', newline='')
+            self._csv_writer = csv.DictWriter(self._csv, fieldnames=CHAMPS,
+                                              extrasaction='ignore')
+            if self._csv.tell() == 0:
+                self._csv_writer.writeheader()
+
+    def chemin(self, extension):
+        """Chemin du fichier de sortie pour une extension donnée"""
+        return f"{self.prefixe}.{extension}"
+
+    def ajouter(self, resultat):
+        """
+        Écrit un résultat (dict au format de recherche_batch)
+        """
+        if self._jsonl:
+            self._jsonl.write(json.dumps(resultat, ensure_ascii=False) + '\n')
+        if self._csv_writer:
+            self._csv_writer.writerow(resultat)
+
+        self.nombre += 1
+        if self.nombre % self.flush_tous == 0:
+            self.vider()
+
+    def vider(self):
+        """Vide les tampons sur disque"""
+        for fichier in (self._jsonl, self._csv):
+            if fichier:
+                fichier.flush()
+
+    def fermer(self):
+        for fichier in (self._jsonl, self._csv):
+            if fichier:
+                fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def lire_resultats_jsonl(chemin):
+    """
+    Relit un flux JSONL de résultats, un dict à la fois
+    Une dernière ligne tronquée (arrêt brutal) est ignorée.
+    """
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
+
+
+def lire_resultats_txt(chemin):
+    """
+    Relit un rapport texte (resultats_batch.txt), un dict à la fois
+    Utile pour les sorties produites avant l'écriture du flux JSONL.
+    """
+    resultat = {}
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.rstrip('\n')
+            if ligne.startswith('-' * 10):
+                if 'matricule' in resultat:
+                    yield {champ: resultat.get(champ, '') for champ in CHAMPS}
+                resultat = {}
+                continue
+            libelle, separateur, valeur = ligne.partition(': ')
+            if separateur and libelle in _LIBELLES_TXT:
+                resultat[_LIBELLES_TXT[libelle]] = valeur
+
+
+def lire_resultats(chemin):
+    """
+    Relit une sortie de recherche_batch : flux JSONL ou rapport texte
+    """
+    if chemin.endswith('.txt'):
+        return lire_resultats_txt(chemin)
+    return lire_resultats_jsonl(chemin)
+
+
+def est_termine(resultat):
+    """
+    Un résultat est définitif s'il ne provient pas d'une erreur
+    (connexion, exception) : il n'a pas besoin d'être recherché à nouveau
+    """
+    return (resultat.get('admission') != 'Erreur'
+            and not resultat.get('statut', '').startswith('Erreur'))
+
+
+def peut_changer(resultat):
+    """
+    Le statut du candidat peut-il encore changer ? (rattrapage, à vérifier,
+    ou erreur lors de la recherche précédente)
+    """
+    return (not est_termine(resultat)
+            or resultat.get('admission') in ADMISSIONS_NON_DEFINITIVES)
+
+
+def remplace(ancien, nouveau):
+    """
+    Le nouveau résultat doit-il remplacer l'ancien ? Une erreur ne remplace
+    jamais un résultat obtenu, ni un candidat non trouvé une décision
+    (mêmes règles que la base de résultats)
+    """
+    if (nouveau.get('admission') == 'Non trouvé'
+            and ancien.get('admission') not in ('Non trouvé', 'Erreur')):
+        return False
+    return est_termine(nouveau) or not est_termine(ancien)
+
+
+def appliquer_mises_a_jour(resultats, mises_a_jour, prefixe='resultats_batch'):
+    """
+    Réécrit `<prefixe>.jsonl` et `<prefixe>.csv` à partir de `resultats`
+    (ordre conservé) en y appliquant `mises_a_jour` (matricule -> résultat)
+
+    `resultats` peut être lu depuis ces mêmes fichiers : ils ne sont remplacés
+    qu'une fois l'écriture terminée. Retourne la liste des (ancien, nouveau)
+    dont le statut a changé.
+    """
+    temporaire = f"{prefixe}.rafraichissement.tmp"
+    changements = []
+    with EcrivainResultats(temporaire) as ecrivain:
+        for resultat in resultats:
+            nouveau = mises_a_jour.get(resultat.get('matricule'))
+            if nouveau is not None and remplace(resultat, nouveau):
+                if nouveau.get('statut') != resultat.get('statut'):
+                    changements.append((resultat, nouveau))
+                resultat = nouveau
+            ecrivain.ajouter(resultat)
+
+    for extension in ('jsonl', 'csv'):
+        os.replace(ecrivain.chemin(extension), f"{prefixe}.{extension}")
+    return changements
+
+
+def preparer_reprise(prefixe='resultats_batch'):
+    """
+    Prépare la reprise d'un traitement interrompu
+
+    Ne conserve dans `<prefixe>.jsonl` (et `<prefixe>.csv`) que les résultats
+    définitifs, sans doublon, et retourne l'ensemble de leurs matricules.
+    Les candidats en erreur ou absents du flux seront donc recherchés à
+    nouveau, et leurs nouveaux résultats ajoutés à la suite.
+    """
+    chemin_jsonl = f"{prefixe}.jsonl"
+    termines = set()
+    if not os.path.exists(chemin_jsonl):
+        return termines
+
+    temporaire = f"{prefixe}.reprise.tmp"
+    with EcrivainResultats(temporaire) as ecrivain:
+        for resultat in lire_resultats_jsonl(chemin_jsonl):
+            matricule = resultat.get('matricule')
+            if est_termine(resultat) and matricule not in termines:
+                termines.add(matricule)
+                ecrivain.ajouter(resultat)
+
+    for extension in ('jsonl', 'csv'):
+        os.replace(ecrivain.chemin(extension), f"{prefixe}.{extension}")
+    return termines
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistiques incrémentales des résultats du traitement en lot
+Mises à jour à chaque résultat, en mémoire constante : compteurs par
+admission et par série, moyenne/variance en ligne (Welford), min/max,
+histogramme des moyennes par tranches de 0,5 point et percentiles
+approchés à partir de cet histogramme. Débit et temps restant estimé
+pour la ligne de progression.
+"""
+
+import math
+import time
+
+
+# Histogramme des moyennes : tranches de LARGEUR_TRANCHE sur [0, NOTE_MAX]
+NOTE_MAX = 20.0
+LARGEUR_TRANCHE = 0.5
+NB_TRANCHES = int(NOTE_MAX / LARGEUR_TRANCHE)
+
+# Nombre d'erreurs gardées pour le détail du résumé
+ERREURS_DETAILLEES = 20
+
+
+def _duree_lisible(secondes):
+    """Durée arrondie : '45 s', '12 min 05 s', '2 h 07 min'"""
+    secondes = int(round(secondes))
+    if secondes < 60:
+        return f"{secondes} s"
+    minutes, secondes = divmod(secondes, 60)
+    if minutes < 60:
+        return f"{minutes} min {secondes:02d} s"
+    heures, minutes = divmod(minutes, 60)
+    return f"{heures} h {minutes:02d} min"
+
+
+class AgregateurStatistiques:
+    """
+    Agrégateur alimenté résultat par résultat (dicts de recherche_batch)
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.admissions = {}
+        self.series = {}
+        self.nb_moyennes = 0
+        self._moyenne = 0.0
+        self._m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.histogramme = [0] * NB_TRANCHES
+        self.erreurs = []
+        self._debut = None
+        self._total_debut = 0
+        self.total_attendu = None
+
+    def demarrer_chrono(self, total_attendu=None):
+        """
+        Point de départ du débit affiché par ligne_progression ; les résultats
+        déjà comptés (reprise) sont exclus du débit mais pas du total
+        `total_attendu` : nombre total de résultats visé, pour l'estimation
+        du temps restant (None si inconnu, ex. mode flux)
+        """
+        self._debut = time.monotonic()
+        self._total_debut = self.total
+        self.total_attendu = total_attendu
+
+    def debit(self):
+        """Résultats par seconde depuis demarrer_chrono(), ou None"""
+        if self._debut is None:
+            return None
+        duree = time.monotonic() - self._debut
+        return (self.total - self._total_debut) / duree if duree > 0 else None
+
+    def ajouter(self, resultat):
+        """
+        Prend en compte un résultat
+        """
+        self.total += 1
+        admission = resultat['admission']
+        self.admissions[admission] = self.admissions.get(admission, 0) + 1
+
+        serie = resultat['serie']
+        if serie != 'Erreur' and serie != 'Non spécifiée':
+            self.series[serie] = self.series.get(serie, 0) + 1
+
+        if admission == 'Erreur' and len(self.erreurs) < ERREURS_DETAILLEES:
+            self.erreurs.append((resultat['nom'], resultat['matricule'], resultat['statut']))
+
+        moyenne = resultat['moyenne']
+        if moyenne != 'Non disponible' and moyenne != 'Erreur':
+            try:
+                self.ajouter_moyenne(float(str(moyenne).replace(',', '.')))
+            except ValueError:
+                pass
+
+    def ajouter_moyenne(self, valeur):
+        """
+        Met à jour moyenne, variance, extrêmes et histogramme (Welford)
+        """
+        self.nb_moyennes += 1
+        ecart = valeur - self._moyenne
+        self._moyenne += ecart / self.nb_moyennes
+        self._m2 += ecart * (valeur - self._moyenne)
+
+        self.minimum = valeur if self.minimum is None else min(self.minimum, valeur)
+        self.maximum = valeur if self.maximum is None else max(self.maximum, valeur)
+
+        tranche = int(min(max(valeur, 0.0), NOTE_MAX) / LARGEUR_TRANCHE)
+        self.histogramme[min(tranche, NB_TRANCHES - 1)] += 1
+
+    def compte(self, *admissions):
+        """Nombre de résultats ayant l'une des admissions données"""
+        return sum(self.admissions.get(a, 0) for a in admissions)
+
+    @property
+    def moyenne(self):
+        return self._moyenne if self.nb_moyennes else None
+
+    @property
+    def ecart_type(self):
+        if self.nb_moyennes < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.nb_moyennes - 1))
+
+    def percentile(self, p):
+        """
+        Percentile approché (0 <= p <= 100), interpolé dans la tranche
+        de l'histogramme qui le contient ; erreur inférieure à 0,5 point
+        """
+        if not self.nb_moyennes:
+            return None
+        rang = p / 100 * self.nb_moyennes
+        cumul = 0
+        for tranche, effectif in enumerate(self.histogramme):
+            if effectif and cumul + effectif >= rang:
+                debut = tranche * LARGEUR_TRANCHE
+                valeur = debut + (rang - cumul) / effectif * LARGEUR_TRANCHE
+                return min(max(valeur, self.minimum), self.maximum)
+            cumul += effectif
+        return self.maximum
+
+    def ligne_progression(self):
+        """
+        Résumé court affiché pendant le traitement
+        """
+        ligne = (f"📊 {self.total} traité(s) | ✅ {self.compte('Admis')} "
+                 f"| 🔄 {self.compte('Session de rattrapage')} "
+                 f"| ❌ {self.compte('Refusé', 'Échec')} "
+                 f"| ⚠️  {self.compte('Erreur')}")
+        if self.nb_moyennes:
+            ligne += f" | moyenne {self.moyenne:.2f} (médiane ≈ {self.percentile(50):.2f})"
+        debit = self.debit()
+        if debit:
+            ligne += f" | ⚡ {debit:.1f}/s"
+            if self.total_attendu:
+                restants = max(0, self.total_attendu - self.total)
+                ligne += f" | fin dans ≈ {_duree_lisible(restants / debit)}"
+        return ligne
+
+    def afficher(self):
+        """
+        Affiche le résumé complet
+        """
+        print("\n" + "=" * 60)
+        print("📊 RÉSUMÉ DE LA RECHERCHE EN LOT")
+        print("=" * 60)
+
+        print(f"📈 Total candidats traités: {self.total}")
+        print(f"✅ Admis: {self.compte('Admis')}")
+        print(f"🔄 Session de rattrapage: {self.compte('Session de rattrapage')}")
+        print(f"❌ Refusés/Échec: {self.compte('Refusé', 'Échec')}")
+        print(f"🔍 À vérifier: {self.compte('À vérifier')}")
+        print(f"❓ Non trouvés: {self.compte('Non trouvé')}")
+        print(f"⚠️  Erreurs: {self.compte('Erreur')}")
+
+        if self.series:
+            print("\n📚 Répartition par série:")
+            for serie, count in self.series.items():
+                print(f"  • {serie}: {count} candidat(s)")
+
+        if self.nb_moyennes:
+            print("\n📊 Statistiques des moyennes:")
+            print(f"  • Moyenne générale: {self.moyenne:.2f}")
+            print(f"  • Moyenne min: {self.minimum:.2f}")
+            print(f"  • Moyenne max: {self.maximum:.2f}")
+            print(f"  • Écart-type: {self.ecart_type:.2f}")
+            print(f"  • Percentiles (≈): P25 {self.percentile(25):.2f} | "
+                  f"médiane {self.percentile(50):.2f} | P75 {self.percentile(75):.2f} | "
+                  f"P90 {self.percentile(90):.2f}")
+            print(f"  • Candidats avec moyenne: {self.nb_moyennes}/{self.total}")
+            self.afficher_histogramme()
+
+        erreurs = self.compte('Erreur')
+        if erreurs > 0:
+            print("\n🔍 Détail des erreurs:")
+            for nom, matricule, statut in self.erreurs:
+                print(f"  • {nom} (#{matricule}): {statut}")
+            if erreurs > len(self.erreurs):
+                print(f"  • ... et {erreurs - len(self.erreurs)} autre(s)")
+
+    def afficher_histogramme(self, largeur=40):
+        """
+        Histogramme texte des moyennes (tranches non vides uniquement)
+        """
+        pic = max(self.histogramme)
+        if not pic:
+            return
+        print("\n📶 Répartition des moyennes (tranches de 0,5):")
+        for tranche, effectif in enumerate(self.histogramme):
+            if not effectif:
+                continue
+            debut = tranche * LARGEUR_TRANCHE
+            barre = '█' * max(1, round(effectif / pic * largeur))
+            print(f"  {debut:5.1f}-{debut + LARGEUR_TRANCHE:<5.1f} {barre} {effectif}")
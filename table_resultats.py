@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Table de résultats compacte, stockée par colonnes
+
+Au lieu d'un dict de six chaînes par candidat, chaque champ est une
+colonne typée (module array) :
+- moyenne : flottant (NaN si absente) + nombre de décimales d'origine ;
+- statut, admission, série : petits codes entiers vers un dictionnaire de
+  valeurs distinctes ;
+- matricule : entier (les matricules à zéro initial sont gardés à part) ;
+- nom : None quand c'est le nom par défaut 'Candidat_<matricule>'.
+
+Le filtrage et les comptages sont vectorisés avec NumPy s'il est installé
+(vue sans copie sur les colonnes), en Python pur sinon. Itérer sur la table
+redonne les dicts habituels de recherche_batch.
+"""
+
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Codes de la colonne 'decimales' pour les moyennes sans nombre de décimales
+# (_AUTRE : texte gardé dans _moyennes_texte, non numérique ou mal reproduit)
+_NON_DISPONIBLE = -1
+_ERREUR = -2
+_AUTRE = -3
+
+
+class ColonneCodee:
+    """
+    Colonne de chaînes encodées par dictionnaire (codes uint16)
+    """
+
+    def __init__(self, valeurs_connues=()):
+        self.valeurs = []
+        self._codes = {}
+        self.codes = array('H')
+        for valeur in valeurs_connues:
+            self.code(valeur)
+
+    def code(self, valeur):
+        """Code de la valeur (ajoutée au dictionnaire si nouvelle)"""
+        code = self._codes.get(valeur)
+        if code is None:
+            code = len(self.valeurs)
+            self.valeurs.append(valeur)
+            self._codes[valeur] = code
+        return code
+
+    def code_existant(self, valeur):
+        """Code de la valeur, ou None si elle n'apparaît pas dans la colonne"""
+        return self._codes.get(valeur)
+
+    def ajouter(self, valeur):
+        self.codes.append(self.code(valeur))
+
+    def __getitem__(self, i):
+        return self.valeurs[self.codes[i]]
+
+    def __setitem__(self, i, valeur):
+        self.codes[i] = self.code(valeur)
+
+    def reordonner(self, ordre):
+        self.codes = _reordonner(self.codes, ordre)
+
+
+def _reordonner(colonne, ordre):
+    """
+    Nouvelle colonne array : colonne[ordre[0]], colonne[ordre[1]], ...
+    """
+    if np is not None:
+        vue = np.frombuffer(colonne, dtype=colonne.typecode)
+        return array(colonne.typecode, vue[ordre].tobytes())
+    return array(colonne.typecode, (colonne[i] for i in ordre))
+
+
+class TableResultats:
+    """
+    Résultats de recherche_batch en colonnes
+    """
+
+    def __init__(self):
+        self.matricules = array('q')
+        self._matricules_texte = {}          # ligne -> matricule à zéro initial
+        self.noms = []                       # None = 'Candidat_<matricule>'
+        self.statuts = ColonneCodee()
+        self.admissions = ColonneCodee(['Admis', 'Refusé', 'Échec',
+                                        'Session de rattrapage', 'À vérifier',
+                                        'Non trouvé', 'Erreur'])
+        self.series = ColonneCodee(['BAC - Sciences naturelles (SN)',
+                                    'BAC - Sciences mathématiques (SM)',
+                                    'BAC - Lettres', 'Non spécifiée', 'Erreur'])
+        self.moyennes = array('d')
+        self.decimales = array('b')
+        self._moyennes_texte = {}            # ligne -> texte d'origine (code _AUTRE)
+        self.positions = array('q')          # ordre d'origine des matricules
+
+    def __len__(self):
+        return len(self.moyennes)
+
+    # --- Écriture ---------------------------------------------------------
+
+    def _encoder_moyenne(self, ligne, texte):
+        if texte == 'Non disponible':
+            return math.nan, _NON_DISPONIBLE
+        if texte == 'Erreur':
+            return math.nan, _ERREUR
+        try:
+            valeur = float(str(texte).replace(',', '.'))
+        except ValueError:
+            self._moyennes_texte[ligne] = texte
+            return math.nan, _AUTRE
+        point = str(texte).replace(',', '.')
+        decimales = len(point.split('.', 1)[1]) if '.' in point else 0
+        if decimales > 127 or f"{valeur:.{decimales}f}" != str(texte):
+            # '06.80', '12.', '12,5'... : texte d'origine gardé tel quel,
+            # la valeur reste comptée dans les statistiques
+            self._moyennes_texte[ligne] = texte
+            return valeur, _AUTRE
+        return valeur, decimales
+
+    def ajouter(self, resultat, position=None):
+        """
+        Ajoute un résultat (dict au format de recherche_batch)
+        `position` : rang du matricule dans l'entrée, pour trier_par_position
+        """
+        ligne = len(self)
+        matricule = resultat['matricule']
+        self.matricules.append(int(matricule))
+        if str(int(matricule)) != matricule:
+            self._matricules_texte[ligne] = matricule
+
+        nom = resultat['nom']
+        self.noms.append(None if nom == f"Candidat_{matricule}" else nom)
+        self.statuts.ajouter(resultat['statut'])
+        self.admissions.ajouter(resultat['admission'])
+        self.series.ajouter(resultat['serie'])
+
+        valeur, decimales = self._encoder_moyenne(ligne, resultat['moyenne'])
+        self.moyennes.append(valeur)
+        self.decimales.append(decimales)
+        self.positions.append(ligne if position is None else position)
+
+    def remplacer(self, ligne, resultat):
+        """
+        Remplace le résultat d'une ligne existante (même matricule)
+        """
+        nom = resultat['nom']
+        self.noms[ligne] = None if nom == f"Candidat_{self.matricule(ligne)}" else nom
+        self.statuts[ligne] = resultat['statut']
+        self.admissions[ligne] = resultat['admission']
+        self.series[ligne] = resultat['serie']
+        self._moyennes_texte.pop(ligne, None)
+        valeur, decimales = self._encoder_moyenne(ligne, resultat['moyenne'])
+        self.moyennes[ligne] = valeur
+        self.decimales[ligne] = decimales
+
+    def trier_par_position(self):
+        """
+        Réordonne les lignes selon leur position d'origine
+        Chaque colonne est permutée telle quelle, sans repasser par les dicts.
+        """
+        if np is not None:
+            ordre = np.argsort(np.frombuffer(self.positions, dtype=np.int64), kind='stable')
+            if not len(ordre) or (np.diff(ordre) == 1).all():
+                return
+        else:
+            ordre = sorted(range(len(self)), key=self.positions.__getitem__)
+            if ordre == list(range(len(self))):
+                return
+
+        for nom in ('matricules', 'moyennes', 'decimales', 'positions'):
+            setattr(self, nom, _reordonner(getattr(self, nom), ordre))
+        for colonne in (self.statuts, self.admissions, self.series):
+            colonne.reordonner(ordre)
+        self.noms = [self.noms[i] for i in ordre]
+
+        # Lignes des valeurs gardées à part : ancienne ligne -> nouvelle
+        if self._matricules_texte or self._moyennes_texte:
+            gardees = self._matricules_texte.keys() | self._moyennes_texte.keys()
+            nouvelle = {int(ancienne): i for i, ancienne in enumerate(ordre)
+                        if int(ancienne) in gardees}
+            self._matricules_texte = {nouvelle[l]: v for l, v in self._matricules_texte.items()}
+            self._moyennes_texte = {nouvelle[l]: v for l, v in self._moyennes_texte.items()}
+
+    # --- Lecture ----------------------------------------------------------
+
+    def matricule(self, ligne):
+        return self._matricules_texte.get(ligne) or str(self.matricules[ligne])
+
+    def moyenne_texte(self, ligne):
+        decimales = self.decimales[ligne]
+        if decimales == _NON_DISPONIBLE:
+            return 'Non disponible'
+        if decimales == _ERREUR:
+            return 'Erreur'
+        if decimales == _AUTRE:
+            return self._moyennes_texte[ligne]
+        return f"{self.moyennes[ligne]:.{decimales}f}"
+
+    def ligne(self, i):
+        """
+        Résultat de la ligne i au format dict de recherche_batch
+        """
+        matricule = self.matricule(i)
+        return {
+            'nom': self.noms[i] or f"Candidat_{matricule}",
+            'matricule': matricule,
+            'statut': self.statuts[i],
+            'admission': self.admissions[i],
+            'serie': self.series[i],
+            'moyenne': self.moyenne_texte(i),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.ligne(i)
+
+    def vers_dicts(self):
+        """Liste des résultats au format dict"""
+        return list(self)
+
+    # --- Requêtes vectorisées ----------------------------------------------
+
+    def colonnes_numpy(self):
+        """
+        Vues NumPy (sans copie) sur les colonnes numériques
+        """
+        if np is None:
+            raise RuntimeError("NumPy n'est pas installé")
+        return {
+            'matricule': np.frombuffer(self.matricules, dtype=np.int64),
+            'moyenne': np.frombuffer(self.moyennes, dtype=np.float64),
+            'admission': np.frombuffer(self.admissions.codes, dtype=np.uint16),
+            'serie': np.frombuffer(self.series.codes, dtype=np.uint16),
+        }
+
+    def filtrer(self, admission=None, serie=None, moyenne_min=None, moyenne_max=None):
+        """
+        Numéros des lignes correspondant à tous les critères donnés
+        `serie` peut être un libellé complet ou un code court ('SN', 'SM', 'Lettres')
+        """
+        code_admission = self._code_critere(self.admissions, admission)
+        code_serie = self._code_critere(self.series, serie)
+        if code_admission == -1 or code_serie == -1:
+            return []
+
+        if np is not None:
+            colonnes = self.colonnes_numpy()
+            masque = np.ones(len(self), dtype=bool)
+            if code_admission is not None:
+                masque &= colonnes['admission'] == code_admission
+            if code_serie is not None:
+                masque &= colonnes['serie'] == code_serie
+            if moyenne_min is not None:
+                masque &= colonnes['moyenne'] >= moyenne_min
+            if moyenne_max is not None:
+                masque &= colonnes['moyenne'] <= moyenne_max
+            return np.flatnonzero(masque).tolist()
+
+        lignes = []
+        for i, (a, s, m) in enumerate(zip(self.admissions.codes, self.series.codes,
+                                          self.moyennes)):
+            if code_admission is not None and a != code_admission:
+                continue
+            if code_serie is not None and s != code_serie:
+                continue
+            if moyenne_min is not None and not m >= moyenne_min:
+                continue
+            if moyenne_max is not None and not m <= moyenne_max:
+                continue
+            lignes.append(i)
+        return lignes
+
+    @staticmethod
+    def _code_critere(colonne, valeur):
+        if valeur is None:
+            return None
+        code = colonne.code_existant(valeur)
+        if code is None:
+            # Code court de série : 'SN' -> 'BAC - Sciences naturelles (SN)'
+            for libelle in colonne.valeurs:
+                if f"({valeur.upper()})" in libelle or libelle.lower().endswith(valeur.lower()):
+                    return colonne.code_existant(libelle)
+            return -1
+        return code
+
+    def compter_par(self, champ):
+        """
+        Effectifs par valeur d'une colonne codée ('statut', 'admission', 'serie')
+        """
+        colonne = {'statut': self.statuts, 'admission': self.admissions,
+                   'serie': self.series}[champ]
+        if np is not None and len(self):
+            effectifs = np.bincount(np.frombuffer(colonne.codes, dtype=np.uint16),
+                                    minlength=len(colonne.valeurs))
+        else:
+            effectifs = [0] * len(colonne.valeurs)
+            for code in colonne.codes:
+                effectifs[code] += 1
+        return {colonne.valeurs[code]: int(n) for code, n in enumerate(effectifs) if n}
+
+    def statistiques_moyennes(self, lignes=None):
+        """
+        (nombre, moyenne, min, max) des moyennes disponibles
+        """
+        if np is not None:
+            moyennes = self.colonnes_numpy()['moyenne']
+            if lignes is not None:
+                moyennes = moyennes[lignes]
+            moyennes = moyennes[~np.isnan(moyennes)]
+            if not len(moyennes):
+                return 0, None, None, None
+            return (len(moyennes), float(moyennes.mean()),
+                    float(moyennes.min()), float(moyennes.max()))
+
+        source = self.moyennes if lignes is None else (self.moyennes[i] for i in lignes)
+        valeurs = [m for m in source if not math.isnan(m)]
+        if not valeurs:
+            return 0, None, None, None
+        return len(valeurs), sum(valeurs) / len(valeurs), min(valeurs), max(valeurs)